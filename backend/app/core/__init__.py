@@ -2,6 +2,7 @@
 from .config import get_settings, Settings
 from .auth import get_current_user, TokenData
 from .supabase import get_supabase, get_supabase_admin, supabase, supabase_admin
+from .db import get_db, get_db_admin, run_query, QueryTimeout
 
 __all__ = [
     "get_settings",
@@ -12,4 +13,8 @@ __all__ = [
     "get_supabase_admin",
     "supabase",
     "supabase_admin",
+    "get_db",
+    "get_db_admin",
+    "run_query",
+    "QueryTimeout",
 ]
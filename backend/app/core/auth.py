@@ -1,13 +1,21 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import jwt, JWTError
+from jose import jwk, jwt, JWTError
 from typing import Optional, Dict, Any
 from pydantic import BaseModel
+import time
+from .cache import TTLCache, digest_key
 from .config import get_settings
 
 settings = get_settings()
 security = HTTPBearer()
 
+# HMAC key built once instead of on every decode
+_jwt_key = jwk.construct(settings.supabase_jwt_secret, "HS256") if settings.supabase_jwt_secret else None
+
+# Verified token digest -> TokenData; entries expire with the token
+_token_cache = TTLCache(max_entries=settings.auth_cache_size, ttl=settings.auth_cache_max_ttl)
+
 
 class TokenData(BaseModel):
     """JWT token payload data."""
@@ -38,13 +46,18 @@ async def get_current_user(
     if token == "mock_token_for_demo":
         return TokenData(user_id="00000000-0000-0000-0000-000000000000", email="mock@example.com")
     
+    cache_key = digest_key(token)
+    cached = _token_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         # Decode JWT - for dev, decode without signature verification
         # In production, set SUPABASE_JWT_SECRET for proper verification
-        if settings.supabase_jwt_secret:
+        if _jwt_key is not None:
             payload = jwt.decode(
                 token,
-                settings.supabase_jwt_secret,
+                _jwt_key,
                 algorithms=["HS256"],
                 options={"verify_aud": False}  # Supabase uses various audiences
             )
@@ -71,7 +84,9 @@ async def get_current_user(
                 headers={"WWW-Authenticate": "Bearer"},
             )
         
-        return TokenData(user_id=user_id, email=email)
+        token_data = TokenData(user_id=user_id, email=email)
+        _cache_token(cache_key, token_data, payload.get("exp"))
+        return token_data
         
     except JWTError as e:
         print(f"JWT Error: {e}")  # Debug logging
@@ -82,6 +97,15 @@ async def get_current_user(
         )
 
 
+def _cache_token(cache_key: str, token_data: TokenData, exp: Any) -> None:
+    """Remember a decoded token until it expires (capped by auth_cache_max_ttl)."""
+    ttl = settings.auth_cache_max_ttl
+    if isinstance(exp, (int, float)):
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _token_cache.set(cache_key, token_data, ttl)
+
+
 async def get_current_user_with_profile(
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> Dict[str, Any]:
@@ -0,0 +1,168 @@
+"""In-process caching helpers.
+
+``TTLCache`` is a size-bounded LRU whose entries expire after a per-key TTL.
+``SingleFlight`` lets concurrent callers for the same key share one
+in-flight coroutine instead of each hitting the upstream. ``AsyncCache``
+combines the two for async loaders and can serve stale values while a
+refresh runs in the background.
+"""
+import asyncio
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def digest_key(*parts: Any) -> str:
+    """Stable cache key for secrets such as access tokens (never store them raw)."""
+    raw = "\x1f".join(str(p) for p in parts)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class TTLCache:
+    """LRU cache with per-entry expiry."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or ``default`` if missing or expired."""
+        item = self._data.get(key)
+        if item is None:
+            return default
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value for ``ttl`` seconds (defaults to the cache TTL)."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+_MISSING = object()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls for the same key into one running task."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, "asyncio.Task[Any]"] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn`` for ``key`` unless a call is already in flight, then share its result."""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+        # Shield so one caller being cancelled doesn't cancel the shared work
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: "asyncio.Task[Any]") -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+
+class AsyncCache:
+    """
+    LRU cache for async loaders with per-key TTL and stale-while-revalidate.
+
+    Fresh hits return immediately. Within ``stale_ttl`` after expiry the old
+    value is returned and one background refresh is started. Concurrent misses
+    share a single load. Loaders returning ``None`` are treated as failures
+    and never stored.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300.0, stale_ttl: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # key -> (fresh_until, stale_until, value)
+        self._data: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        self._flight = SingleFlight()
+        self._background: Set["asyncio.Task[Any]"] = set()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+    ) -> Any:
+        """Return the cached value for ``key``, calling ``loader`` on a miss."""
+        item = self._data.get(key)
+        if item is not None:
+            fresh_until, stale_until, value = item
+            now = time.monotonic()
+            if now < fresh_until:
+                self._data.move_to_end(key)
+                return value
+            if now < stale_until:
+                self._data.move_to_end(key)
+                self._revalidate(key, loader, ttl)
+                return value
+            del self._data[key]
+
+        return await self._flight.do(key, lambda: self._load(key, loader, ttl))
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        fresh_until = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (fresh_until, fresh_until + self.stale_ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or everything when no key is given."""
+        if key is None:
+            self._data.clear()
+        else:
+            self._data.pop(key, None)
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> Any:
+        value = await loader()
+        if value is not None:
+            self.set(key, value, ttl)
+        return value
+
+    def _revalidate(self, key: Hashable, loader: Callable[[], Awaitable[Any]], ttl: Optional[float]) -> None:
+        if self._flight.in_flight(key):
+            return
+        task = asyncio.ensure_future(self._flight.do(key, lambda: self._load(key, loader, ttl)))
+        # Keep a reference so the task isn't garbage collected mid-flight
+        self._background.add(task)
+        task.add_done_callback(self._background_done)
+
+    def _background_done(self, task: "asyncio.Task[Any]") -> None:
+        self._background.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Background cache refresh failed: {task.exception()}")
@@ -1,6 +1,15 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 from typing import List, Optional
+import os
+
+# Backend root (the directory containing app/); relative data paths resolve against it
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def resolve_path(path: str) -> str:
+    """Absolute form of a configured path, taking relative paths from BACKEND_DIR."""
+    return path if os.path.isabs(path) else os.path.join(BACKEND_DIR, path)
 
 
 class Settings(BaseSettings):
@@ -11,11 +20,20 @@ class Settings(BaseSettings):
     supabase_key: str
     supabase_service_key: Optional[str] = None  # Made optional
     supabase_jwt_secret: Optional[str] = None  # For JWT verification
+    supabase_query_timeout: float = 10.0  # Seconds per query (app.core.db.run_query)
+    supabase_page_size: int = 1000  # Rows per keyset page (PostgREST max-rows default)
+    supabase_in_chunk_size: int = 200  # Values per in_() filter chunk, keeps URLs short
+    auth_cache_size: int = 10000  # Verified JWTs kept in memory
+    auth_cache_max_ttl: float = 300.0  # Seconds; entries never outlive the token's exp
     
     # AI - support both OpenAI and Gemini
     openai_api_key: Optional[str] = ""
     gemini_api_key: Optional[str] = ""  # Primary: caption generation & audience persona
     gemini_api_key_secondary: Optional[str] = ""  # Secondary: hook detection & chatbot
+    llm_failure_threshold: int = 3  # Consecutive failures before a model/key route cools down
+    llm_cooldown_base: float = 10.0  # Seconds, doubled per repeated trip
+    llm_cooldown_max: float = 300.0
+    llm_quota_cooldown: float = 60.0  # Used when a 429 has no retry delay
 
     # Ollama (Text Insights)
     ollama_base_url: str = "http://localhost:11434/v1"
@@ -29,16 +47,76 @@ class Settings(BaseSettings):
     # Social APIs
     youtube_api_key: Optional[str] = ""
     youtube_access_token: Optional[str] = ""
+    youtube_cache_ttl: float = 300.0  # Channel stats / videos served fresh (seconds)
+    youtube_cache_stale_ttl: float = 900.0  # Extra time served stale while refreshing
     instagram_client_id: Optional[str] = ""
     instagram_client_secret: Optional[str] = ""
     instagram_access_token: Optional[str] = ""  # Will be mapped from IG_PAGE_ACCESS_TOKEN if present
+    instagram_identity_ttl: float = 3600.0  # Cached page / IG business ID / profile (seconds)
+    instagram_counters_ttl: float = 300.0  # Cached followers/following/media counts (seconds)
     
     # Voice AI
     elevenlabs_api_key: Optional[str] = ""
+    tts_pool_size: int = 2  # Warm pyttsx3 worker processes
+    tts_queue_limit: int = 16  # Waiting speech requests before returning 503
+    tts_timeout_seconds: float = 30.0
+    speech_cache_dir: str = "speech_cache"  # Relative to the backend directory
+    speech_cache_max_mb: int = 256  # LRU-evicted beyond this
+    script_analysis_ttl: float = 1800.0  # Cached voice-coach script analyses (seconds)
+    script_analysis_cache_size: int = 2048
     
     # Groq (for LLaVA)
     groq_api_key: Optional[str] = ""
     
+    # Profile cache (plan/role checks on gated routes)
+    profile_cache_ttl: float = 30.0  # Seconds; writes through UserService/AdminService invalidate immediately
+    profile_cache_size: int = 10000
+    
+    # Analytics metrics store
+    metrics_store_max_users: int = 256  # Users kept in memory (LRU)
+    metrics_store_refresh_seconds: float = 60.0  # Min seconds between incremental loads
+    metrics_store_watermark_lag: float = 300.0  # Seconds re-read before each watermark (late commits)
+    metrics_store_reload_seconds: float = 3600.0  # Full reload interval (picks up edited/deleted posts)
+    metrics_rollup_max_lag: float = 7200.0  # Older fold watermarks fall back to raw metrics (seconds)
+    
+    # Image processing
+    image_pool_workers: int = 2  # Processes for resize/enhance/JPEG work
+    image_pool_queue_limit: int = 64  # Queued image jobs before returning 503
+    
+    # Video processing
+    video_job_slots: int = 2  # Concurrent video jobs per process (each holds one temp file)
+    hook_hedging: bool = True  # Race a second vision provider when the first is slow
+    hook_hedge_percentile: float = 0.9  # Primary latency percentile to wait before hedging
+    hook_hedge_delay: float = 8.0  # Seconds to wait until enough latency samples exist
+    hook_hedge_min_delay: float = 1.0
+    hook_hedge_max_delay: float = 20.0
+    hook_cache_max_entries: int = 512  # Cached hook analyses (all users)
+    hook_cache_max_distance: int = 6  # Max differing dHash bits per frame (of 64) for a hit
+    hook_cache_ttl: float = 86400.0
+    hook_prerank: bool = True  # Score frames locally and send only the best to the VLM
+    hook_scan_seconds: float = 10.0  # Opening window sampled for candidate frames
+    hook_scan_step: float = 0.25
+    hook_batch_max_videos: int = 50  # Videos per batch submission
+    hook_batch_extract_workers: int = 2  # Processes decoding batch videos
+    hook_batch_vlm_concurrency: int = 3  # Concurrent VLM calls for batch jobs
+    hook_batch_job_ttl: float = 3600.0  # Finished jobs kept for polling (seconds)
+    hook_batch_dir: str = ""  # Upload storage for queued videos (system temp if empty)
+    hook_batch_max_pending: int = 200  # Unfinished batch videos across all users
+    hook_batch_max_pending_per_user: int = 50
+    hook_batch_max_spool_mb: int = 2048  # Uploads waiting on disk before batches are refused
+    
+    # Platform sync
+    sync_workers: int = 8  # Accounts synced concurrently
+    sync_max_attempts: int = 3
+    sync_backoff_base: float = 2.0  # Seconds, doubled per retry (with jitter)
+    sync_backoff_max: float = 60.0
+    sync_interval_hours: float = 6.0  # Also the max age of a resumable checkpoint
+    sync_checkpoint_file: str = "sync_checkpoint.json"  # Relative to the backend directory
+    instagram_sync_rate: float = 5.0  # Graph API calls per second
+    instagram_sync_burst: float = 50.0
+    youtube_sync_rate: float = 2.0  # Data API calls per second
+    youtube_sync_burst: float = 20.0
+    
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.cors_origins.split(",")]
@@ -0,0 +1,159 @@
+"""Async Supabase data access.
+
+Queries go through supabase-py's ``AsyncClient`` on the pooled ``supabase``
+HTTP client, so a slow PostgREST round trip only suspends the coroutine
+waiting on it instead of a worker thread or the event loop. ``run_query``
+awaits a query builder with a per-query timeout; ``stream_rows`` reads large
+results in keyset-paginated batches.
+
+The synchronous clients in ``app.core.supabase`` remain for the admin scripts.
+"""
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence, Tuple
+
+from supabase import AsyncClient, AsyncClientOptions
+
+from .config import get_settings
+from .http import get_http_client
+
+settings = get_settings()
+
+
+class QueryTimeout(Exception):
+    """A Supabase query took longer than its timeout."""
+
+
+_clients: Dict[str, AsyncClient] = {}
+
+
+def _client(name: str, key: str) -> AsyncClient:
+    session = get_http_client("supabase")
+    client = _clients.get(name)
+    # Rebuild if the pooled HTTP client was closed and recreated
+    if client is None or client.options.httpx_client is not session:
+        options = AsyncClientOptions(
+            # Server-side API key auth; no user session to restore or refresh
+            headers={"Authorization": f"Bearer {key}"},
+            auto_refresh_token=False,
+            persist_session=False,
+            httpx_client=session,
+        )
+        client = AsyncClient(settings.supabase_url, key, options)
+        _clients[name] = client
+    return client
+
+
+def get_db() -> AsyncClient:
+    """Async Supabase client (anon key)."""
+    return _client("anon", settings.supabase_key)
+
+
+def get_db_admin() -> Optional[AsyncClient]:
+    """Async Supabase client with the service key (None if not configured)."""
+    if not settings.supabase_service_key:
+        return None
+    return _client("service", settings.supabase_service_key)
+
+
+async def run_query(query: Any, timeout: Optional[float] = None) -> Any:
+    """
+    Execute an async query builder.
+
+    Args:
+        query: Builder from ``get_db()``/``get_db_admin()`` (table, rpc, ...)
+        timeout: Seconds before giving up (defaults to supabase_query_timeout)
+
+    Raises:
+        QueryTimeout: If the query did not finish in time
+    """
+    timeout = settings.supabase_query_timeout if timeout is None else timeout
+    try:
+        return await asyncio.wait_for(query.execute(), timeout)
+    except asyncio.TimeoutError:
+        raise QueryTimeout(f"Supabase query timed out after {timeout:g}s")
+
+
+async def stream_rows(
+    query: Callable[[], Any],
+    keyset: Sequence[str] = ("collected_at", "id"),
+    in_filter: Optional[Tuple[str, Sequence[Any]]] = None,
+    page_size: Optional[int] = None,
+    chunk_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Yield the rows of a large read in batches.
+
+    Pages are ordered by ``keyset`` and each page starts after the last row
+    of the previous one, so no request uses OFFSET or exceeds PostgREST's
+    max-rows. Keyset columns may be nullable: NULLs sort last and the page
+    predicate matches them with ``is.null``, so rows with a NULL key are read
+    rather than dropped or turned into an invalid filter. An ``in_filter`` is
+    split into chunks of values to keep URLs short. Rows come back in keyset
+    order within each chunk.
+
+    Args:
+        query: Returns a fresh builder with ``select`` and filters applied
+            (called once per page; the select must include the keyset columns,
+            and the query must not use ``or_`` itself)
+        keyset: Columns that are unique together, e.g. (timestamp, id); end
+            with a non-null one so rows sharing a NULL prefix can be told apart
+        in_filter: ``(column, values)`` to match with chunked ``in_`` filters
+        page_size: Rows per request (defaults to supabase_page_size)
+        chunk_size: Values per ``in_`` chunk (defaults to supabase_in_chunk_size)
+        timeout: Per-page timeout passed to ``run_query``
+    """
+    page_size = page_size or settings.supabase_page_size
+    if in_filter is None:
+        chunks: List[Optional[List[Any]]] = [None]
+    else:
+        column, values = in_filter
+        chunk_size = chunk_size or settings.supabase_in_chunk_size
+        values = list(values)
+        chunks = [values[i:i + chunk_size] for i in range(0, len(values), chunk_size)]
+
+    for chunk in chunks:
+        after: Optional[List[Any]] = None
+        while True:
+            builder = query()
+            if chunk is not None:
+                builder = builder.in_(column, chunk)
+            if after is not None:
+                builder = builder.or_(after)
+            for key in keyset:
+                builder = builder.order(key, nullsfirst=False)
+
+            response = await run_query(builder.limit(page_size), timeout)
+            rows = response.data or []
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                break
+            after = _after(keyset, [rows[-1][key] for key in keyset])
+            if after is None:
+                # Last row is NULL in every remaining key: nothing sorts after it
+                break
+
+
+def _after(keyset: Sequence[str], values: Sequence[Any]) -> Optional[str]:
+    """
+    PostgREST ``or`` filter for rows after ``values`` in keyset order
+    (ascending, NULLs last), or None if no row can follow them.
+    """
+    column, value = keyset[0], values[0]
+    rest = _after(keyset[1:], values[1:]) if len(keyset) > 1 else None
+    if value is None:
+        # Only rows that are also NULL here can follow, and only on later keys
+        return f"and({column}.is.null,or({rest}))" if rest is not None else None
+
+    value = _quote(value)
+    terms = [f"{column}.gt.{value}", f"{column}.is.null"]
+    if rest is not None:
+        terms.append(f"and({column}.eq.{value},or({rest}))")
+    return ",".join(terms)
+
+
+def _quote(value: Any) -> str:
+    # Double-quote so timestamps (':', '+') and commas survive the filter syntax
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
@@ -0,0 +1,96 @@
+"""Shared outbound HTTP clients.
+
+One pooled ``httpx.AsyncClient`` per upstream keeps TCP/TLS connections alive
+across requests instead of opening a new client for every call. Clients are
+created lazily (or eagerly from the app lifespan) and closed on shutdown.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, NamedTuple, Optional
+import logging
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:  # httpx[http2] not installed
+    HTTP2_AVAILABLE = False
+
+
+class Upstream(NamedTuple):
+    """Connection settings for one upstream host."""
+    timeout: float
+    connect_timeout: float = 5.0
+    max_connections: int = 50
+    max_keepalive: int = 20
+    follow_redirects: bool = False
+
+
+UPSTREAMS: Dict[str, Upstream] = {
+    "facebook_graph": Upstream(timeout=15.0),  # graph.facebook.com
+    "instagram_graph": Upstream(timeout=15.0),  # graph.instagram.com
+    "instagram_web": Upstream(timeout=10.0, max_connections=10, max_keepalive=5, follow_redirects=True),
+    "youtube": Upstream(timeout=15.0),  # www.googleapis.com
+    "twitter": Upstream(timeout=15.0),
+    "linkedin": Upstream(timeout=15.0),
+    "openrouter": Upstream(timeout=60.0, max_connections=20, max_keepalive=10),
+    "gemini": Upstream(timeout=60.0, max_connections=20, max_keepalive=10),  # generativelanguage.googleapis.com
+    "oauth": Upstream(timeout=20.0, max_connections=20, max_keepalive=5),
+    "supabase": Upstream(timeout=30.0, max_connections=100, max_keepalive=20),  # PostgREST; per-query timeouts in app.core.db
+}
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def _create_client(name: str) -> httpx.AsyncClient:
+    upstream = UPSTREAMS[name]
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        timeout=httpx.Timeout(upstream.timeout, connect=upstream.connect_timeout),
+        limits=httpx.Limits(
+            max_connections=upstream.max_connections,
+            max_keepalive_connections=upstream.max_keepalive,
+            keepalive_expiry=60.0,
+        ),
+        follow_redirects=upstream.follow_redirects,
+    )
+
+
+def get_http_client(name: str) -> httpx.AsyncClient:
+    """Get the pooled client for an upstream, creating it on first use."""
+    client = _clients.get(name)
+    if client is None or client.is_closed:
+        client = _create_client(name)
+        _clients[name] = client
+    return client
+
+
+@asynccontextmanager
+async def http_client(name: str) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Borrow the pooled client for an upstream.
+
+    Drop-in for ``async with httpx.AsyncClient() as client`` that leaves the
+    connection pool open when the block exits.
+    """
+    yield get_http_client(name)
+
+
+def init_http_clients(names: Optional[list] = None) -> None:
+    """Create clients up front (called from the app lifespan)."""
+    for name in names or UPSTREAMS:
+        get_http_client(name)
+    logger.info(f"HTTP clients ready (http2={'on' if HTTP2_AVAILABLE else 'off'})")
+
+
+async def close_http_clients() -> None:
+    """Close every pooled client (called on shutdown)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.error(f"Error closing HTTP client: {e}")
@@ -0,0 +1,73 @@
+"""Request body limits for upload routes.
+
+FastAPI parses a multipart body (spooling every file to disk) before the
+handler runs, so a size check inside the handler only happens after the
+whole upload has been received. ``UploadLimitMiddleware`` enforces per-path
+limits at the ASGI layer instead: a declared ``Content-Length`` over the
+limit is rejected before any body is read, and a body without one is
+counted as it streams in and cut off with a 413 once it passes the limit.
+"""
+import json
+from typing import Dict
+
+
+class BodyTooLarge(Exception):
+    """The request body passed its route's limit while streaming."""
+
+
+class UploadLimitMiddleware:
+    """Reject request bodies larger than the limit configured for their path."""
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits  # Exact path -> max body bytes
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path", "")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        declared = dict(scope.get("headers") or []).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            await _too_large(send, limit)
+            return
+
+        received = 0
+        responded = False
+
+        async def limited_receive():
+            nonlocal received, responded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    if not responded:
+                        responded = True
+                        await _too_large(send, limit)
+                    raise BodyTooLarge(f"Request body over {limit} bytes")
+            return message
+
+        async def guarded_send(message):
+            # The app may still answer (e.g. a 400 for the aborted parse); ours went first
+            if not responded:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except BodyTooLarge:
+            pass
+
+
+async def _too_large(send, limit: int) -> None:
+    body = json.dumps({"detail": f"Upload too large. Maximum size: {limit // (1024 * 1024)}MB"}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 413,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            (b"connection", b"close"),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
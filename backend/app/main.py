@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import get_settings
+from app.core.http import init_http_clients, close_http_clients
 from app.routers import analytics, platforms, ai, reports, voice_coach, hooks, users, competitors, admin
 from app.routers.oauth import router as oauth_router
 
@@ -27,9 +28,29 @@ async def lifespan(app: FastAPI):
     check_key("ElevenLabs", settings.elevenlabs_api_key)
     check_key("Supabase URL", settings.supabase_url)
     
+    # Pooled outbound HTTP clients
+    init_http_clients()
+    
+    # Warm TTS workers for the voice coach
+    from app.services.tts_pool import tts_pool
+    try:
+        await tts_pool.start()
+    except Exception as e:
+        print(f"⚠️ TTS pool not started: {e}")
+    
+    # Index cached speech now rather than on the first request
+    from app.services.speech_cache import speech_cache
+    await speech_cache.load()
+    
     yield
     # Shutdown
     print("👋 Social Leaf Backend shutting down...")
+    await tts_pool.close()
+    from app.services.hook_jobs import hook_jobs
+    await hook_jobs.close()
+    from app.services.image_pool import image_pool
+    image_pool.close()
+    await close_http_clients()
 
 
 app = FastAPI(
@@ -39,6 +60,10 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Reject oversized uploads before FastAPI spools them (added first so CORS wraps its 413s)
+from app.core.uploads import UploadLimitMiddleware
+app.add_middleware(UploadLimitMiddleware, limits=hooks.UPLOAD_LIMITS)
+
 # CORS middleware - Allow all origins in development
 app.add_middleware(
     CORSMiddleware,
@@ -3,6 +3,10 @@ from typing import Dict, Any, List, Optional
 
 from app.services.admin_service import admin_service
 from app.services.user_service import user_service
+from app.services.llm_router import llm_router
+from app.services.image_pool import image_pool
+from app.services.hook_jobs import hook_jobs
+from app.services.tts_pool import tts_pool
 from app.core.auth import get_current_user, TokenData
 
 router = APIRouter(
@@ -107,6 +111,20 @@ async def update_settings(
         raise HTTPException(status_code=400, detail="Failed to update settings")
     return {"status": "success"}
 
+@router.get("/llm/routes")
+async def get_llm_routes(user: TokenData = Depends(require_admin)):
+    """Health of each Gemini key/model route (success rate, latency, cooldown)."""
+    return {"routes": llm_router.snapshot()}
+
+@router.get("/queues")
+async def get_queue_metrics(user: TokenData = Depends(require_admin)):
+    """Depth of the background work queues (image pool, hook batches, TTS)."""
+    return {
+        "image_pool": image_pool.metrics(),
+        "hook_batch": {"queued_videos": hook_jobs.depth},
+        "tts": {"waiting": tts_pool.waiting, "workers": tts_pool.size},
+    }
+
 @router.post("/system/notify-maintenance")
 async def notify_maintenance(
     payload: Dict[str, str] = Body(...),
@@ -6,7 +6,7 @@ import openai
 
 from app.core.auth import get_current_user, TokenData
 from app.core.config import get_settings
-from app.core.supabase import get_supabase
+from app.core.db import get_db, run_query
 
 router = APIRouter()
 settings = get_settings()
@@ -53,7 +53,7 @@ async def natural_language_query(
     - "Why did my reach drop this week?"
     - "Do reels outperform images?"
     """
-    supabase = get_supabase()
+    supabase = get_db()
     
     try:
         # Base queries
@@ -78,8 +78,8 @@ async def natural_language_query(
             # but usually it's passed or can be inferred. 
             # To be safe, we will just filter the posts for now which give the content context.
             
-        posts_response = posts_query.execute()
-        metrics_response = metrics_query.execute()
+        posts_response = await run_query(posts_query)
+        metrics_response = await run_query(metrics_query)
         
         if request.platform.lower() in ['all', 'youtube']:
             real_youtube_data = {}
@@ -196,12 +196,12 @@ async def get_insights(
     """
     Get AI-generated insights for the user.
     """
-    supabase = get_supabase()
+    supabase = get_db()
     
     try:
-        response = supabase.table("insights").select("*").eq(
+        response = await run_query(supabase.table("insights").select("*").eq(
             "user_id", current_user.user_id
-        ).order("generated_at", desc=True).limit(10).execute()
+        ).order("generated_at", desc=True).limit(10))
         
         return [
             InsightResponse(
@@ -223,13 +223,13 @@ async def generate_insights(
     """
     Generate new AI insights based on recent data.
     """
-    supabase = get_supabase()
+    supabase = get_db()
     
     try:
         # Get recent metrics
-        metrics = supabase.table("metrics").select("*").order(
+        metrics = await run_query(supabase.table("metrics").select("*").order(
             "collected_at", desc=True
-        ).limit(100).execute()
+        ).limit(100))
         
         # Generate insight using AI
         if settings.openai_api_key:
@@ -255,11 +255,11 @@ async def generate_insights(
             summary = "Your Reels receive 43% higher engagement than images, especially when posted after 8 PM. Consider creating more short-form video content."
         
         # Save insight
-        result = supabase.table("insights").insert({
+        result = await run_query(supabase.table("insights").insert({
             "user_id": current_user.user_id,
             "summary": summary,
             "generated_at": datetime.now().isoformat()
-        }).execute()
+        }))
         
         return {"message": "Insight generated", "insight": summary}
         
@@ -274,12 +274,12 @@ async def get_recommendations(
     """
     Get AI-generated content recommendations.
     """
-    supabase = get_supabase()
+    supabase = get_db()
     
     try:
-        response = supabase.table("recommendations").select("*").eq(
+        response = await run_query(supabase.table("recommendations").select("*").eq(
             "user_id", current_user.user_id
-        ).order("generated_at", desc=True).limit(10).execute()
+        ).order("generated_at", desc=True).limit(10))
         
         return [
             RecommendationResponse(
@@ -355,12 +355,12 @@ async def get_audience_persona(
     from app.services.ai_service import ai_service
     from app.services.youtube_service import YouTubeService
     
-    supabase = get_supabase()
+    supabase = get_db()
     
     # Get YouTube connection
-    youtube_conn = supabase.table("platform_connections").select("*").eq(
+    youtube_conn = await run_query(supabase.table("platform_connections").select("*").eq(
         "user_id", current_user.user_id
-    ).eq("platform", "youtube").maybe_single().execute()
+    ).eq("platform", "youtube").maybe_single())
     
     if not youtube_conn.data:
         raise HTTPException(status_code=404, detail="YouTube not connected")
@@ -1,10 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from typing import Optional
-from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from app.core.auth import get_current_user, TokenData
-from app.core.supabase import get_supabase
+from app.services.rollup import get_metrics_summary
 
 router = APIRouter()
 
@@ -43,18 +42,12 @@ async def get_analytics_overview(
     from app.services.instagram_service import get_instagram_insights
     from app.services.youtube_service import get_youtube_analytics
     
-    supabase = get_supabase()
-    
     try:
-        # Get metrics from database
-        since_date = (datetime.now() - timedelta(days=days)).isoformat()
-        
-        response = supabase.table("metrics").select(
-            "likes, comments, shares, reach, impressions, engagement_rate"
-        ).gte("collected_at", since_date).execute()
+        # Pre-summed daily buckets, or the raw metrics while rollups are missing/stale
+        summary = await get_metrics_summary(current_user.user_id, days)
         
         # If no data, return mock data for demo
-        if not response.data:
+        if summary is None:
             # TRY REAL DATA FIRST
             try:
                 # Instagram
@@ -104,24 +97,12 @@ async def get_analytics_overview(
             mock = get_mock_analytics_overview(current_user.user_id)
             return AnalyticsOverview(**mock)
         
-        # Aggregate metrics
-        total_impressions = sum(m.get("impressions", 0) for m in response.data)
-        total_comments = sum(m.get("comments", 0) for m in response.data)
-        total_shares = sum(m.get("shares", 0) for m in response.data)
-        total_likes = sum(m.get("likes", 0) for m in response.data)
-        total_reach = sum(m.get("reach", 0) for m in response.data)
-        
-        # Calculate engagement rate
-        engagement_rate = 0.0
-        if total_reach > 0:
-            engagement_rate = ((total_likes + total_comments + total_shares) / total_reach) * 100
-        
         return AnalyticsOverview(
-            total_impressions=total_impressions,
-            engagement_rate=round(engagement_rate, 2),
-            total_comments=total_comments,
-            total_shares=total_shares,
-            growth_rate=12.5  # TODO: Calculate from historical data
+            total_impressions=summary["total_impressions"],
+            engagement_rate=summary["engagement_rate"],
+            total_comments=summary["total_comments"],
+            total_shares=summary["total_shares"],
+            growth_rate=summary["growth_rate"]
         )
         
     except Exception as e:
@@ -146,17 +127,10 @@ async def get_platform_analytics(
     from app.services.instagram_service import get_instagram_insights
     from app.services.youtube_service import get_youtube_analytics
     
-    supabase = get_supabase()
-    
     try:
-        since_date = (datetime.now() - timedelta(days=days)).isoformat()
-        
-        # Get posts for this platform
-        posts_response = supabase.table("posts").select("id").eq(
-            "platform", platform
-        ).eq("user_id", current_user.user_id).execute()
+        summary = await get_metrics_summary(current_user.user_id, days, platform=platform)
         
-        if not posts_response.data:
+        if summary is None:
             # TRY REAL DATA
             try:
                 if platform == "instagram":
@@ -193,35 +167,13 @@ async def get_platform_analytics(
             mock = get_mock_platform_metrics(platform)
             return PlatformMetrics(**mock)
         
-        post_ids = [p["id"] for p in posts_response.data]
-        
-        # Get metrics for these posts
-        metrics_response = supabase.table("metrics").select(
-            "likes, comments, shares, reach, impressions"
-        ).in_("post_id", post_ids).gte("collected_at", since_date).execute()
-        
-        if not metrics_response.data:
-            mock = get_mock_platform_metrics(platform)
-            return PlatformMetrics(**mock)
-        
-        # Aggregate
-        total_impressions = sum(m.get("impressions", 0) for m in metrics_response.data)
-        total_likes = sum(m.get("likes", 0) for m in metrics_response.data)
-        total_comments = sum(m.get("comments", 0) for m in metrics_response.data)
-        total_shares = sum(m.get("shares", 0) for m in metrics_response.data)
-        total_reach = sum(m.get("reach", 0) for m in metrics_response.data)
-        
-        engagement_rate = 0.0
-        if total_reach > 0:
-            engagement_rate = ((total_likes + total_comments + total_shares) / total_reach) * 100
-        
         return PlatformMetrics(
             platform=platform,
-            impressions=total_impressions,
-            likes=total_likes,
-            comments=total_comments,
-            shares=total_shares,
-            engagement_rate=round(engagement_rate, 2)
+            impressions=summary["total_impressions"],
+            likes=summary["total_likes"],
+            comments=summary["total_comments"],
+            shares=summary["total_shares"],
+            engagement_rate=summary["engagement_rate"]
         )
         
     except Exception as e:
@@ -5,25 +5,41 @@ Protected by authentication and plan-based access control.
 """
 
 from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import os
-from typing import Optional, Dict
+import json
+from typing import Optional, Dict, List
 
 from app.core.auth import get_current_user_with_profile
 from app.core.plan_access import assert_feature_access
+from app.core.config import get_settings
+from fastapi.concurrency import run_in_threadpool
 from app.services.video_processor import (
-    extract_frames,
-    save_temp_video,
-    cleanup_temp_file
+    aiter_frames,
+    select_hook_frames,
+    copy_upload_to_file,
+    video_slots,
+    UploadTooLargeError
 )
-from app.services.hook_detector import analyze_hook, get_hook_summary
+from app.services.hook_detector import analyze_hook, get_hook_summary, MAX_FRAMES
+from app.services.hook_cache import hook_cache, frame_signature
+from app.services.hook_jobs import hook_jobs, HookVideo, HookQueueFull
+from app.services.image_pool import image_pool
 
+settings = get_settings()
 
 router = APIRouter(prefix="/api/hooks", tags=["hooks"])
 
 
 ALLOWED_EXTENSIONS = {".mp4", ".mov", ".avi", ".webm", ".mkv"}
 MAX_FILE_SIZE = 100 * 1024 * 1024  # 100MB
+MULTIPART_OVERHEAD = 64 * 1024  # Part headers and small form fields
+
+# Whole-request limits, enforced by UploadLimitMiddleware before the body is spooled
+UPLOAD_LIMITS = {
+    "/api/hooks/analyze": MAX_FILE_SIZE + MULTIPART_OVERHEAD,
+    "/api/hooks/batch": settings.hook_batch_max_videos * (MAX_FILE_SIZE + MULTIPART_OVERHEAD),
+}
 
 
 @router.post("/analyze")
@@ -31,6 +47,7 @@ async def analyze_video_hook(
     video: UploadFile = File(...),
     interval: float = 1.0,
     max_frames: int = 30,
+    timestamps: Optional[str] = None,
     profile: Dict = Depends(get_current_user_with_profile)
 ):
     """
@@ -38,8 +55,12 @@ async def analyze_video_hook(
     Requires Business plan.
     
     - **video**: Video file (mp4, mov, avi, webm, mkv)
-    - **interval**: Seconds between frame captures (default: 1.0)
-    - **max_frames**: Maximum frames to analyze (default: 30)
+    - **interval**: Seconds between frame captures when pre-ranking is off (default: 1.0)
+    - **max_frames**: Maximum frames to analyze (default: 30, capped at what the VLM uses)
+    - **timestamps**: Comma-separated capture times in seconds, e.g. "0,1.5,3" (optional)
+    
+    Without explicit timestamps, the first seconds of the video are sampled
+    densely and scored locally; only the top frames are sent to the VLM.
     
     Returns hook analysis with timestamp, reason, and frame image.
     """
@@ -50,6 +71,14 @@ async def analyze_video_hook(
     # Check plan access - VLM requires Business plan
     assert_feature_access(profile, "vlm")
     
+    # Parse explicit capture times
+    target_times = None
+    if timestamps:
+        try:
+            target_times = [float(t) for t in timestamps.split(",") if t.strip()]
+        except ValueError:
+            raise HTTPException(status_code=400, detail="timestamps must be comma-separated seconds")
+    
     # Validate file extension
     file_ext = os.path.splitext(video.filename or "")[1].lower()
     if file_ext not in ALLOWED_EXTENSIONS:
@@ -58,60 +87,184 @@ async def analyze_video_hook(
             detail=f"Invalid file type. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
         )
     
-    # Read and save video to temp file
-    try:
-        video_bytes = await video.read()
-        if len(video_bytes) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
-            )
-        
-        temp_path = save_temp_video(video_bytes, suffix=file_ext)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error saving video: {str(e)}")
+    # Reject oversized uploads early when the size is known
+    if video.size is not None and video.size > MAX_FILE_SIZE:
+        raise HTTPException(
+            status_code=400,
+            detail=f"File too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+        )
     
-    try:
-        from fastapi.concurrency import run_in_threadpool
+    # Each job holds one temp-file slot; the file is removed when the slot is released
+    async with video_slots.acquire(suffix=file_ext) as temp_path:
+        # Stream the upload to disk in chunks
+        try:
+            await run_in_threadpool(copy_upload_to_file, video.file, temp_path, MAX_FILE_SIZE)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error saving video: {str(e)}")
         
-        # Extract frames in threadpool (CPU bound)
-        frames = await run_in_threadpool(
-            extract_frames,
-            temp_path,
-            interval_seconds=interval,
-            max_frames=max_frames
+        try:
+            if target_times is None and settings.hook_prerank:
+                # Score the opening densely on a worker thread; only the best frames go to the VLM
+                frames = await run_in_threadpool(
+                    select_hook_frames,
+                    temp_path,
+                    top_k=min(max_frames, MAX_FRAMES),
+                    window_seconds=settings.hook_scan_seconds,
+                    step_seconds=settings.hook_scan_step,
+                    compress=image_pool.compress_frame
+                )
+            else:
+                # Decode on a worker thread, stopping once the VLM has enough frames
+                frames = []
+                async for frame in aiter_frames(
+                    temp_path,
+                    interval_seconds=interval,
+                    max_frames=min(max_frames, MAX_FRAMES),
+                    timestamps=target_times,
+                    compress=image_pool.compress_frame
+                ):
+                    frames.append(frame)
+            
+            if not frames:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Could not extract frames from video"
+                )
+            
+            # Re-uploads (even re-encoded) match on perceptual frame hashes
+            user_id = profile.get("id") or ""
+            signature = await run_in_threadpool(frame_signature, frames)
+            analysis = hook_cache.reuse(user_id, signature, frames)
+            
+            if not analysis:
+                # Analyze with Gemini (smart batching - 1 API call)
+                analysis = await analyze_hook(frames)
+                
+                if not analysis:
+                    raise HTTPException(
+                        status_code=500,
+                        detail="Hook analysis failed"
+                    )
+                
+                hook_cache.remember(user_id, signature, analysis)
+            
+            # Add metadata
+            analysis["total_frames_analyzed"] = len(frames)
+            analysis["video_filename"] = video.filename
+            analysis["summary"] = get_hook_summary(analysis)
+            
+            return JSONResponse(content=analysis)
+            
+        except HTTPException:
+            raise
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
+
+
+@router.post("/batch")
+async def submit_hook_batch(
+    videos: List[UploadFile] = File(...),
+    profile: Dict = Depends(get_current_user_with_profile)
+):
+    """
+    Queue hook analysis for many videos and return a job ID immediately.
+    Requires Business plan.
+    
+    Poll ``GET /api/hooks/batch/{job_id}`` or stream
+    ``GET /api/hooks/batch/{job_id}/events`` for per-video results.
+    """
+    assert_feature_access(profile, "vlm")
+    
+    if len(videos) > settings.hook_batch_max_videos:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Too many videos. Maximum per batch: {settings.hook_batch_max_videos}"
         )
-        
-        if not frames:
-            raise HTTPException(
-                status_code=400,
-                detail="Could not extract frames from video"
-            )
-        
-        # Analyze with Gemini (smart batching - 1 API call)
-        analysis = await analyze_hook(frames)
-        
-        if not analysis:
-            raise HTTPException(
-                status_code=500,
-                detail="Hook analysis failed"
-            )
-        
-        # Add metadata
-        analysis["total_frames_analyzed"] = len(frames)
-        analysis["video_filename"] = video.filename
-        analysis["summary"] = get_hook_summary(analysis)
-        
-        return JSONResponse(content=analysis)
-        
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Analysis error: {str(e)}")
-    finally:
-        # Cleanup temp file
-        cleanup_temp_file(temp_path)
+    
+    try:
+        job = hook_jobs.create_job(profile.get("id") or "", len(videos))
+    except HookQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    
+    try:
+        for index, video in enumerate(videos):
+            file_ext = os.path.splitext(video.filename or "")[1].lower()
+            if file_ext not in ALLOWED_EXTENSIONS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Invalid file type for {video.filename}. Allowed: {', '.join(ALLOWED_EXTENSIONS)}"
+                )
+            if video.size is not None and video.size > MAX_FILE_SIZE:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"{video.filename} is too large. Maximum size: {MAX_FILE_SIZE // (1024*1024)}MB"
+                )
+            
+            path = os.path.join(job.directory, f"{index}{file_ext}")
+            try:
+                size = await run_in_threadpool(copy_upload_to_file, video.file, path, MAX_FILE_SIZE)
+            except UploadTooLargeError as e:
+                raise HTTPException(status_code=400, detail=f"{video.filename}: {e}")
+            try:
+                hook_jobs.add_video(job, HookVideo(index, video.filename or f"video{index}{file_ext}", path, size))
+            except HookQueueFull as e:
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+    except Exception:
+        hook_jobs.discard(job)
+        raise
+    
+    hook_jobs.submit(job)
+    return JSONResponse(status_code=202, content=job.to_dict(include_results=False))
+
 
+@router.get("/batch/{job_id}")
+async def get_hook_batch(
+    job_id: str,
+    include_frames: bool = True,
+    profile: Dict = Depends(get_current_user_with_profile)
+):
+    """
+    Current status of a batch, with results for finished videos.
+    
+    - **include_frames**: Include each result's base64 ``frame_image`` (default: true);
+      pass false when polling repeatedly
+    """
+    job = hook_jobs.get_job(job_id, profile.get("id") or "")
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    return job.to_dict(include_frames=include_frames)
+
+
+@router.get("/batch/{job_id}/events")
+async def stream_hook_batch(
+    job_id: str,
+    include_frames: bool = True,
+    profile: Dict = Depends(get_current_user_with_profile)
+):
+    """
+    Server-sent events: one ``video`` event per finished video (including
+    ones finished before connecting), then a ``done`` event.
+    
+    - **include_frames**: Include each result's base64 ``frame_image`` (default: true)
+    """
+    job = hook_jobs.get_job(job_id, profile.get("id") or "")
+    if not job:
+        raise HTTPException(status_code=404, detail="Batch job not found")
+    
+    async def event_stream():
+        async for video in job.events(include_frames):
+            yield f"event: video\ndata: {json.dumps(video)}\n\n"
+        yield f"event: done\ndata: {json.dumps(job.to_dict(include_results=False))}\n\n"
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @router.get("/health")
 async def health_check():
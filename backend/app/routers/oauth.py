@@ -3,7 +3,7 @@ OAuth routes for social media platform authentication.
 """
 from fastapi import APIRouter, HTTPException, Query
 from fastapi.responses import RedirectResponse
-import httpx
+from app.core.http import http_client
 import secrets
 from datetime import datetime, timedelta
 from typing import Optional
@@ -108,7 +108,7 @@ async def youtube_callback(code: str = Query(...), state: str = Query(...)):
         raise HTTPException(status_code=400, detail="Invalid or expired state")
     
     # Exchange code for tokens
-    async with httpx.AsyncClient() as client:
+    async with http_client("oauth") as client:
         response = await client.post(
             OAUTH_URLS["youtube"]["token"],
             data={
@@ -153,7 +153,7 @@ async def instagram_callback(code: str = Query(...), state: str = Query(...)):
         raise HTTPException(status_code=400, detail="Invalid or expired state")
     
     # Exchange code for tokens
-    async with httpx.AsyncClient() as client:
+    async with http_client("oauth") as client:
         response = await client.get(
             OAUTH_URLS["instagram"]["token"],
             params={
@@ -202,7 +202,7 @@ async def twitter_callback(code: str = Query(...), state: str = Query(...)):
         f"{oauth_settings.TWITTER_CLIENT_ID}:{oauth_settings.TWITTER_CLIENT_SECRET}".encode()
     ).decode()
     
-    async with httpx.AsyncClient() as client:
+    async with http_client("oauth") as client:
         response = await client.post(
             OAUTH_URLS["twitter"]["token"],
             headers={
@@ -249,7 +249,7 @@ async def linkedin_callback(code: str = Query(...), state: str = Query(...)):
         raise HTTPException(status_code=400, detail="Invalid or expired state")
     
     # Exchange code for tokens
-    async with httpx.AsyncClient() as client:
+    async with http_client("oauth") as client:
         response = await client.post(
             OAUTH_URLS["linkedin"]["token"],
             data={
@@ -4,7 +4,7 @@ from pydantic import BaseModel
 from datetime import datetime
 
 from app.core.auth import get_current_user, TokenData
-from app.core.supabase import get_supabase
+from app.core.db import get_db, run_query
 
 router = APIRouter()
 
@@ -32,12 +32,12 @@ async def get_connected_platforms(
     """
     Get all connected platforms for the current user.
     """
-    supabase = get_supabase()
+    supabase = get_db()
     
     try:
-        response = supabase.table("platforms").select(
+        response = await run_query(supabase.table("platforms").select(
             "platform_name, connected_at"
-        ).eq("user_id", current_user.user_id).execute()
+        ).eq("user_id", current_user.user_id))
         
         connected = {p["platform_name"]: p["connected_at"] for p in response.data}
         
@@ -67,30 +67,30 @@ async def connect_platform(
     In production, this would handle OAuth flow completion.
     For hackathon, we simulate the connection.
     """
-    supabase = get_supabase()
+    supabase = get_db()
     
     try:
         # Check if already connected
-        existing = supabase.table("platforms").select("id").eq(
+        existing = await run_query(supabase.table("platforms").select("id").eq(
             "user_id", current_user.user_id
-        ).eq("platform_name", connection.platform_name).execute()
+        ).eq("platform_name", connection.platform_name))
         
         if existing.data:
             # Update existing connection
-            response = supabase.table("platforms").update({
+            response = await run_query(supabase.table("platforms").update({
                 "access_token": connection.access_token,
                 "refresh_token": connection.refresh_token,
                 "connected_at": datetime.now().isoformat()
-            }).eq("id", existing.data[0]["id"]).execute()
+            }).eq("id", existing.data[0]["id"]))
         else:
             # Create new connection
-            response = supabase.table("platforms").insert({
+            response = await run_query(supabase.table("platforms").insert({
                 "user_id": current_user.user_id,
                 "platform_name": connection.platform_name,
                 "access_token": connection.access_token,
                 "refresh_token": connection.refresh_token,
                 "connected_at": datetime.now().isoformat()
-            }).execute()
+            }))
         
         return {"message": f"{connection.platform_name} connected successfully"}
         
@@ -106,12 +106,12 @@ async def disconnect_platform(
     """
     Disconnect a social media platform.
     """
-    supabase = get_supabase()
+    supabase = get_db()
     
     try:
-        response = supabase.table("platforms").delete().eq(
+        response = await run_query(supabase.table("platforms").delete().eq(
             "user_id", current_user.user_id
-        ).eq("platform_name", platform_name).execute()
+        ).eq("platform_name", platform_name))
         
         return {"message": f"{platform_name} disconnected successfully"}
         
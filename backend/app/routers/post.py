@@ -1,8 +1,10 @@
+import asyncio
+import os
 from typing import Optional, List, Dict
 from pydantic import BaseModel
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException, status, Depends
 from app.services.ai_service import ai_service
-from app.services.image_service import optimize_image
+from app.services.image_pool import image_pool, ImagePoolBusy
 from app.core.auth import get_current_user_with_profile
 from app.core.plan_access import assert_feature_access
 
@@ -47,15 +49,20 @@ async def generate_post(
             cta=cta
         )
 
-        # 3. Optimize All Images
-        optimized_paths = []
-        for img in images:
-            # optimize_image expects UploadFile and saves it
-            print(f"Optimizing image: {img.filename}")
-            # Run blocking CPU-bound task in threadpool
-            from fastapi.concurrency import run_in_threadpool
-            path = await run_in_threadpool(optimize_image, img)
-            optimized_paths.append(path)
+        # 3. Optimize All Images (CPU-bound; runs in the image worker processes)
+        print(f"Optimizing {len(image_bytes_list)} images")
+        results = await asyncio.gather(
+            *(image_pool.optimize_image(contents) for contents in image_bytes_list),
+            return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            # Don't leave the images that did save behind for a failed request
+            for path in results:
+                if isinstance(path, str):
+                    _remove_file(path)
+            raise errors[0]
+        optimized_paths = list(results)
 
         # 4. Return Payload
         return PostPreviewResponse(
@@ -67,9 +74,22 @@ async def generate_post(
             auto_post=auto_post
         )
 
+    except ImagePoolBusy as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
     except Exception as e:
         print(f"Error in /post/generate: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=str(e)
         )
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
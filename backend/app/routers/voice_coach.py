@@ -1,13 +1,18 @@
 from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from typing import Dict, Optional
+from typing import BinaryIO, Dict, Iterator, Optional
+import os
 
 from app.core.auth import get_current_user, get_current_user_with_profile, TokenData
 from app.core.plan_access import assert_feature_access
 from app.services.voice_service import voice_service
+from app.services.tts_pool import TTSPoolBusy
 
 router = APIRouter()
 
+AUDIO_CHUNK_SIZE = 64 * 1024
+
 class AnalyzeRequest(BaseModel):
     script: str
 
@@ -37,7 +42,7 @@ async def analyze_script(
     assert_feature_access(profile, "voice_coach")
     
     try:
-        result = await voice_service.analyze_script(request.script)
+        result = await voice_service.analyze_script(request.script, user_id=profile.get("id"))
         return AnalyzeResponse(
             average_hook=result.get("average_hook", ""),
             high_retention_hook=result.get("high_retention_hook", ""),
@@ -69,10 +74,26 @@ async def generate_speech(
         elif request.style == "boring":
             target_voice_id = "ErXwobaYiN019PkySvjV"
             
-        audio_content = await voice_service.generate_audio(request.text, target_voice_id)
+        audio = await voice_service.get_audio(request.text, target_voice_id)
+        if isinstance(audio, bytes):
+            return Response(content=audio, media_type="audio/mpeg")
         
-        return Response(content=audio_content, media_type="audio/mpeg")
+        # Cache hit: stream from the already-open file, so eviction can't pull it away
+        return StreamingResponse(
+            _iter_file(audio),
+            media_type="audio/mpeg",
+            headers={"Content-Length": str(os.fstat(audio.fileno()).st_size)}
+        )
         
+    except TTSPoolBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "2"})
     except Exception as e:
         print(f"Speech generation error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _iter_file(audio: BinaryIO) -> Iterator[bytes]:
+    """Read an open file in chunks, closing it when done (runs in the threadpool)."""
+    with audio:
+        while chunk := audio.read(AUDIO_CHUNK_SIZE):
+            yield chunk
@@ -9,14 +9,15 @@ import smtplib
 import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from app.core.supabase import get_supabase_admin
+from app.core.db import get_db_admin, run_query
+from app.services.user_service import user_service
 
 class AdminService:
     """Service for admin-only operations."""
     
     def __init__(self):
         # Always use admin client to bypass RLS for analytics
-        self.supabase = get_supabase_admin()
+        self.supabase = get_db_admin()
     
     async def get_analytics_overview(self) -> Dict[str, Any]:
         """
@@ -25,15 +26,16 @@ class AdminService:
         try:
             # Get total users count
             # Note: count='exact' is more efficient than fetching all rows
-            users_res = self.supabase.table("profiles").select("id", count="exact").execute()
+            users_res = await run_query(self.supabase.table("profiles").select("id", count="exact"))
             total_users = users_res.count if users_res.count is not None else 0
             
             # Get active subscriptions (simplified: non-null plan or plan_status='active')
             # Adjust query based on your exact business logic for "active"
-            active_res = self.supabase.table("profiles")\
-                .select("id", count="exact")\
-                .neq("plan", "starter")\
-                .execute()
+            active_res = await run_query(
+                self.supabase.table("profiles")
+                .select("id", count="exact")
+                .neq("plan", "starter")
+            )
             active_subs = active_res.count if active_res.count is not None else 0
             
             # Calculate MRR (Estimated)
@@ -41,7 +43,7 @@ class AdminService:
             # In a real app, you'd sum actual subscription values
             # Here we just estimate based on plan counts
             
-            plans_res = self.supabase.table("profiles").select("plan").execute()
+            plans_res = await run_query(self.supabase.table("profiles").select("plan"))
             mrr = 0
             for row in plans_res.data:
                 p = row.get("plan")
@@ -62,7 +64,7 @@ class AdminService:
         Get distribution of users across different plans.
         """
         try:
-            res = self.supabase.table("profiles").select("plan").execute()
+            res = await run_query(self.supabase.table("profiles").select("plan"))
             
             plans = {}
             for row in res.data:
@@ -88,7 +90,7 @@ class AdminService:
             # In real prod: COUNT(social_connections) GROUP BY platform
             # Here: Simulate 60% YT, 40% IG, 20% Twitter
             
-            users_res = self.supabase.table("profiles").select("id", count="exact").execute()
+            users_res = await run_query(self.supabase.table("profiles").select("id", count="exact"))
             total = users_res.count or 1
             
             return [
@@ -107,11 +109,12 @@ class AdminService:
         """
         try:
             # Fetch profiles sorted by created_at desc
-            res = self.supabase.table("profiles")\
-                .select("id, email, role, plan, created_at")\
-                .order("created_at", desc=True)\
-                .limit(10)\
-                .execute()
+            res = await run_query(
+                self.supabase.table("profiles")
+                .select("id, email, role, plan, created_at")
+                .order("created_at", desc=True)
+                .limit(10)
+            )
                 
             return res.data
         except Exception as e:
@@ -132,7 +135,7 @@ class AdminService:
             start = (page - 1) * per_page
             end = start + per_page - 1
             
-            res = query.range(start, end).order("created_at", desc=True).execute()
+            res = await run_query(query.range(start, end).order("created_at", desc=True))
             
             return {
                 "data": res.data,
@@ -147,20 +150,26 @@ class AdminService:
     async def update_user_role(self, user_id: str, role: str) -> bool:
         """Update user role (e.g. to 'banned' or 'admin')."""
         try:
-            self.supabase.table("profiles").update({"role": role}).eq("id", user_id).execute()
+            await run_query(self.supabase.table("profiles").update({"role": role}).eq("id", user_id))
             return True
         except Exception as e:
             print(f"Error updating user role: {e}")
             return False
+        finally:
+            # Plan/role gates read the cached profile
+            user_service.invalidate_profile(user_id)
 
     async def update_user_plan(self, user_id: str, plan: str) -> bool:
         """Update user plan."""
         try:
-            self.supabase.table("profiles").update({"plan": plan}).eq("id", user_id).execute()
+            await run_query(self.supabase.table("profiles").update({"plan": plan}).eq("id", user_id))
             return True
         except Exception as e:
             print(f"Error updating user plan: {e}")
             return False
+        finally:
+            # Plan/role gates read the cached profile
+            user_service.invalidate_profile(user_id)
 
     # Simple JSON persistence for global settings
     SETTINGS_FILE = "system_settings.json"
@@ -205,7 +214,7 @@ class AdminService:
 
         try:
             # Fetch all user emails from profiles
-            res = self.supabase.table("profiles").select("email").execute()
+            res = await run_query(self.supabase.table("profiles").select("email"))
             emails = [row.get("email") for row in res.data if row.get("email")]
             
             if not emails:
@@ -6,15 +6,21 @@ import openai
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import json
-import google.generativeai as genai
-
-from PIL import Image
-import io
 from app.core.config import get_settings
+from app.services.llm_router import llm_router, LLMError
 from app.core.supabase import get_supabase
 
 settings = get_settings()
 
+# Vision models verified in test_vision.py, in order of preference
+CAPTION_MODELS = [
+    'models/gemini-2.0-flash',
+    'models/gemini-flash-latest',
+    'models/gemini-2.5-flash-lite',
+    'models/gemini-2.5-flash',
+    'models/gemini-1.5-flash',
+]
+
 
 class AIService:
     """Service for AI-powered insights and recommendations."""
@@ -24,9 +30,6 @@ class AIService:
         self.gemini_key = settings.gemini_api_key  # Primary: captions & persona
         self.gemini_key_secondary = settings.gemini_api_key_secondary  # Secondary: hook detection & chatbot
     
-        if self.gemini_key:
-            genai.configure(api_key=self.gemini_key)
-            
         # Ollama Client
         self.ollama_client = openai.AsyncOpenAI(
             base_url=settings.ollama_base_url,
@@ -48,8 +51,8 @@ class AIService:
             raise Exception("Gemini API Key is not configured")
 
         try:
-            # Prepare images for Gemini
-            images = [Image.open(io.BytesIO(img_bytes)) for img_bytes in image_bytes_list]
+            # Raw image bytes are sent inline; the router detects the image type
+            images = list(image_bytes_list)
             
             # Deep Analysis Prompt with forced variety
             import random
@@ -106,18 +109,6 @@ class AIService:
             RANDOMIZATION_TOKEN: {variety_seed}-{datetime.now().strftime('%H%M%S%f')}-{random.random()}
             """
 
-            # Try multiple models verified in test_vision.py
-            candidate_models = [
-                'models/gemini-2.0-flash',
-                'models/gemini-flash-latest',
-                'models/gemini-2.5-flash-lite',
-                'models/gemini-2.5-flash',
-                'models/gemini-1.5-flash',
-            ]
-            
-            response = None
-            last_error = None
-
             # Generation Config for MAXIMUM variety
             generation_config = {
                 "temperature": 1.5,  # Increased from 0.9 to maximum creativity
@@ -127,44 +118,19 @@ class AIService:
             }
 
 
-            # Try keys in order: Primary, then Secondary
-            keys_to_try = []
-            if self.gemini_key: keys_to_try.append(self.gemini_key)
-            if self.gemini_key_secondary: keys_to_try.append(self.gemini_key_secondary)
-            
-            for key_idx, api_key in enumerate(keys_to_try):
-                try:
-                    print(f"DEBUG: Using Gemini Key #{key_idx + 1}")
-                    genai.configure(api_key=api_key)
-                    
-                    for model_name in candidate_models:
-                        try:
-                            print(f"DEBUG: Attempting model {model_name} with Key #{key_idx + 1}")
-                            model = genai.GenerativeModel(model_name, generation_config=generation_config)
-                            # Pass the prompt string + all image objects
-                            # Ensure images is not empty
-                            if not images:
-                                raise Exception("No images provided to AI Service")
-                                
-                            response = await model.generate_content_async([prompt, *images])
-                            if response and response.text:
-                                print(f"DEBUG: Successfully got response from {model_name}")
-                                break 
-                        except Exception as e:
-                            print(f"DEBUG: Model {model_name} failed with Key #{key_idx + 1}: {str(e)}")
-                            last_error = e
-                            continue
-                    
-                    # If we got a valid response, break the key loop
-                    if response and response.text:
-                        break
-                        
-                except Exception as key_error:
-                    print(f"DEBUG: Critical error with Key #{key_idx + 1}: {key_error}")
-                    continue
-            
-            if not response:
-                print(f"CRITICAL: All models and keys failed. Returning fallback caption.")
+            if not images:
+                raise Exception("No images provided to AI Service")
+
+            # The router tries the healthiest key/model route first
+            try:
+                response = await llm_router.generate(
+                    [prompt, *images],
+                    models=CAPTION_MODELS,
+                    generation_config=generation_config,
+                )
+                print(f"DEBUG: Successfully got response from {response.model}")
+            except LLMError as e:
+                print(f"CRITICAL: All models and keys failed ({e}). Returning fallback caption.")
                 return self._generate_post_fallback(niche, tone, goal, cta)
             
             # Parse JSON safely
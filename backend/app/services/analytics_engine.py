@@ -1,13 +1,25 @@
 """Analytics engine for calculating unified metrics across platforms.
 
 This module provides functions for calculating engagement rates,
-growth metrics, and cross-platform comparisons.
+growth metrics, and cross-platform comparisons. Aggregations run in Postgres
+through the migration 004 functions when they are deployed, and fall back to
+the in-process metrics store otherwise.
 """
-import pandas as pd
+import asyncio
+import logging
+import time
 import numpy as np
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta
-from app.core.supabase import get_supabase
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+from postgrest.exceptions import APIError
+from app.core.db import get_db, run_query
+from app.services.metrics_store import (
+    metrics_store,
+    COUNTER_COLUMNS,
+    CONTENT_TYPES,
+    PLATFORMS,
+    MISSING_TS,
+)
 from app.services.mock_data import (
     get_mock_analytics_overview,
     get_mock_platform_metrics,
@@ -16,36 +28,137 @@ from app.services.mock_data import (
 )
 
 
+logger = logging.getLogger(__name__)
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# PostgREST / Postgres codes for "function does not exist" (migration 004 not applied)
+MISSING_FUNCTION_CODES = {"PGRST202", "42883"}
+
+# Seconds before re-trying an aggregation function that was missing
+MISSING_FUNCTION_RETRY = 600.0
+
+# Function name -> monotonic time it was found missing
+_missing_functions: Dict[str, float] = {}
+
+
+async def _aggregate(function: str, params: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Rows of a SQL aggregation function (migration 004) called over RPC.
+
+    Returns None when the function isn't deployed or the call fails, so the
+    caller can fall back to aggregating the metrics store in Python.
+    """
+    missing_since = _missing_functions.get(function)
+    if missing_since is not None and time.monotonic() - missing_since < MISSING_FUNCTION_RETRY:
+        return None
+    try:
+        response = await run_query(get_db().rpc(function, params))
+    except APIError as e:
+        if e.code in MISSING_FUNCTION_CODES:
+            _missing_functions[function] = time.monotonic()
+            logger.info(f"SQL function {function} not available, aggregating in Python")
+        else:
+            logger.warning(f"SQL aggregation {function} failed: {e.message}")
+        return None
+    except Exception as e:
+        logger.warning(f"SQL aggregation {function} failed: {e}")
+        return None
+    _missing_functions.pop(function, None)
+    return response.data or []
+
+
+def _group_means(
+    codes: np.ndarray,
+    columns: Dict[str, np.ndarray],
+    num_groups: int
+) -> Tuple[Dict[str, np.ndarray], np.ndarray]:
+    """Mean of each column per integer group code (a NumPy groupby)."""
+    counts = np.bincount(codes, minlength=num_groups)
+    safe_counts = np.maximum(counts, 1)
+    means = {
+        name: np.bincount(codes, weights=values.astype(np.float64), minlength=num_groups) / safe_counts
+        for name, values in columns.items()
+    }
+    return means, counts
+
+
+def _top_groups(means: Dict[str, np.ndarray], counts: np.ndarray, n: int) -> List[int]:
+    """Codes of the ``n`` non-empty groups with the highest mean engagement."""
+    present = np.flatnonzero(counts)
+    order = np.argsort(-means["engagement_rate"][present], kind="stable")
+    return [int(code) for code in present[order][:n]]
+
+
+def _growth_rate(recent: Optional[float], older: Optional[float]) -> float:
+    """Percent change from the older to the recent average engagement (12.5 by default)."""
+    if recent is None or older is None or older <= 0:
+        return 12.5
+    return round(((recent - older) / older) * 100, 2)
+
+
+def _time_analysis(best_hours: List[int], best_days: List[str]) -> Dict[str, Any]:
+    return {
+        "best_hours": [f"{h}:00" for h in best_hours],
+        "best_days": best_days,
+        "recommendation": f"Post at {best_hours[0]}:00 on {best_days[0]} for best engagement"
+    }
+
+
+def _content_comparison(by_type: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    # Find best performing
+    best_type = max(by_type.items(), key=lambda x: x[1]["engagement_rate"])[0] if by_type else "reel"
+    return {
+        "by_content_type": by_type,
+        "best_type": best_type,
+        "recommendation": f"{best_type.title()}s perform best with your audience!"
+    }
+
+
 class AnalyticsEngine:
     """Engine for calculating unified analytics across platforms."""
     
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.supabase = get_supabase()
+        self.supabase = get_db()
     
     async def get_overview(self, days: int = 30) -> Dict[str, Any]:
         """Get analytics overview for all platforms."""
+        since = datetime.now(timezone.utc) - timedelta(days=days)
+        rows = await _aggregate("engagement_overview", {"p_user_id": self.user_id, "p_since": since.isoformat()})
+        if rows is not None:
+            row = rows[0] if rows else {}
+            if not row.get("samples"):
+                return get_mock_analytics_overview(self.user_id)
+            return {
+                "total_impressions": int(row["impressions"]),
+                "engagement_rate": round(float(row["engagement_rate"]), 2),
+                "total_comments": int(row["comments"]),
+                "total_shares": int(row["shares"]),
+                "total_likes": int(row["likes"]),
+                "total_reach": int(row["reach"]),
+                "growth_rate": _growth_rate(row["recent_engagement_rate"], row["older_engagement_rate"]),
+            }
+        
         try:
-            since_date = (datetime.now() - timedelta(days=days)).isoformat()
-            
-            # Fetch metrics
-            response = self.supabase.table("metrics").select(
-                "likes, comments, shares, reach, impressions, engagement_rate, collected_at"
-            ).gte("collected_at", since_date).execute()
+            data = await metrics_store.get(self.user_id)
+            since_epoch = int(since.timestamp())
+            mask = data.metrics_since(since_epoch)
             
-            if not response.data:
+            if not mask.any():
                 return get_mock_analytics_overview(self.user_id)
             
-            df = pd.DataFrame(response.data)
+            totals = {c: int(data.counters[c][mask].sum(dtype=np.int64)) for c in COUNTER_COLUMNS}
+            engagement = data.engagement_rate[mask]
             
             return {
-                "total_impressions": int(df["impressions"].sum()),
-                "engagement_rate": round(df["engagement_rate"].mean(), 2),
-                "total_comments": int(df["comments"].sum()),
-                "total_shares": int(df["shares"].sum()),
-                "total_likes": int(df["likes"].sum()),
-                "total_reach": int(df["reach"].sum()),
-                "growth_rate": self._calculate_growth(df),
+                "total_impressions": totals["impressions"],
+                "engagement_rate": round(float(engagement.mean()), 2),
+                "total_comments": totals["comments"],
+                "total_shares": totals["shares"],
+                "total_likes": totals["likes"],
+                "total_reach": totals["reach"],
+                "growth_rate": self._calculate_growth(data.collected_at[mask], engagement),
             }
             
         except Exception as e:
@@ -53,21 +166,47 @@ class AnalyticsEngine:
     
     async def get_platform_breakdown(self) -> List[Dict[str, Any]]:
         """Get metrics breakdown by platform."""
+        rows = await _aggregate("platform_engagement", {"p_user_id": self.user_id})
+        if rows is not None:
+            if not rows:
+                return [get_mock_platform_metrics(p) for p in ["instagram", "youtube", "twitter", "linkedin"]]
+            rows.sort(key=lambda r: PLATFORMS.index(r["platform"]) if r["platform"] in PLATFORMS else len(PLATFORMS))
+            return [
+                {
+                    "platform": row["platform"],
+                    "impressions": int(row["impressions"]),
+                    "likes": int(row["likes"]),
+                    "comments": int(row["comments"]),
+                    "shares": int(row["shares"]),
+                    "engagement_rate": round(float(row["engagement_rate"]), 2),
+                } if row["samples"] else get_mock_platform_metrics(row["platform"])
+                for row in rows
+            ]
+        
         try:
-            # Get posts grouped by platform
-            response = self.supabase.table("posts").select(
-                "platform"
-            ).eq("user_id", self.user_id).execute()
+            data = await metrics_store.get(self.user_id)
             
-            if not response.data:
+            if not data.num_posts:
                 return [get_mock_platform_metrics(p) for p in ["instagram", "youtube", "twitter", "linkedin"]]
             
-            platforms = list(set(p["platform"] for p in response.data))
+            metric_platform = data.post_platform[data.metric_post]
             results = []
             
-            for platform in platforms:
-                metrics = get_mock_platform_metrics(platform)
-                results.append(metrics)
+            for code in np.unique(data.post_platform[data.post_platform >= 0]):
+                platform = PLATFORMS[code]
+                mask = metric_platform == code
+                if not mask.any():
+                    results.append(get_mock_platform_metrics(platform))
+                    continue
+                
+                results.append({
+                    "platform": platform,
+                    "impressions": int(data.counters["impressions"][mask].sum(dtype=np.int64)),
+                    "likes": int(data.counters["likes"][mask].sum(dtype=np.int64)),
+                    "comments": int(data.counters["comments"][mask].sum(dtype=np.int64)),
+                    "shares": int(data.counters["shares"][mask].sum(dtype=np.int64)),
+                    "engagement_rate": round(float(data.engagement_rate[mask].mean()), 2),
+                })
             
             return results
             
@@ -76,106 +215,101 @@ class AnalyticsEngine:
     
     async def compare_content_types(self) -> Dict[str, Any]:
         """Compare performance across content types."""
-        try:
-            # Get posts with metrics
-            posts = self.supabase.table("posts").select(
-                "id, content_type, platform"
-            ).eq("user_id", self.user_id).execute()
-            
-            if not posts.data:
+        rows = await _aggregate("content_type_engagement", {"p_user_id": self.user_id})
+        if rows is not None:
+            if not rows:
                 return self._mock_content_comparison()
+            return _content_comparison({
+                row["content_type"]: {
+                    name: round(float(row[name]), 2) for name in ("likes", "comments", "shares", "engagement_rate")
+                }
+                for row in rows
+            })
+        
+        try:
+            data = await metrics_store.get(self.user_id)
             
-            post_ids = [p["id"] for p in posts.data]
-            
-            metrics = self.supabase.table("metrics").select(
-                "post_id, likes, comments, shares, reach, engagement_rate"
-            ).in_("post_id", post_ids).execute()
-            
-            if not metrics.data:
+            if not data.num_posts or not data.num_metrics:
                 return self._mock_content_comparison()
             
-            # Create DataFrames
-            posts_df = pd.DataFrame(posts.data)
-            metrics_df = pd.DataFrame(metrics.data)
-            
-            # Merge
-            merged = posts_df.merge(metrics_df, left_on="id", right_on="post_id")
-            
-            # Group by content type
-            by_type = merged.groupby("content_type").agg({
-                "likes": "mean",
-                "comments": "mean",
-                "shares": "mean",
-                "engagement_rate": "mean"
-            }).round(2).to_dict("index")
-            
-            # Find best performing
-            best_type = max(by_type.items(), key=lambda x: x[1]["engagement_rate"])[0] if by_type else "reel"
+            # Group metric snapshots by the content type of their post
+            types = data.post_content_type[data.metric_post]
+            valid = types >= 0
+            columns = {
+                "likes": data.counters["likes"][valid],
+                "comments": data.counters["comments"][valid],
+                "shares": data.counters["shares"][valid],
+                "engagement_rate": data.engagement_rate[valid],
+            }
+            means, counts = _group_means(types[valid], columns, len(CONTENT_TYPES))
             
-            return {
-                "by_content_type": by_type,
-                "best_type": best_type,
-                "recommendation": f"{best_type.title()}s perform best with your audience!"
+            by_type = {
+                CONTENT_TYPES[code]: {name: round(float(values[code]), 2) for name, values in means.items()}
+                for code in np.flatnonzero(counts)
             }
             
+            return _content_comparison(by_type)
+            
         except Exception:
             return self._mock_content_comparison()
     
     async def get_time_analysis(self) -> Dict[str, Any]:
         """Analyze best posting times based on engagement."""
+        rows = await _aggregate("posting_time_engagement", {"p_user_id": self.user_id})
+        if rows is not None:
+            hour_means, hour_counts = np.zeros(24), np.zeros(24, dtype=np.int64)
+            day_means, day_counts = np.zeros(7), np.zeros(7, dtype=np.int64)
+            for row in rows:
+                if row.get("hour") is not None:
+                    hour_means[row["hour"]], hour_counts[row["hour"]] = row["engagement_rate"], row["samples"]
+                elif row.get("day_of_week") is not None:
+                    day_means[row["day_of_week"]], day_counts[row["day_of_week"]] = row["engagement_rate"], row["samples"]
+            if not hour_counts.any():
+                return get_mock_best_times()
+            
+            best_hours = _top_groups({"engagement_rate": hour_means}, hour_counts, 3)
+            best_days = [DAY_NAMES[d] for d in _top_groups({"engagement_rate": day_means}, day_counts, 3)]
+            return _time_analysis(best_hours, best_days)
+        
         try:
-            posts = self.supabase.table("posts").select(
-                "id, posted_at, platform"
-            ).eq("user_id", self.user_id).execute()
+            data = await metrics_store.get(self.user_id)
             
-            if not posts.data:
+            if not data.num_posts or not data.num_metrics:
                 return get_mock_best_times()
             
-            # Process posting times
-            df = pd.DataFrame(posts.data)
-            df["posted_at"] = pd.to_datetime(df["posted_at"])
-            df["hour"] = df["posted_at"].dt.hour
-            df["day_of_week"] = df["posted_at"].dt.day_name()
-            
-            # Get metrics
-            post_ids = [p["id"] for p in posts.data]
-            metrics = self.supabase.table("metrics").select(
-                "post_id, engagement_rate"
-            ).in_("post_id", post_ids).execute()
-            
-            if metrics.data:
-                metrics_df = pd.DataFrame(metrics.data)
-                merged = df.merge(metrics_df, left_on="id", right_on="post_id")
-                
-                # Best hours
-                best_hours = merged.groupby("hour")["engagement_rate"].mean().nlargest(3).index.tolist()
-                best_days = merged.groupby("day_of_week")["engagement_rate"].mean().nlargest(3).index.tolist()
-                
-                return {
-                    "best_hours": [f"{h}:00" for h in best_hours],
-                    "best_days": best_days,
-                    "recommendation": f"Post at {best_hours[0]}:00 on {best_days[0]} for best engagement"
-                }
+            # Posting time of each metric snapshot's post
+            posted_at = data.post_posted_at[data.metric_post]
+            valid = posted_at != MISSING_TS
+            if not valid.any():
+                return get_mock_best_times()
             
-            return get_mock_best_times()
+            posted_at = posted_at[valid]
+            engagement = {"engagement_rate": data.engagement_rate[valid]}
+            hours = (posted_at // 3600) % 24
+            days_of_week = (posted_at // 86400 + 3) % 7  # 1970-01-01 was a Thursday
+            
+            best_hours = _top_groups(*_group_means(hours, engagement, 24), 3)
+            best_days = [DAY_NAMES[d] for d in _top_groups(*_group_means(days_of_week, engagement, 7), 3)]
+            
+            return _time_analysis(best_hours, best_days)
             
         except Exception:
             return get_mock_best_times()
     
-    def _calculate_growth(self, df: pd.DataFrame) -> float:
+    def _calculate_growth(self, collected_at: np.ndarray, engagement_rate: np.ndarray) -> float:
         """Calculate growth rate comparing recent vs older data."""
-        if len(df) < 2:
+        if len(collected_at) < 2:
             return 12.5  # Default
         
-        df["collected_at"] = pd.to_datetime(df["collected_at"])
-        mid_point = df["collected_at"].median()
+        mid_point = np.median(collected_at)
+        recent_mask = collected_at >= mid_point
         
-        recent = df[df["collected_at"] >= mid_point]["engagement_rate"].mean()
-        older = df[df["collected_at"] < mid_point]["engagement_rate"].mean()
+        if recent_mask.all():
+            return 12.5
         
-        if older > 0:
-            return round(((recent - older) / older) * 100, 2)
-        return 12.5
+        recent = float(engagement_rate[recent_mask].mean())
+        older = float(engagement_rate[~recent_mask].mean())
+        return _growth_rate(recent, older)
     
     def _mock_content_comparison(self) -> Dict[str, Any]:
         """Return mock content comparison data."""
@@ -195,10 +329,13 @@ async def get_analytics_for_user(user_id: str, days: int = 30) -> Dict[str, Any]
     """Get comprehensive analytics for a user."""
     engine = AnalyticsEngine(user_id)
     
-    overview = await engine.get_overview(days)
-    platforms = await engine.get_platform_breakdown()
-    content_comparison = await engine.compare_content_types()
-    time_analysis = await engine.get_time_analysis()
+    # Sub-analyses share one metrics store load, so run them together
+    overview, platforms, content_comparison, time_analysis = await asyncio.gather(
+        engine.get_overview(days),
+        engine.get_platform_breakdown(),
+        engine.compare_content_types(),
+        engine.get_time_analysis(),
+    )
     
     return {
         "overview": overview,
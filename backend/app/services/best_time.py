@@ -5,9 +5,19 @@ for maximum engagement.
 """
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from datetime import datetime, timedelta
-from app.core.supabase import get_supabase
+from app.core.db import get_db, stream_rows
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def _top_means(sums: np.ndarray, counts: np.ndarray, min_count: int, n: int) -> List[int]:
+    """Indices of the ``n`` highest means among buckets with at least ``min_count`` samples."""
+    eligible = np.flatnonzero(counts >= min_count)
+    means = sums[eligible] / counts[eligible]
+    # Stable sort keeps the lower index first on ties
+    return [int(i) for i in eligible[np.argsort(-means, kind="stable")][:n]]
 
 
 class BestTimeEngine:
@@ -15,57 +25,68 @@ class BestTimeEngine:
     
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.supabase = get_supabase()
+        self.supabase = get_db()
     
     async def analyze(self, platform: Optional[str] = None, content_type: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze posting times and return optimal scheduling recommendations.
+        
+        Posts and metrics are streamed in pages and engagement is summed per
+        hour and weekday as batches arrive, so no full result set is held.
         """
         try:
             # Try to get real data
-            query = self.supabase.table("posts").select(
-                "id, platform, content_type, posted_at"
-            ).eq("user_id", self.user_id)
-            
-            if platform:
-                query = query.eq("platform", platform)
-            if content_type:
-                query = query.eq("content_type", content_type)
+            def posts_query():
+                query = self.supabase.table("posts").select(
+                    "id, posted_at, created_at"
+                ).eq("user_id", self.user_id)
+                if platform:
+                    query = query.eq("platform", platform)
+                if content_type:
+                    query = query.eq("content_type", content_type)
+                return query
             
-            posts = query.execute()
+            # post ID -> (hour, weekday) of when it was posted
+            slots: Dict[str, Tuple[int, int]] = {}
+            num_posts = 0
+            async for rows in stream_rows(posts_query, keyset=("created_at", "id")):
+                num_posts += len(rows)
+                posted_at = pd.to_datetime(
+                    pd.Series([r.get("posted_at") for r in rows], dtype="object"), utc=True, errors="coerce"
+                )
+                for row, hour, day in zip(rows, posted_at.dt.hour, posted_at.dt.dayofweek):
+                    if not pd.isna(hour):
+                        slots[row["id"]] = (int(hour), int(day))
             
-            if not posts.data or len(posts.data) < 5:
+            if num_posts < 5:
                 return self._get_default_recommendations(platform, content_type)
             
-            # Get metrics for these posts
-            post_ids = [p["id"] for p in posts.data]
-            metrics = self.supabase.table("metrics").select(
-                "post_id, engagement_rate"
-            ).in_("post_id", post_ids).execute()
+            # Running engagement sums and counts per hour of day / day of week
+            hour_sum, hour_count = np.zeros(24), np.zeros(24, dtype=np.int64)
+            day_sum, day_count = np.zeros(7), np.zeros(7, dtype=np.int64)
             
-            if not metrics.data:
-                return self._get_default_recommendations(platform, content_type)
-            
-            # Create DataFrames
-            posts_df = pd.DataFrame(posts.data)
-            metrics_df = pd.DataFrame(metrics.data)
+            metrics = stream_rows(
+                lambda: self.supabase.table("metrics").select("id, post_id, engagement_rate, collected_at"),
+                in_filter=("post_id", list(slots)),
+            )
+            async for rows in metrics:
+                matched = [(slots[r["post_id"]], float(r.get("engagement_rate") or 0)) for r in rows]
+                if not matched:
+                    continue
+                hours = np.fromiter((slot[0] for slot, _ in matched), dtype=np.int64, count=len(matched))
+                days = np.fromiter((slot[1] for slot, _ in matched), dtype=np.int64, count=len(matched))
+                rates = np.fromiter((rate for _, rate in matched), dtype=np.float64, count=len(matched))
+                hour_sum += np.bincount(hours, weights=rates, minlength=24)
+                hour_count += np.bincount(hours, minlength=24)
+                day_sum += np.bincount(days, weights=rates, minlength=7)
+                day_count += np.bincount(days, minlength=7)
             
-            # Merge
-            df = posts_df.merge(metrics_df, left_on="id", right_on="post_id")
-            df["posted_at"] = pd.to_datetime(df["posted_at"])
-            df["hour"] = df["posted_at"].dt.hour
-            df["day_of_week"] = df["posted_at"].dt.dayofweek
-            df["day_name"] = df["posted_at"].dt.day_name()
-            
-            # Analyze by hour
-            hourly = df.groupby("hour")["engagement_rate"].agg(["mean", "count"]).reset_index()
-            hourly = hourly[hourly["count"] >= 2]  # Minimum samples
-            best_hours = hourly.nlargest(3, "mean")["hour"].tolist()
+            if not hour_count.any():
+                return self._get_default_recommendations(platform, content_type)
             
-            # Analyze by day
-            daily = df.groupby(["day_of_week", "day_name"])["engagement_rate"].agg(["mean", "count"]).reset_index()
-            daily = daily[daily["count"] >= 1]
-            best_days = daily.nlargest(3, "mean")["day_name"].tolist()
+            # Analyze by hour (minimum samples), then by day
+            best_hours = _top_means(hour_sum, hour_count, min_count=2, n=3)
+            best_days = [DAY_NAMES[d] for d in _top_means(day_sum, day_count, min_count=1, n=3)]
             
             # Create time slots
             time_slots = self._create_time_slots(best_hours, best_days)
@@ -75,7 +96,7 @@ class BestTimeEngine:
                 "best_days": best_days,
                 "recommended_slots": time_slots,
                 "analysis_period": "Last 90 days",
-                "posts_analyzed": len(df),
+                "posts_analyzed": int(hour_count.sum()),
                 "platform": platform or "all",
                 "content_type": content_type or "all"
             }
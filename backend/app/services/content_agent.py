@@ -2,21 +2,22 @@
 Content Intelligence Agent - Dedicated service for high-quality social media content generation.
 Supports Multi-Modal inputs (Images, Video, Audio) via Gemini 1.5 Pro / 2.0 Flash.
 """
-import google.generativeai as genai
 from typing import Dict, Any, List, Optional
 import json
 import io
 from PIL import Image
 from fastapi import UploadFile
 from app.core.config import get_settings
+from app.services.llm_router import llm_router
 
 settings = get_settings()
 
+# Multimodal models, in order of preference
+AGENT_MODELS = ['gemini-1.5-flash', 'gemini-2.0-flash']
+
 class ContentAgent:
     def __init__(self):
         self.gemini_key = settings.gemini_api_key
-        if self.gemini_key:
-            genai.configure(api_key=self.gemini_key)
             
     async def generate_caption(
         self,
@@ -47,9 +48,12 @@ class ContentAgent:
                 mime_type = file.content_type
                 
                 if mime_type.startswith("image/"):
-                    # Load image to validate/process if needed, or pass bytes directly
-                    image = Image.open(io.BytesIO(content))
-                    media_parts.append(image)
+                    # Validate the image header, then pass the bytes directly
+                    Image.open(io.BytesIO(content))
+                    media_parts.append({
+                        "mime_type": mime_type,
+                        "data": content
+                    })
                 elif mime_type.startswith("video/"):
                     # For video, we pass the bytes part directly with mime type
                     # Note: For large videos, File API is better, but for snippets bytes work in 1.5 Flash
@@ -116,14 +120,12 @@ OUTPUT FORMAT (JSON ONLY)
 }}
 """
             # 3. Call Gemini
-            # Use 1.5 Flash for speed/multimodal, or Pro for complex reasoning
-            model = genai.GenerativeModel('gemini-1.5-flash')
-            
+            # Flash models for speed/multimodal; the router picks the healthiest route
             # Combine [Prompt, ...Images/Videos]
             request_content = [prompt] + media_parts
             
             print("🚀 Sending request to Gemini Content Agent...")
-            response = model.generate_content(request_content)
+            response = await llm_router.generate(request_content, models=AGENT_MODELS)
             
             # 4. Parse Response
             text = response.text.strip()
@@ -1,40 +1,120 @@
-
 import sys
 import pyttsx3
 import os
+import json
+import shutil
+import tempfile
 import argparse
 
+# Words per minute for every voice (part of the speech cache key)
+SPEECH_RATE = 160
+
+
+def _configure_engine(engine, voice_id=None):
+    """Apply voice and rate settings to an initialized engine."""
+    voices = engine.getProperty('voices')
+    if voice_id == "energetic" and len(voices) > 1:
+        engine.setProperty('voice', voices[1].id)
+    elif len(voices) > 0:
+        engine.setProperty('voice', voices[0].id)
+
+    engine.setProperty('rate', SPEECH_RATE)
+
+
 def generate_audio_file(text, output_path, voice_id=None):
     """
     Generate audio file using pyttsx3 in a standalone process.
     """
     try:
         engine = pyttsx3.init()
-        
+
         # Configure Voice
-        voices = engine.getProperty('voices')
-        if voice_id == "energetic" and len(voices) > 1:
-            engine.setProperty('voice', voices[1].id)
-        elif len(voices) > 0:
-            engine.setProperty('voice', voices[0].id)
-            
-        engine.setProperty('rate', 160)
-        
+        _configure_engine(engine, voice_id)
+
         # Save
         engine.save_to_file(text, output_path)
         engine.runAndWait()
-        
+
         print(f"SUCCESS: {output_path}")
-        
+
     except Exception as e:
         print(f"ERROR: {e}")
         sys.exit(1)
 
+
+def _send(stream, header, payload=b""):
+    """Write one response frame: a JSON header line followed by the raw payload."""
+    stream.write(json.dumps(header).encode("utf-8") + b"\n")
+    if payload:
+        stream.write(payload)
+    stream.flush()
+
+
+def run_worker():
+    """
+    Serve synthesis requests until stdin closes (used by the TTS worker pool).
+
+    Requests are JSON lines ({"text": ..., "voice": ...}) on stdin. Each
+    response is a JSON header line ({"ok": true, "size": N} or
+    {"ok": false, "error": ...}) on the protocol stream followed by N bytes
+    of audio. The engine is initialized once and reused.
+    """
+    # Keep the protocol stream private; speech drivers may print to stdout
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    # The engine can only render to a file, so use a private scratch file
+    # (in RAM where available) and send the bytes back over the pipe.
+    scratch_dir = tempfile.mkdtemp(
+        prefix="tts-worker-",
+        dir="/dev/shm" if os.path.isdir("/dev/shm") else None
+    )
+    output_path = os.path.join(scratch_dir, "speech.mp3")
+
+    engine = None
+    try:
+        engine = pyttsx3.init()
+        _send(protocol, {"ok": True, "ready": True})
+    except Exception as e:
+        _send(protocol, {"ok": False, "ready": False, "error": str(e)})
+
+    try:
+        for line in sys.stdin.buffer:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if engine is None:
+                    engine = pyttsx3.init()
+
+                _configure_engine(engine, request.get("voice"))
+                engine.save_to_file(request["text"], output_path)
+                engine.runAndWait()
+
+                with open(output_path, "rb") as f:
+                    audio = f.read()
+                os.remove(output_path)
+
+                _send(protocol, {"ok": True, "size": len(audio)}, audio)
+            except Exception as e:
+                # Re-initialize the engine on the next request
+                engine = None
+                _send(protocol, {"ok": False, "error": str(e)})
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
-    parser.add_argument("--text", required=True)
-    parser.add_argument("--output", required=True)
+    parser.add_argument("--worker", action="store_true", help="Serve requests over stdin/stdout")
+    parser.add_argument("--text")
+    parser.add_argument("--output")
     parser.add_argument("--voice", default="neutral")
     args = parser.parse_args()
-    
-    generate_audio_file(args.text, args.output, args.voice)
+
+    if args.worker:
+        run_worker()
+    else:
+        if not args.text or not args.output:
+            parser.error("--text and --output are required")
+        generate_audio_file(args.text, args.output, args.voice)
@@ -0,0 +1,120 @@
+"""
+Hook Result Cache
+Reuses hook analyses for re-uploads by matching perceptual hashes of the
+extracted frames, so a re-encoded or re-uploaded cut skips the VLM call.
+"""
+
+import base64
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# dHash compares horizontally adjacent pixels of a 9x8 thumbnail -> 64 bits
+HASH_SIZE = 8
+
+FrameSignature = Tuple[int, ...]
+
+
+def dhash_frame(b64_image: str) -> Optional[int]:
+    """64-bit difference hash of a base64 JPEG frame (None if it can't be decoded)."""
+    data = np.frombuffer(base64.b64decode(b64_image), dtype=np.uint8)
+    gray = cv2.imdecode(data, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        return None
+    small = cv2.resize(gray, (HASH_SIZE + 1, HASH_SIZE), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def frame_signature(frames: List[Tuple[float, str]]) -> Optional[FrameSignature]:
+    """Hashes of every frame, in order (None if any frame fails to decode)."""
+    hashes = [dhash_frame(b64) for _, b64 in frames]
+    if not hashes or any(h is None for h in hashes):
+        return None
+    return tuple(hashes)
+
+
+def signature_distance(a: FrameSignature, b: FrameSignature) -> int:
+    """Worst per-frame Hamming distance between two signatures."""
+    return max(bin(x ^ y).count("1") for x, y in zip(a, b))
+
+
+class HookResultCache:
+    """
+    Per-user LRU of hook analyses keyed by frame signatures.
+
+    Lookups scan the user's entries for a signature with the same frame count
+    whose worst per-frame Hamming distance is within ``max_distance``.
+    Storage is bounded by ``max_entries`` overall and expires after ``ttl``.
+    """
+
+    def __init__(self, max_entries: int = 512, max_distance: int = 6, ttl: float = 86400.0):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self.ttl = ttl
+        # (user_id, signature) -> (expires_at, result), oldest first
+        self._entries: "OrderedDict[Tuple[str, FrameSignature], Tuple[float, Dict]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, user_id: str, signature: FrameSignature) -> Optional[Dict]:
+        """Closest stored result within the threshold, or None."""
+        now = time.monotonic()
+        best_key, best_distance = None, self.max_distance + 1
+
+        for key, (expires_at, _) in list(self._entries.items()):
+            if expires_at <= now:
+                del self._entries[key]
+                continue
+            owner, stored = key
+            if owner != user_id or len(stored) != len(signature):
+                continue
+            distance = signature_distance(stored, signature)
+            if distance < best_distance:
+                best_key, best_distance = key, distance
+                if distance == 0:
+                    break
+
+        if best_key is None:
+            return None
+        self._entries.move_to_end(best_key)
+        return dict(self._entries[best_key][1])
+
+    def put(self, user_id: str, signature: FrameSignature, result: Dict) -> None:
+        key = (user_id, signature)
+        self._entries[key] = (time.monotonic() + self.ttl, dict(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def reuse(self, user_id: str, signature: Optional[FrameSignature], frames: List[Tuple[float, str]]) -> Optional[Dict]:
+        """Cached analysis adapted to this upload's frames, or None."""
+        analysis = self.get(user_id, signature) if signature else None
+        if analysis:
+            # Show this upload's frame, not the one stored with the result
+            frame_idx = min(analysis.get("frame_index", 0) or 0, len(frames) - 1)
+            analysis["frame_image"] = frames[frame_idx][1]
+            analysis["cached"] = True
+        return analysis
+
+    def remember(self, user_id: str, signature: Optional[FrameSignature], analysis: Dict) -> None:
+        """Store a fresh analysis (the no-vision fallback is never cached)."""
+        if signature and analysis.get("provider") != "fallback":
+            self.put(user_id, signature, analysis)
+        analysis["cached"] = False
+
+
+# Singleton instance
+hook_cache = HookResultCache(
+    max_entries=settings.hook_cache_max_entries,
+    max_distance=settings.hook_cache_max_distance,
+    ttl=settings.hook_cache_ttl,
+)
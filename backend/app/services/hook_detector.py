@@ -7,15 +7,26 @@ Falls back to Gemini 1.5 Flash, then text-only generation.
 import os
 import json
 import re
-import httpx
-from typing import List, Tuple, Optional
+import time
+import asyncio
+from collections import deque
+from app.core.config import get_settings
+from app.core.http import http_client
+from app.services.llm_router import llm_router
+from typing import Awaitable, Callable, Deque, Dict, List, Tuple, Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
+settings = get_settings()
+
 # Get API keys
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY_SECONDARY") or os.getenv("GEMINI_API_KEY")  # Use secondary key, fallback to primary
+GEMINI_API_KEYS = [k for k in (os.getenv("GEMINI_API_KEY_SECONDARY"), os.getenv("GEMINI_API_KEY")) if k]
+
+# Gemini vision models for hook analysis (flash-latest confirmed working)
+GEMINI_HOOK_MODELS = ["models/gemini-flash-latest", "models/gemini-2.0-flash"]
 
 # CONFIRMED WORKING free VLM models on OpenRouter (NO :free suffix!)
 OPENROUTER_VLM_MODELS = [
@@ -28,25 +39,37 @@ MAX_FRAMES = 3
 
 HOOK_ANALYSIS_PROMPT = """You are an expert social media content analyst.
 
-I'm showing you 3 frames from a short video:
-- Frame 0 (0s): Opening shot
-- Frame 1 (1s): Early hook moment
-- Frame 2 (2s): Attention window
+I'm showing you {frame_count} frames from the opening of a short video:
+{frame_list}
 
 Which frame stops scrolling MOST and why?
 
 Respond ONLY with JSON:
-{
-    "frame_index": <0, 1, or 2>,
-    "timestamp_sec": <0, 1, or 2>,
+{{
+    "frame_index": <{index_choices}>,
+    "timestamp_sec": <timestamp of that frame in seconds>,
     "hook_score": <1-100>,
     "reason": "<why this frame hooks viewers>",
     "visual_elements": ["<element1>", "<element2>"],
     "improvement_tip": "<how to make hook stronger>"
-}
+}}
 """
 
 
+def build_hook_prompt(frames: List[Tuple[float, str]]) -> str:
+    """Hook prompt describing the frames actually being sent."""
+    indices = [str(i) for i in range(len(frames))]
+    if len(indices) > 1:
+        index_choices = f"{', '.join(indices[:-1])} or {indices[-1]}"
+    else:
+        index_choices = indices[0] if indices else "0"
+    return HOOK_ANALYSIS_PROMPT.format(
+        frame_count=len(frames),
+        frame_list="\n".join(f"- Frame {i} ({t:.2f}s)" for i, (t, _) in enumerate(frames)),
+        index_choices=index_choices,
+    )
+
+
 async def analyze_hook_with_openrouter(frames: List[Tuple[float, str]]) -> Optional[dict]:
     """Analyze frames using OpenRouter API with confirmed working models."""
     if not OPENROUTER_API_KEY:
@@ -65,7 +88,7 @@ async def analyze_hook_with_openrouter(frames: List[Tuple[float, str]]) -> Optio
     }
     
     # Build SINGLE content with ALL frames (single-pass VLM call)
-    content = [{"type": "text", "text": HOOK_ANALYSIS_PROMPT}]
+    content = [{"type": "text", "text": build_hook_prompt(frames)}]
     
     for i, (timestamp, b64_image) in enumerate(frames):
         content.append({
@@ -85,7 +108,7 @@ async def analyze_hook_with_openrouter(frames: List[Tuple[float, str]]) -> Optio
         }
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            async with http_client("openrouter") as client:
                 response = await client.post(api_url, headers=headers, json=payload)
                 
                 print(f"DEBUG: OpenRouter {model} status: {response.status_code}")
@@ -106,6 +129,7 @@ async def analyze_hook_with_openrouter(frames: List[Tuple[float, str]]) -> Optio
                         result.setdefault("visual_elements", [])
                         
                         frame_idx = min(result.get("frame_index", 0) or 0, len(frames) - 1)
+                        result["timestamp_sec"] = round(frames[frame_idx][0], 2)
                         result["frame_image"] = frames[frame_idx][1]
                         return result
                 else:
@@ -125,31 +149,24 @@ async def analyze_hook_with_gemini(frames: List[Tuple[float, str]]) -> Optional[
         print("DEBUG: GEMINI_API_KEY not configured")
         return None
         
-    print("DEBUG: Falling back to Gemini 1.5 Flash...")
+    print("DEBUG: Falling back to Gemini...")
     
     try:
-        import google.generativeai as genai
-        genai.configure(api_key=GEMINI_API_KEY)
-        
         # Use only 2 frames max for Gemini fallback (quota sensitive)
         limited_frames = frames[:2]
         
         # Build single-pass content
-        content_parts = [HOOK_ANALYSIS_PROMPT]
+        content_parts = [build_hook_prompt(limited_frames)]
         for i, (timestamp, b64_image) in enumerate(limited_frames):
             content_parts.append({"mime_type": "image/jpeg", "data": b64_image})
         
-        # Use models/gemini-flash-latest (confirmed working)
-        print("DEBUG: Calling models/gemini-flash-latest...")
-        model = genai.GenerativeModel("models/gemini-flash-latest")
-        
-        response = await model.generate_content_async(
+        response = await llm_router.generate(
             content_parts,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.2,
-                max_output_tokens=400
-            )
+            models=GEMINI_HOOK_MODELS,
+            generation_config={"temperature": 0.2, "max_output_tokens": 400},
+            keys=GEMINI_API_KEYS,
         )
+        print(f"DEBUG: Gemini ({response.model}) answered in {response.latency:.2f}s")
         
         response_text = response.text.strip()
         print(f"DEBUG: Gemini response: {response_text[:100]}...")
@@ -164,6 +181,7 @@ async def analyze_hook_with_gemini(frames: List[Tuple[float, str]]) -> Optional[
             result.setdefault("visual_elements", [])
             
             frame_idx = min(result.get("frame_index", 0) or 0, len(frames) - 1)
+            result["timestamp_sec"] = round(frames[frame_idx][0], 2)
             result["frame_image"] = frames[frame_idx][1]
             return result
             
@@ -189,6 +207,76 @@ def generate_text_only_fallback(frames: List[Tuple[float, str]]) -> dict:
     }
 
 
+Provider = Tuple[str, Callable[[List[Tuple[float, str]]], Awaitable[Optional[dict]]]]
+
+# Recent successful latencies per provider, used to pick the hedge delay
+_provider_latencies: Dict[str, Deque[float]] = {}
+HEDGE_MIN_SAMPLES = 5
+
+
+def hedge_delay(provider: str) -> float:
+    """How long to wait for ``provider`` before firing the next one."""
+    samples = _provider_latencies.get(provider)
+    if not samples or len(samples) < HEDGE_MIN_SAMPLES:
+        return settings.hook_hedge_delay
+    ordered = sorted(samples)
+    idx = min(int(settings.hook_hedge_percentile * len(ordered)), len(ordered) - 1)
+    return min(max(ordered[idx], settings.hook_hedge_min_delay), settings.hook_hedge_max_delay)
+
+
+async def _timed(provider: Provider, frames: List[Tuple[float, str]]) -> Optional[dict]:
+    """Run one provider, recording its latency when it returns a result."""
+    name, fn = provider
+    started = time.monotonic()
+    try:
+        result = await fn(frames)
+    except Exception as e:
+        print(f"DEBUG: {name} raised: {str(e)[:100]}")
+        return None
+    if result:
+        _provider_latencies.setdefault(name, deque(maxlen=50)).append(time.monotonic() - started)
+    return result
+
+
+async def _analyze_hedged(providers: List[Provider], frames: List[Tuple[float, str]]) -> Optional[dict]:
+    """
+    Start the first provider; if it hasn't answered within its hedge delay
+    (or fails), start the next one as well. The first valid result wins and
+    the rest are cancelled.
+    """
+    pending: Dict["asyncio.Task[Optional[dict]]", str] = {}
+    queue = list(providers)
+    hedged = False
+
+    try:
+        while queue or pending:
+            if queue:
+                name, fn = queue.pop(0)
+                if pending:
+                    hedged = True
+                    print(f"DEBUG: Hedging hook analysis with {name}")
+                pending[asyncio.ensure_future(_timed((name, fn), frames))] = name
+                # Wait up to the hedge delay of the provider just started
+                timeout = hedge_delay(name) if queue else None
+            else:
+                timeout = None
+
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                name = pending.pop(task)
+                result = task.result()
+                if result:
+                    result["provider"] = name
+                    result["hedged"] = hedged
+                    return result
+    finally:
+        # Cancel the losers
+        for task in pending:
+            task.cancel()
+
+    return None
+
+
 async def analyze_hook(
     frames: List[Tuple[float, str]],
     model_name: str = "qwen/qwen-2-vl-7b-instruct"
@@ -196,6 +284,10 @@ async def analyze_hook(
     """
     Analyze frames to find the best hook moment.
     Priority: Gemini Flash -> OpenRouter (Qwen-VL) -> Text-only fallback
+    
+    With hedging enabled, OpenRouter is started alongside Gemini once Gemini
+    runs past its usual latency, and the first valid answer is used. The
+    winning provider is reported in ``result["provider"]``.
     """
     if not frames:
         raise ValueError("No frames provided for analysis")
@@ -203,20 +295,31 @@ async def analyze_hook(
     # Limit to MAX_FRAMES (3) for optimal performance
     limited_frames = frames[:MAX_FRAMES]
     
+    providers: List[Provider] = []
     # Try Gemini first (you have a working API key)
     if GEMINI_API_KEY:
-        result = await analyze_hook_with_gemini(limited_frames)
-        if result:
-            return result
-    
+        providers.append(("gemini", analyze_hook_with_gemini))
     # Fallback to OpenRouter if available
     if OPENROUTER_API_KEY:
-        result = await analyze_hook_with_openrouter(limited_frames)
+        providers.append(("openrouter", analyze_hook_with_openrouter))
+    
+    if settings.hook_hedging and len(providers) > 1:
+        result = await _analyze_hedged(providers, limited_frames)
         if result:
             return result
+    else:
+        for name, fn in providers:
+            result = await _timed((name, fn), limited_frames)
+            if result:
+                result["provider"] = name
+                result["hedged"] = False
+                return result
     
     # Last resort: text-only fallback
-    return generate_text_only_fallback(limited_frames)
+    result = generate_text_only_fallback(limited_frames)
+    result["provider"] = "fallback"
+    result["hedged"] = False
+    return result
 
 
 def get_hook_summary(analysis: dict) -> str:
@@ -0,0 +1,337 @@
+"""
+Hook Batch Jobs
+Runs hook analysis for many uploaded videos in the background.
+
+Submitting a batch stores the uploads and returns a job ID immediately.
+Worker tasks pull videos off a shared queue, extract frames in a process
+pool (decoding is CPU-bound) and call the VLM under a separate concurrency
+limit. Per-video results can be polled or streamed as they finish, with
+or without their base64 frame images.
+
+Pending videos (per user and overall) and the bytes of uploads waiting on
+disk are capped, so batches are refused with ``HookQueueFull`` instead of
+queueing without bound.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import shutil
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from app.core.config import get_settings
+from app.services.hook_cache import hook_cache, frame_signature
+from app.services.hook_detector import analyze_hook, get_hook_summary, MAX_FRAMES
+from app.services.video_processor import cleanup_temp_file, extract_frames, select_hook_frames
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class HookQueueFull(Exception):
+    """Raised when a batch would exceed the pending video or upload byte limits."""
+
+
+class HookVideo:
+    """One video in a batch."""
+
+    def __init__(self, index: int, filename: str, path: str, size: int = 0):
+        self.index = index
+        self.filename = filename
+        self.path = path
+        self.size = size  # Bytes spooled to disk until the video finishes
+        self.status = "queued"  # queued | extracting | analyzing | done | failed
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+
+    def to_dict(self, include_frames: bool = True) -> Dict[str, Any]:
+        result = self.result
+        if result and not include_frames:
+            result = {k: v for k, v in result.items() if k != "frame_image"}
+        return {
+            "index": self.index,
+            "filename": self.filename,
+            "status": self.status,
+            "result": result,
+            "error": self.error,
+        }
+
+    @property
+    def pending(self) -> bool:
+        return self.status not in ("done", "failed")
+
+
+class HookBatchJob:
+    """A submitted batch and its progress."""
+
+    def __init__(self, user_id: str, directory: str, expected: int = 0):
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.directory = directory
+        self.expected = expected  # Videos announced at submission (counted while uploading)
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.videos: List[HookVideo] = []
+        self.completed: List[int] = []  # Video indices in completion order
+        self._changed = asyncio.Condition()
+
+    @property
+    def status(self) -> str:
+        if self.finished_at is not None:
+            return "completed"
+        return "running" if any(v.status != "queued" for v in self.videos) else "queued"
+
+    def to_dict(self, include_results: bool = True, include_frames: bool = True) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "total": len(self.videos),
+            "completed": len(self.completed),
+            "failed": sum(1 for v in self.videos if v.status == "failed"),
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "videos": [v.to_dict(include_frames) if include_results else {"index": v.index, "filename": v.filename, "status": v.status}
+                       for v in self.videos],
+        }
+
+    async def _notify(self) -> None:
+        async with self._changed:
+            self._changed.notify_all()
+
+    async def events(self, include_frames: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Yield each video as it finishes (already finished ones first), then stop."""
+        cursor = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(
+                    lambda: cursor < len(self.completed) or self.finished_at is not None
+                )
+                ready = self.completed[cursor:]
+                done = self.finished_at is not None
+            for index in ready:
+                yield self.videos[index].to_dict(include_frames)
+            cursor += len(ready)
+            if done and cursor >= len(self.completed):
+                return
+
+
+class HookJobQueue:
+    """Shared queue of batch videos with bounded extraction and VLM concurrency."""
+
+    def __init__(
+        self,
+        extract_workers: int = 2,
+        vlm_concurrency: int = 3,
+        job_ttl: float = 3600.0,
+        max_pending: int = 200,
+        max_pending_per_user: int = 50,
+        max_spooled_bytes: int = 2 * 1024 ** 3,
+    ):
+        self.extract_workers = max(extract_workers, 1)
+        self.vlm_concurrency = max(vlm_concurrency, 1)
+        self.job_ttl = job_ttl
+        self.max_pending = max_pending
+        self.max_pending_per_user = max_pending_per_user
+        self.max_spooled_bytes = max_spooled_bytes
+        self._jobs: Dict[str, HookBatchJob] = {}
+        self._uploading: Dict[str, HookBatchJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List["asyncio.Task[None]"] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._vlm_slots: Optional[asyncio.Semaphore] = None
+
+    @property
+    def depth(self) -> int:
+        """Videos waiting for a worker."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def _active(self) -> List[HookBatchJob]:
+        running = [job for job in self._jobs.values() if job.finished_at is None]
+        return list(self._uploading.values()) + running
+
+    def pending(self, user_id: Optional[str] = None) -> int:
+        """Videos uploading, queued or in progress (for one user, or overall)."""
+        return sum(
+            job.expected - len(job.completed)
+            for job in self._active()
+            if user_id is None or job.user_id == user_id
+        )
+
+    @property
+    def spooled_bytes(self) -> int:
+        """Bytes of uploaded videos still waiting on disk."""
+        return sum(v.size for job in self._active() for v in job.videos if v.pending)
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # Spawn (not fork): the API process has threads and open sockets
+        return ProcessPoolExecutor(
+            max_workers=self.extract_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def _start(self) -> None:
+        if self._queue is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._vlm_slots = asyncio.Semaphore(self.vlm_concurrency)
+        self._pool = self._new_pool()
+        # Enough workers to keep every extraction process and VLM slot busy
+        for _ in range(self.extract_workers + self.vlm_concurrency):
+            self._workers.append(asyncio.ensure_future(self._work()))
+        logger.info(f"Hook batch queue started ({self.extract_workers} extract processes, "
+                    f"{self.vlm_concurrency} concurrent VLM calls)")
+
+    def create_job(self, user_id: str, videos: int) -> HookBatchJob:
+        """
+        New job with its own upload directory; add_video() each upload, then submit().
+
+        Raises:
+            HookQueueFull: If ``videos`` more would exceed the pending limits
+        """
+        self._expire()
+        if self.pending(user_id) + videos > self.max_pending_per_user:
+            raise HookQueueFull("Too many of your videos are already queued, please retry later")
+        if self.pending() + videos > self.max_pending:
+            raise HookQueueFull("Hook analysis queue is full, please retry later")
+
+        directory = tempfile.mkdtemp(prefix="hook-batch-", dir=settings.hook_batch_dir or None)
+        job = HookBatchJob(user_id, directory, expected=videos)
+        self._uploading[job.id] = job
+        return job
+
+    def add_video(self, job: HookBatchJob, video: HookVideo) -> None:
+        """
+        Attach a video already written to the job's directory.
+
+        Raises:
+            HookQueueFull: If the spooled uploads now exceed max_spooled_bytes
+        """
+        job.videos.append(video)
+        if self.spooled_bytes > self.max_spooled_bytes:
+            raise HookQueueFull("Too many uploads are waiting for analysis, please retry later")
+
+    def submit(self, job: HookBatchJob) -> None:
+        """Queue every video of the job."""
+        self._start()
+        self._uploading.pop(job.id, None)
+        job.expected = len(job.videos)
+        self._jobs[job.id] = job
+        for video in job.videos:
+            self._queue.put_nowait((job, video))
+
+    def discard(self, job: HookBatchJob) -> None:
+        """Drop a job that was never submitted (e.g. an upload failed)."""
+        self._uploading.pop(job.id, None)
+        shutil.rmtree(job.directory, ignore_errors=True)
+
+    def get_job(self, job_id: str, user_id: str) -> Optional[HookBatchJob]:
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    def _expire(self) -> None:
+        cutoff = time.time() - self.job_ttl
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+    async def _work(self) -> None:
+        while True:
+            job, video = await self._queue.get()
+            try:
+                await self._process(job, video)
+            except Exception as e:
+                logger.error(f"Hook batch {job.id} video {video.index} failed: {e}")
+                video.status = "failed"
+                video.error = str(e)
+            finally:
+                cleanup_temp_file(video.path)
+                job.completed.append(video.index)
+                if len(job.completed) == len(job.videos):
+                    job.finished_at = time.time()
+                    shutil.rmtree(job.directory, ignore_errors=True)
+                await job._notify()
+                self._queue.task_done()
+
+    async def _process(self, job: HookBatchJob, video: HookVideo) -> None:
+        loop = asyncio.get_running_loop()
+
+        video.status = "extracting"
+        await job._notify()
+        if settings.hook_prerank:
+            extract = partial(
+                select_hook_frames,
+                video.path,
+                top_k=MAX_FRAMES,
+                window_seconds=settings.hook_scan_seconds,
+                step_seconds=settings.hook_scan_step,
+            )
+        else:
+            extract = partial(extract_frames, video.path, max_frames=MAX_FRAMES)
+        frames = await self._extract(extract)
+        if not frames:
+            raise ValueError("Could not extract frames from video")
+
+        signature = await loop.run_in_executor(None, frame_signature, frames)
+        analysis = hook_cache.reuse(job.user_id, signature, frames)
+        if not analysis:
+            video.status = "analyzing"
+            await job._notify()
+            async with self._vlm_slots:
+                analysis = await analyze_hook(frames)
+            if not analysis:
+                raise ValueError("Hook analysis failed")
+            hook_cache.remember(job.user_id, signature, analysis)
+
+        analysis["total_frames_analyzed"] = len(frames)
+        analysis["video_filename"] = video.filename
+        analysis["summary"] = get_hook_summary(analysis)
+        video.result = analysis
+        video.status = "done"
+
+    async def _extract(self, extract: partial) -> Any:
+        """Run ``extract`` in the process pool, replacing the pool if a worker died."""
+        pool = self._pool
+        try:
+            return await asyncio.get_running_loop().run_in_executor(pool, extract)
+        except BrokenProcessPool:
+            # Every video in flight on the pool fails with it; the first to notice
+            # starts a new pool so later videos are not failed too
+            if self._pool is pool:
+                logger.warning("Hook extraction pool broke, starting a new one")
+                pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._new_pool()
+            raise
+
+    async def close(self) -> None:
+        """Stop workers and the extraction pool (called on shutdown)."""
+        workers, self._workers = self._workers, []
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self._queue = None
+        for job in self._jobs.values():
+            shutil.rmtree(job.directory, ignore_errors=True)
+
+
+# Singleton instance
+hook_jobs = HookJobQueue(
+    extract_workers=settings.hook_batch_extract_workers,
+    vlm_concurrency=settings.hook_batch_vlm_concurrency,
+    job_ttl=settings.hook_batch_job_ttl,
+    max_pending=settings.hook_batch_max_pending,
+    max_pending_per_user=settings.hook_batch_max_pending_per_user,
+    max_spooled_bytes=settings.hook_batch_max_spool_mb * 1024 * 1024,
+)
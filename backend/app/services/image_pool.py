@@ -0,0 +1,198 @@
+"""Process pool for CPU-heavy image transforms.
+
+Pillow/OpenCV work (resizing, enhancing, JPEG encoding) holds the GIL for
+long stretches, so running it on the shared FastAPI thread pool slows every
+other request. This pool runs it in separate processes instead. Input pixels
+and encoded bytes are handed over through ``multiprocessing.shared_memory``
+rather than pickled through the pool's pipe. Only small results (a file path
+or a base64 string) travel back.
+
+Queue metrics are available from ``image_pool.metrics()``. A queue limit
+rejects work with ImagePoolBusy instead of letting requests pile up.
+"""
+import asyncio
+import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+
+class ImagePoolBusy(Exception):
+    """Raised when too many image jobs are already queued."""
+
+
+# --- Worker side (runs in the pool processes) ---
+
+def _optimize_job(shm_name: str, size: int) -> Tuple[str, float]:
+    from app.services.image_service import optimize_image_bytes
+
+    started = time.time()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        contents = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+    return optimize_image_bytes(contents), started
+
+
+def _compress_frame_job(shm_name: str, shape: Tuple[int, ...], dtype: str, max_width: int) -> Tuple[str, float]:
+    from app.services.video_processor import compress_frame
+
+    started = time.time()
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        frame = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+        result = compress_frame(frame, max_width)
+        del frame  # Release the view before closing the segment
+    finally:
+        shm.close()
+    return result, started
+
+
+# --- API side ---
+
+def _share_bytes(data: bytes) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+    shm.buf[:len(data)] = data
+    return shm
+
+
+def _share_array(array: np.ndarray) -> shared_memory.SharedMemory:
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm
+
+
+def _release(shm: shared_memory.SharedMemory) -> None:
+    try:
+        shm.close()
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+
+class ImagePool:
+    """Size-configurable process pool for image transforms, with queue metrics."""
+
+    def __init__(self, workers: int = 2, queue_limit: int = 64):
+        self.workers = max(workers, 1)
+        self.queue_limit = queue_limit
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()  # Jobs are submitted from threads as well as the loop
+        self._in_flight = 0
+        self._peak_in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._wait_ewma = 0.0
+        self._run_ewma = 0.0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Spawn (not fork): the API process has threads and open sockets
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+                    logger.info(f"Image pool started with {self.workers} workers")
+        return self._executor
+
+    def _submit(self, fn: Callable[..., Tuple[Any, float]], shm: shared_memory.SharedMemory, *args: Any) -> "Future[Any]":
+        """Run ``fn`` on the pool; ``shm`` is unlinked once the job finishes."""
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_limit:
+                self._rejected += 1
+                _release(shm)
+                raise ImagePoolBusy("Image processing is busy, please retry shortly")
+            self._in_flight += 1
+            self._peak_in_flight = max(self._peak_in_flight, self._in_flight)
+
+        submitted = time.time()
+        result: "Future[Any]" = Future()
+
+        def done(job: "Future[Tuple[Any, float]]") -> None:
+            _release(shm)
+            finished = time.time()
+            with self._lock:
+                self._in_flight -= 1
+                error = RuntimeError("Image pool shut down") if job.cancelled() else job.exception()
+                if error is None:
+                    value, started = job.result()
+                    self._completed += 1
+                    self._wait_ewma = 0.9 * self._wait_ewma + 0.1 * max(0.0, started - submitted)
+                    self._run_ewma = 0.9 * self._run_ewma + 0.1 * (finished - started)
+                else:
+                    self._failed += 1
+            if error is None:
+                result.set_result(value)
+            else:
+                result.set_exception(error)
+
+        try:
+            self._pool().submit(fn, shm.name, *args).add_done_callback(done)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            _release(shm)
+            raise
+        return result
+
+    async def optimize_image(self, contents: bytes) -> str:
+        """Optimize encoded image bytes for Instagram; returns the saved file path."""
+        shm = _share_bytes(contents)
+        return await asyncio.wrap_future(self._submit(_optimize_job, shm, len(contents)))
+
+    def compress_frame(self, frame: np.ndarray, max_width: int = 480) -> str:
+        """
+        Blocking version of video_processor.compress_frame that runs on the pool.
+        Meant for decode threads; falls back to in-process work when busy.
+        """
+        frame = np.ascontiguousarray(frame)
+        try:
+            shm = _share_array(frame)
+            return self._submit(_compress_frame_job, shm, frame.shape, frame.dtype.str, max_width).result()
+        except ImagePoolBusy:
+            from app.services.video_processor import compress_frame
+            return compress_frame(frame, max_width)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and timing, for the admin dashboard."""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "in_flight": self._in_flight,
+                "queue_depth": max(0, self._in_flight - self.workers),
+                "peak_in_flight": self._peak_in_flight,
+                "queue_limit": self.queue_limit,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_ewma * 1000, 1),
+                "avg_run_ms": round(self._run_ewma * 1000, 1),
+            }
+
+    def close(self) -> None:
+        """Stop the worker processes (called on shutdown)."""
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Singleton instance
+image_pool = ImagePool(
+    workers=settings.image_pool_workers,
+    queue_limit=settings.image_pool_queue_limit,
+)
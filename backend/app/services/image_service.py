@@ -1,7 +1,9 @@
 import os
 from fastapi import UploadFile
-from PIL import Image, ImageEnhance
+from PIL import Image, ImageOps
+from typing import List
 import io
+import math
 import uuid
 
 # Define upload directory relative to backend app
@@ -10,60 +12,71 @@ UPLOAD_DIR = os.path.join("app", "uploads", "optimized")
 # Ensure directory exists
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# Target Dimensions (Instagram portrait, 4:5)
+TARGET_WIDTH = 1080
+TARGET_HEIGHT = 1350
+
+EXIF_ORIENTATION = 0x0112
+
 def optimize_image(upload_file: UploadFile) -> str:
     """
     Optimize an uploaded image for Instagram (4:5 aspect ratio).
+    See optimize_image_bytes.
+    """
+    # Read image
+    contents = upload_file.file.read()
+    upload_file.file.seek(0)  # Reset cursor if needed later
+    return optimize_image_bytes(contents)
+
+
+def optimize_image_bytes(contents: bytes) -> str:
+    """
+    Optimize encoded image bytes for Instagram (4:5 aspect ratio).
+    Runs in the image worker pool (see image_pool.py).
     
     Steps:
-    1. Read bytes
-    2. Convert to RGB
-    3. Resize/Crop to 1080x1350
-    4. Enhance brightness/contrast slightly
+    1. Decode bytes (JPEGs at reduced resolution via draft mode)
+    2. Apply EXIF orientation and convert to RGB
+    3. Resize/Crop to 1080x1350 in one pass
+    4. Enhance brightness/contrast slightly (one lookup table)
     5. Save as high-quality JPEG
     """
     try:
-        # Read image
-        contents = upload_file.file.read()
         image = Image.open(io.BytesIO(contents))
-        upload_file.file.seek(0)  # Reset cursor if needed later
+        
+        # Fast path for JPEGs: let the decoder scale by 1/2, 1/4 or 1/8 (DCT
+        # scaling) while staying at or above the size the crop needs, instead
+        # of decoding a 12-48 MP photo at full resolution.
+        width, height = image.size
+        if _is_rotated(image):
+            width, height = height, width  # Displayed size after EXIF rotation
+        scale = max(TARGET_WIDTH / width, TARGET_HEIGHT / height)
+        if scale < 1:
+            needed = (math.ceil(width * scale), math.ceil(height * scale))
+            image.draft("RGB", needed[::-1] if _is_rotated(image) else needed)
+        
+        # Apply EXIF orientation (phone photos are often stored sideways)
+        image = ImageOps.exif_transpose(image)
         
         # Convert to RGB (handle PNG/RGBA)
         if image.mode != "RGB":
             image = image.convert("RGB")
-            
-        # Target Dimensions
-        TARGET_WIDTH = 1080
-        TARGET_HEIGHT = 1350
-        
-        # Resize logic (Cover)
-        img_ratio = image.width / image.height
-        target_ratio = TARGET_WIDTH / TARGET_HEIGHT
         
-        if img_ratio > target_ratio:
-            # Image is wider than target
-            new_height = TARGET_HEIGHT
-            new_width = int(new_height * img_ratio)
-        else:
-            # Image is taller than target
-            new_width = TARGET_WIDTH
-            new_height = int(new_width / img_ratio)
-            
-        resized_img = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        # Resize logic (Cover): scale the centered crop region straight to the target
+        scale = max(TARGET_WIDTH / image.width, TARGET_HEIGHT / image.height)
+        crop_width = TARGET_WIDTH / scale
+        crop_height = TARGET_HEIGHT / scale
+        left = (image.width - crop_width) / 2
+        top = (image.height - crop_height) / 2
         
-        # Center Crop
-        left = (new_width - TARGET_WIDTH) / 2
-        top = (new_height - TARGET_HEIGHT) / 2
-        right = (new_width + TARGET_WIDTH) / 2
-        bottom = (new_height + TARGET_HEIGHT) / 2
+        final_img = image.resize(
+            (TARGET_WIDTH, TARGET_HEIGHT),
+            Image.Resampling.LANCZOS,
+            box=(left, top, left + crop_width, top + crop_height)
+        )
         
-        final_img = resized_img.crop((left, top, right, bottom))
-        
-        # Enhance
-        enhancer = ImageEnhance.Contrast(final_img)
-        final_img = enhancer.enhance(1.05) # 5% boost
-        
-        enhancer = ImageEnhance.Brightness(final_img)
-        final_img = enhancer.enhance(1.02) # 2% boost
+        # Enhance: 5% contrast then 2% brightness, fused into one lookup table
+        final_img = final_img.point(_enhance_lut(final_img, contrast=1.05, brightness=1.02))
         
         # Generate filename
         filename = f"{uuid.uuid4()}.jpg"
@@ -76,3 +89,24 @@ def optimize_image(upload_file: UploadFile) -> str:
         
     except Exception as e:
         raise Exception(f"Image optimization failed: {str(e)}")
+
+
+def _is_rotated(image: Image.Image) -> bool:
+    """True if the EXIF orientation swaps width and height."""
+    return image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8)
+
+
+def _enhance_lut(image: Image.Image, contrast: float, brightness: float) -> List[int]:
+    """
+    Per-channel table equivalent to ImageEnhance.Contrast(contrast) followed
+    by ImageEnhance.Brightness(brightness), so the pixels are touched once.
+    """
+    # Contrast pivots around the mean grey level, as ImageEnhance.Contrast does
+    histogram = image.convert("L").histogram()
+    mean = int(sum(i * n for i, n in enumerate(histogram)) / max(sum(histogram), 1) + 0.5)
+    
+    table = []
+    for value in range(256):
+        value = min(255, max(0, int(mean + contrast * (value - mean) + 0.5)))
+        table.append(min(255, max(0, int(brightness * value + 0.5))))
+    return table * 3
@@ -5,7 +5,7 @@ For demo, it uses mock data. Replace with real API calls when credentials are av
 
 Note: Instagram Graph API requires a Facebook Business account and approved app.
 """
-import httpx
+from app.core.http import http_client
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
 from app.core.config import get_settings
@@ -27,7 +27,7 @@ class InstagramService:
         if not self.access_token:
             return self._mock_user_info()
         
-        async with httpx.AsyncClient() as client:
+        async with http_client("instagram_graph") as client:
             response = await client.get(
                 f"{INSTAGRAM_API_BASE}/me",
                 params={
@@ -44,7 +44,7 @@ class InstagramService:
         if not self.access_token:
             return self._mock_media(limit)
         
-        async with httpx.AsyncClient() as client:
+        async with http_client("instagram_graph") as client:
             response = await client.get(
                 f"{INSTAGRAM_API_BASE}/me/media",
                 params={
@@ -62,7 +62,7 @@ class InstagramService:
         if not self.access_token:
             return self._mock_media_insights()
         
-        async with httpx.AsyncClient() as client:
+        async with http_client("instagram_graph") as client:
             response = await client.get(
                 f"{INSTAGRAM_API_BASE}/{media_id}/insights",
                 params={
@@ -88,7 +88,7 @@ class InstagramService:
         if since:
             params["since"] = int(since.timestamp())
         
-        async with httpx.AsyncClient() as client:
+        async with http_client("instagram_graph") as client:
             response = await client.get(
                 f"{INSTAGRAM_API_BASE}/me/insights",
                 params=params
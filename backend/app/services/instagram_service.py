@@ -1,78 +1,144 @@
 """
 Instagram Graph API service for fetching real Instagram statistics.
 """
-import httpx
+from app.core.http import http_client
 import hashlib
 import random
-from typing import Optional
+from typing import Optional, Tuple
 from datetime import datetime
 
+from app.core.cache import SingleFlight, TTLCache, digest_key
+from app.core.config import get_settings
 from app.routers.oauth import get_tokens
 
+settings = get_settings()
+
 
 INSTAGRAM_API_BASE = "https://graph.facebook.com/v18.0"
 
 
+ACCOUNT_PROFILE_FIELDS = ("id", "username", "name", "biography", "profile_picture_url")
+ACCOUNT_COUNTER_FIELDS = ("followers_count", "follows_count", "media_count")
+
+# Resolved page / IG business IDs and profile rarely change; counters do.
+# Both are keyed by a digest of the access token.
+_account_identity = TTLCache(max_entries=1024, ttl=settings.instagram_identity_ttl)
+_account_counters = TTLCache(max_entries=1024, ttl=settings.instagram_counters_ttl)
+_account_flight = SingleFlight()
+
+
 async def get_instagram_account() -> Optional[dict]:
     """
     Get Instagram Business Account info.
+    
+    The page -> business account -> profile walk is cached per token;
+    counters are refreshed on a shorter TTL with a single Graph call.
     """
     tokens = get_tokens("instagram")
     if not tokens:
         print("❌ Instagram Service: No tokens found!")
         return None
     
-    print(f"✅ It works! Using Instagram Token: {tokens.get('access_token')[:10]}...")
+    access_token = tokens["access_token"]
+    key = digest_key(access_token)
     
-    async with httpx.AsyncClient() as client:
-        # Get user's pages first
-        pages_response = await client.get(
-            f"{INSTAGRAM_API_BASE}/me/accounts",
-            params={"access_token": tokens["access_token"]},
-        )
-        
-        if pages_response.status_code != 200:
-            print(f"❌ Failed to get Pages: {pages_response.text}")
-            return None
-        
-        pages = pages_response.json().get("data", [])
-        if not pages:
-            return None
-        
-        # Get Instagram account linked to the first page
-        page_id = pages[0]["id"]
-        ig_response = await client.get(
-            f"{INSTAGRAM_API_BASE}/{page_id}",
-            params={
-                "fields": "instagram_business_account",
-                "access_token": tokens["access_token"],
-            },
-        )
-        
-        if ig_response.status_code != 200:
-            print(f"❌ Failed to get IG Business ID from Page: {ig_response.text}")
-            return None
-        
-        ig_data = ig_response.json()
-        ig_account_id = ig_data.get("instagram_business_account", {}).get("id")
-        
-        if not ig_account_id:
-            return None
-        
-        # Get Instagram account details
-        account_response = await client.get(
-            f"{INSTAGRAM_API_BASE}/{ig_account_id}",
-            params={
-                "fields": "id,username,name,biography,followers_count,follows_count,media_count,profile_picture_url",
-                "access_token": tokens["access_token"],
-            },
-        )
-        
-        if account_response.status_code != 200:
-            print(f"❌ Failed to get IG Account details: {account_response.text}")
-            return None
-        
-        return account_response.json()
+    identity = _account_identity.get(key)
+    counters = _account_counters.get(key)
+    if identity is not None and counters is not None:
+        return {**identity["profile"], **counters}
+    
+    # Parallel dashboard requests share one upstream walk
+    return await _account_flight.do(key, lambda: _resolve_instagram_account(key, access_token))
+
+
+async def _resolve_instagram_account(key: str, access_token: str) -> Optional[dict]:
+    """Fill the identity and counter caches for a token."""
+    identity = _account_identity.get(key)
+    
+    async with http_client("facebook_graph") as client:
+        if identity is None:
+            print(f"✅ It works! Using Instagram Token: {access_token[:10]}...")
+            resolved = await _walk_account_chain(client, access_token)
+            if not resolved:
+                return None
+            
+            page_id, account = resolved
+            identity = {
+                "page_id": page_id,
+                "ig_id": account.get("id"),
+                "profile": {f: account[f] for f in ACCOUNT_PROFILE_FIELDS if f in account},
+            }
+            _account_identity.set(key, identity)
+        else:
+            account_response = await client.get(
+                f"{INSTAGRAM_API_BASE}/{identity['ig_id']}",
+                params={
+                    "fields": ",".join(ACCOUNT_COUNTER_FIELDS),
+                    "access_token": access_token,
+                },
+            )
+            
+            if account_response.status_code != 200:
+                print(f"❌ Failed to refresh IG Account counters: {account_response.text}")
+                return None
+            
+            account = account_response.json()
+    
+    counters = {f: account[f] for f in ACCOUNT_COUNTER_FIELDS if f in account}
+    _account_counters.set(key, counters)
+    return {**identity["profile"], **counters}
+
+
+async def _walk_account_chain(client, access_token: str) -> Optional[Tuple[str, dict]]:
+    """Resolve page -> Instagram business account -> account details."""
+    # Get user's pages first
+    pages_response = await client.get(
+        f"{INSTAGRAM_API_BASE}/me/accounts",
+        params={"access_token": access_token},
+    )
+    
+    if pages_response.status_code != 200:
+        print(f"❌ Failed to get Pages: {pages_response.text}")
+        return None
+    
+    pages = pages_response.json().get("data", [])
+    if not pages:
+        return None
+    
+    # Get Instagram account linked to the first page
+    page_id = pages[0]["id"]
+    ig_response = await client.get(
+        f"{INSTAGRAM_API_BASE}/{page_id}",
+        params={
+            "fields": "instagram_business_account",
+            "access_token": access_token,
+        },
+    )
+    
+    if ig_response.status_code != 200:
+        print(f"❌ Failed to get IG Business ID from Page: {ig_response.text}")
+        return None
+    
+    ig_data = ig_response.json()
+    ig_account_id = ig_data.get("instagram_business_account", {}).get("id")
+    
+    if not ig_account_id:
+        return None
+    
+    # Get Instagram account details
+    account_response = await client.get(
+        f"{INSTAGRAM_API_BASE}/{ig_account_id}",
+        params={
+            "fields": ",".join(ACCOUNT_PROFILE_FIELDS + ACCOUNT_COUNTER_FIELDS),
+            "access_token": access_token,
+        },
+    )
+    
+    if account_response.status_code != 200:
+        print(f"❌ Failed to get IG Account details: {account_response.text}")
+        return None
+    
+    return page_id, account_response.json()
 
 
 async def get_instagram_insights() -> Optional[dict]:
@@ -89,7 +155,7 @@ async def get_instagram_insights() -> Optional[dict]:
     
     ig_id = account.get("id")
     
-    async with httpx.AsyncClient() as client:
+    async with http_client("facebook_graph") as client:
         insights_response = await client.get(
             f"{INSTAGRAM_API_BASE}/{ig_id}/insights",
             params={
@@ -140,7 +206,7 @@ async def get_recent_media(limit: int = 10) -> Optional[list]:
     
     ig_id = account.get("id")
     
-    async with httpx.AsyncClient() as client:
+    async with http_client("facebook_graph") as client:
         media_response = await client.get(
             f"{INSTAGRAM_API_BASE}/{ig_id}/media",
             params={
@@ -313,7 +379,7 @@ async def get_competitor_stats(target_username: str) -> Optional[dict]:
         
     my_ig_id = account.get("id")
 
-    async with httpx.AsyncClient() as client:
+    async with http_client("facebook_graph") as client:
         # Business Discovery Query
         # GET /{ig-user-id}?fields=business_discovery.username({target_handle}){followers_count,media_count,profile_picture_url,biography,website}
         
@@ -416,11 +482,11 @@ async def get_competitor_stats(target_username: str) -> Optional[dict]:
     real_data = None
     try:
         import re
-        async with httpx.AsyncClient(follow_redirects=True, headers={
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
-            "Accept-Language": "en-US,en;q=0.9",
-        }) as client:
-            response = await client.get(f"https://www.instagram.com/{username_clean}/")
+        async with http_client("instagram_web") as client:
+            response = await client.get(f"https://www.instagram.com/{username_clean}/", headers={
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+                "Accept-Language": "en-US,en;q=0.9",
+            })
             if response.status_code == 200:
                 html = response.text
                 
@@ -548,7 +614,7 @@ async def create_media_container(image_url: str, caption: str) -> str:
         "access_token": access_token
     }
 
-    async with httpx.AsyncClient() as client:
+    async with http_client("facebook_graph") as client:
         # DEV MODE BYPASS: Instagram cannot fetch localhost URLs. 
         # If we are on localhost, mock the response so the UI flow can be tested.
         if "localhost" in image_url or "127.0.0.1" in image_url:
@@ -585,7 +651,7 @@ async def publish_media(creation_id: str) -> dict:
         "access_token": access_token
     }
 
-    async with httpx.AsyncClient() as client:
+    async with http_client("facebook_graph") as client:
         # DEV MODE BYPASS
         if creation_id == "mock_creation_id_12345":
             print(f"⚠️  DEV MODE: Mocking successful publish for creation_id: {creation_id}")
@@ -1,7 +1,7 @@
 """
 LinkedIn API service for fetching real LinkedIn statistics.
 """
-import httpx
+from app.core.http import http_client
 from typing import Optional
 from datetime import datetime
 
@@ -19,7 +19,7 @@ async def get_linkedin_profile() -> Optional[dict]:
     if not tokens:
         return None
     
-    async with httpx.AsyncClient() as client:
+    async with http_client("linkedin") as client:
         # Get basic profile
         profile_response = await client.get(
             f"{LINKEDIN_API_BASE}/me",
@@ -62,7 +62,7 @@ async def get_linkedin_connections() -> Optional[int]:
     if not tokens:
         return None
     
-    async with httpx.AsyncClient() as client:
+    async with http_client("linkedin") as client:
         response = await client.get(
             f"{LINKEDIN_API_BASE}/connections",
             params={"q": "viewer", "count": 0},
@@ -0,0 +1,344 @@
+"""Health-aware routing of Gemini requests across API keys and models.
+
+Every (key, model) pair is a route. The router records success rate,
+latency percentiles and quota errors per route, puts failing routes on an
+exponential circuit-breaker cooldown, and sends each request to the fastest
+healthy route first. Requests go straight to the REST API through the pooled
+HTTP client with the key in a request header, so no global SDK state is
+configured and concurrent requests can use different keys safely.
+"""
+import base64
+import logging
+import re
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import httpx
+
+from app.core.cache import digest_key
+from app.core.config import get_settings
+from app.core.http import get_http_client
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+GEMINI_API_URL = "https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent"
+
+# Samples kept per route for success rate and latency percentiles
+STATS_WINDOW = 50
+
+Route = Tuple[str, str]  # (key id, model)
+
+
+class LLMError(Exception):
+    """Base class for router errors."""
+
+
+class LLMUnavailable(LLMError):
+    """Every route failed or is cooling down."""
+
+
+class LLMRequestError(LLMError):
+    """The request itself was rejected (bad input, blocked prompt); other routes won't help."""
+
+
+class LLMResponse(NamedTuple):
+    text: str
+    model: str
+    latency: float
+
+
+class _RouteFailure(Exception):
+    """One attempt failed in a way that says something about the route."""
+
+    def __init__(self, message: str, kind: str = "error", retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.kind = kind  # error | quota | model | key
+        self.retry_after = retry_after
+
+
+class RouteStats:
+    """Rolling health of one (key, model) route."""
+
+    def __init__(self):
+        self.latencies: Deque[float] = deque(maxlen=STATS_WINDOW)
+        self.outcomes: Deque[bool] = deque(maxlen=STATS_WINDOW)
+        self.requests = 0
+        self.quota_errors = 0
+        self.consecutive_failures = 0
+        self.trips = 0
+        self.cooldown_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def success_rate(self) -> float:
+        if not self.outcomes:
+            return 1.0
+        return sum(self.outcomes) / len(self.outcomes)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+    def record_success(self, latency: float) -> None:
+        self.requests += 1
+        self.latencies.append(latency)
+        self.outcomes.append(True)
+        self.consecutive_failures = 0
+        self.trips = 0
+
+    def record_failure(self, error: str) -> None:
+        self.requests += 1
+        self.outcomes.append(False)
+        self.consecutive_failures += 1
+        self.last_error = error[:200]
+
+    def cool_down(self, seconds: float) -> None:
+        self.cooldown_until = max(self.cooldown_until, time.monotonic() + seconds)
+        self.trips += 1
+
+
+class LLMRouter:
+    """Routes generateContent calls to the healthiest (key, model) pair."""
+
+    def __init__(self):
+        self._stats: Dict[Route, RouteStats] = {}
+        self._key_cooldowns: Dict[str, float] = {}
+
+    def default_keys(self) -> List[str]:
+        return _unique([settings.gemini_api_key, settings.gemini_api_key_secondary])
+
+    async def generate(
+        self,
+        contents: Sequence[Any],
+        models: Sequence[str],
+        generation_config: Optional[Dict[str, Any]] = None,
+        keys: Optional[Sequence[str]] = None,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> LLMResponse:
+        """
+        Generate content on the best available route.
+
+        Args:
+            contents: Prompt parts: strings, raw image bytes, or
+                ``{"mime_type": ..., "data": bytes | base64 str}`` dicts
+            models: Acceptable models, in order of preference
+            generation_config: Sampling options (snake_case or camelCase)
+            keys: API keys to use (defaults to the configured Gemini keys)
+            validate: Checks the response text and raises ValueError if it is
+                unusable (e.g. malformed JSON); the next route is then tried
+
+        Raises:
+            LLMRequestError: If the request was rejected as invalid
+            LLMUnavailable: If no route could serve it
+        """
+        keys = _unique(keys if keys is not None else self.default_keys())
+        if not keys:
+            raise LLMUnavailable("Gemini API key is not configured")
+
+        body: Dict[str, Any] = {"contents": [{"role": "user", "parts": [_to_part(p) for p in contents]}]}
+        if generation_config:
+            body["generationConfig"] = {_camel(k): v for k, v in generation_config.items()}
+
+        plan = self._plan(keys, models)
+        if not plan:
+            raise LLMUnavailable("All Gemini routes are cooling down")
+
+        last_error: Optional[Exception] = None
+        for api_key, model, route in plan:
+            if self._key_cooling(route[0]):
+                # Key was disabled by an earlier attempt in this request
+                continue
+            stats = self._stats.setdefault(route, RouteStats())
+            started = time.monotonic()
+            try:
+                text = await self._call(api_key, model, body)
+                if validate is not None:
+                    try:
+                        validate(text)
+                    except ValueError as e:
+                        raise _RouteFailure(f"Unusable response: {e}")
+            except _RouteFailure as e:
+                self._record_failure(route, stats, e)
+                last_error = e
+                continue
+
+            latency = time.monotonic() - started
+            stats.record_success(latency)
+            return LLMResponse(text=text, model=model, latency=latency)
+
+        raise LLMUnavailable(f"All Gemini routes failed: {last_error}")
+
+    def _plan(self, keys: Sequence[str], models: Sequence[str]) -> List[Tuple[str, str, Route]]:
+        """Healthy routes, fastest expected first; untried routes keep caller order."""
+        now = time.monotonic()
+        ranked = []
+        preference = 0
+        for api_key in keys:
+            key_id = digest_key(api_key)[:12]
+            for model in models:
+                preference += 1
+                route = (key_id, model)
+                stats = self._stats.get(route)
+                if self._key_cooling(key_id) or (stats and stats.cooldown_until > now):
+                    continue
+                ranked.append((_rank(stats, preference), api_key, model, route))
+
+        ranked.sort(key=lambda item: item[0])
+        return [(api_key, model, route) for _, api_key, model, route in ranked]
+
+    def _key_cooling(self, key_id: str) -> bool:
+        return self._key_cooldowns.get(key_id, 0.0) > time.monotonic()
+
+    def _record_failure(self, route: Route, stats: RouteStats, failure: _RouteFailure) -> None:
+        stats.record_failure(str(failure))
+        key_id, model = route
+
+        if failure.kind == "key":
+            # Invalid or revoked key: every model behind it is unusable
+            self._key_cooldowns[key_id] = time.monotonic() + settings.llm_cooldown_max
+            logger.warning(f"Gemini key {key_id} disabled for {settings.llm_cooldown_max:.0f}s: {failure}")
+            return
+
+        if failure.kind == "quota":
+            stats.quota_errors += 1
+            cooldown = failure.retry_after or settings.llm_quota_cooldown
+        elif failure.kind == "model":
+            cooldown = settings.llm_cooldown_max
+        elif stats.consecutive_failures >= settings.llm_failure_threshold:
+            cooldown = min(settings.llm_cooldown_base * (2 ** stats.trips), settings.llm_cooldown_max)
+        else:
+            return
+
+        stats.cool_down(cooldown)
+        logger.warning(f"Gemini route {model} ({key_id}) cooling down for {cooldown:.0f}s: {failure}")
+
+    async def _call(self, api_key: str, model: str, body: Dict[str, Any]) -> str:
+        client = get_http_client("gemini")
+        model_id = model[len("models/"):] if model.startswith("models/") else model
+        url = GEMINI_API_URL.format(model=model_id)
+        try:
+            response = await client.post(url, json=body, headers={"x-goog-api-key": api_key})
+        except httpx.HTTPError as e:
+            raise _RouteFailure(f"{type(e).__name__}: {e}")
+
+        if response.status_code != 200:
+            raise _classify_error(response)
+
+        data = response.json()
+        candidates = data.get("candidates") or []
+        parts = (candidates[0].get("content") or {}).get("parts", []) if candidates else []
+        text = "".join(part.get("text", "") for part in parts).strip()
+        if text:
+            return text
+
+        block_reason = (data.get("promptFeedback") or {}).get("blockReason")
+        if block_reason:
+            raise LLMRequestError(f"Prompt blocked: {block_reason}")
+        finish_reason = candidates[0].get("finishReason") if candidates else None
+        raise _RouteFailure(f"Empty response (finishReason={finish_reason})")
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Per-route health, for the admin dashboard and debugging."""
+        now = time.monotonic()
+        rows = []
+        for (key_id, model), stats in self._stats.items():
+            cooldown = max(stats.cooldown_until, self._key_cooldowns.get(key_id, 0.0)) - now
+            p50 = stats.percentile(0.5)
+            p95 = stats.percentile(0.95)
+            rows.append({
+                "key": key_id,
+                "model": model,
+                "requests": stats.requests,
+                "success_rate": round(stats.success_rate, 3),
+                "p50_ms": round(p50 * 1000) if p50 is not None else None,
+                "p95_ms": round(p95 * 1000) if p95 is not None else None,
+                "quota_errors": stats.quota_errors,
+                "cooldown_seconds": round(cooldown, 1) if cooldown > 0 else 0,
+                "last_error": stats.last_error,
+            })
+        return rows
+
+
+def _rank(stats: Optional[RouteStats], preference: int) -> Tuple[int, float]:
+    """Sort key: proven routes by expected latency, then untried, then flaky ones."""
+    if stats is None or not stats.outcomes:
+        return (1, preference)
+    p50 = stats.percentile(0.5)
+    if p50 is None:
+        return (2, preference)
+    # Penalize unreliable routes: expected time to a successful answer
+    return (0, p50 / max(stats.success_rate, 0.05))
+
+
+def _classify_error(response: httpx.Response) -> Exception:
+    try:
+        error = response.json().get("error", {})
+    except ValueError:
+        error = {}
+    message = f"HTTP {response.status_code}: {error.get('message') or response.text[:200]}"
+    details = error.get("details") or []
+    reasons = {d.get("reason") for d in details if isinstance(d, dict)}
+
+    if response.status_code == 429:
+        retry_after = None
+        for detail in details:
+            delay = detail.get("retryDelay") if isinstance(detail, dict) else None
+            match = re.match(r"([\d.]+)s", delay or "")
+            if match:
+                retry_after = float(match.group(1))
+        return _RouteFailure(message, kind="quota", retry_after=retry_after)
+    if response.status_code in (401, 403) or "API_KEY_INVALID" in reasons:
+        return _RouteFailure(message, kind="key")
+    if response.status_code == 404:
+        return _RouteFailure(message, kind="model")
+    if response.status_code == 400:
+        return LLMRequestError(message)
+    return _RouteFailure(message)
+
+
+def _to_part(item: Any) -> Dict[str, Any]:
+    """Convert a prompt item to a REST ``Part``."""
+    if isinstance(item, str):
+        return {"text": item}
+    if isinstance(item, (bytes, bytearray)):
+        item = {"mime_type": _sniff_image_type(bytes(item)), "data": item}
+    if isinstance(item, dict):
+        if "text" in item or "inline_data" in item:
+            return item
+        data = item["data"]
+        if isinstance(data, (bytes, bytearray)):
+            data = base64.b64encode(data).decode("ascii")
+        return {"inline_data": {"mime_type": item["mime_type"], "data": data}}
+    raise TypeError(f"Unsupported prompt part: {type(item).__name__}")
+
+
+def _sniff_image_type(data: bytes) -> str:
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data.startswith(b"GIF8"):
+        return "image/gif"
+    return "image/jpeg"
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split("_")
+    return head + "".join(word.title() for word in rest)
+
+
+def _unique(keys: Sequence[Optional[str]]) -> List[str]:
+    seen: List[str] = []
+    for key in keys:
+        if key and key not in seen:
+            seen.append(key)
+    return seen
+
+
+# Singleton instance
+llm_router = LLMRouter()
@@ -0,0 +1,272 @@
+"""Columnar in-process metrics store.
+
+Holds each user's posts and metric snapshots as typed NumPy arrays so the
+analytics engine can aggregate without re-downloading rows or building
+DataFrames on every request. Data is loaded incrementally by ``collected_at``
+and users are evicted least-recently-used once the store is full.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import get_settings
+from app.core.db import get_db, stream_rows
+
+settings = get_settings()
+
+PLATFORMS: Tuple[str, ...] = ("instagram", "youtube", "twitter", "linkedin", "facebook")
+CONTENT_TYPES: Tuple[str, ...] = ("image", "video", "reel", "carousel", "story", "short", "post", "thread")
+
+COUNTER_COLUMNS: Tuple[str, ...] = ("likes", "comments", "shares", "reach", "impressions")
+
+# Sentinel for rows without a parseable timestamp
+MISSING_TS = np.iinfo(np.int64).min
+
+_EPOCH = pd.Timestamp(0, tz="UTC")
+
+
+def _to_epoch_seconds(values: List[Optional[str]]) -> np.ndarray:
+    """Convert ISO-8601 timestamps from PostgREST into int64 epoch seconds."""
+    if not values:
+        return np.empty(0, dtype=np.int64)
+    parsed = pd.to_datetime(pd.Series(values, dtype="object"), utc=True, errors="coerce", format="ISO8601")
+    seconds = (parsed - _EPOCH) // pd.Timedelta(seconds=1)
+    return seconds.fillna(MISSING_TS).to_numpy(dtype=np.int64)
+
+
+def _latest(current: Optional[pd.Timestamp], values: List[Optional[str]]) -> Optional[pd.Timestamp]:
+    """Newest of ``current`` and the parsed ``values`` (compared as UTC instants, not strings)."""
+    parsed = pd.to_datetime(pd.Series(values, dtype="object"), utc=True, errors="coerce", format="ISO8601").max()
+    if pd.isna(parsed):
+        return current
+    return parsed if current is None or parsed > current else current
+
+
+def _encode(values: List[Optional[str]], vocabulary: Tuple[str, ...]) -> np.ndarray:
+    """Encode categorical strings as int8 codes (-1 for unknown)."""
+    lookup = {name: idx for idx, name in enumerate(vocabulary)}
+    return np.fromiter((lookup.get(v, -1) for v in values), dtype=np.int8, count=len(values))
+
+
+class UserMetrics:
+    """Typed column arrays for one user's posts and metric snapshots."""
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+
+        # Posts (one row per post)
+        self.post_ids: List[str] = []
+        self.post_index: Dict[str, int] = {}
+        self.post_platform = np.empty(0, dtype=np.int8)
+        self.post_content_type = np.empty(0, dtype=np.int8)
+        self.post_posted_at = np.empty(0, dtype=np.int64)
+
+        # Metrics (one row per snapshot)
+        self.metric_post = np.empty(0, dtype=np.int32)
+        self.counters: Dict[str, np.ndarray] = {c: np.empty(0, dtype=np.int32) for c in COUNTER_COLUMNS}
+        self.engagement_rate = np.empty(0, dtype=np.float32)
+        self.collected_at = np.empty(0, dtype=np.int64)
+
+        # Incremental load watermarks (timezone-aware UTC)
+        self.posts_watermark: Optional[pd.Timestamp] = None
+        self.metrics_watermark: Optional[pd.Timestamp] = None
+        # IDs of snapshots inside the lag window, which the next refresh reads again
+        self.recent_metric_ids: Dict[str, int] = {}
+        self.loaded_at = time.monotonic()
+        self.refreshed_at: Optional[float] = None
+        self.lock = asyncio.Lock()
+
+    @property
+    def num_posts(self) -> int:
+        return len(self.post_ids)
+
+    @property
+    def num_metrics(self) -> int:
+        return len(self.metric_post)
+
+    def append_posts(self, rows: List[Dict[str, Any]]) -> List[str]:
+        """Append new post rows, ignoring posts that are already known.
+
+        Returns:
+            IDs of the posts that were added
+        """
+        rows = [r for r in rows if r.get("id") and r["id"] not in self.post_index]
+        if not rows:
+            return []
+
+        start = len(self.post_ids)
+        for offset, row in enumerate(rows):
+            self.post_ids.append(row["id"])
+            self.post_index[row["id"]] = start + offset
+
+        self.post_platform = np.concatenate([self.post_platform, _encode([r.get("platform") for r in rows], PLATFORMS)])
+        self.post_content_type = np.concatenate([
+            self.post_content_type, _encode([r.get("content_type") for r in rows], CONTENT_TYPES)
+        ])
+        self.post_posted_at = np.concatenate([self.post_posted_at, _to_epoch_seconds([r.get("posted_at") for r in rows])])
+
+        self.posts_watermark = _latest(self.posts_watermark, [r.get("created_at") for r in rows])
+        return [r["id"] for r in rows]
+
+    def append_metrics(self, rows: List[Dict[str, Any]]) -> None:
+        """Append metric snapshots for posts that are already known, skipping ones already loaded."""
+        fresh = []
+        for r in rows:
+            if r.get("post_id") in self.post_index and r.get("id") not in self.recent_metric_ids:
+                self.recent_metric_ids[r.get("id")] = 0
+                fresh.append(r)
+        rows = fresh
+        if not rows:
+            return
+
+        n = len(rows)
+        self.metric_post = np.concatenate([
+            self.metric_post,
+            np.fromiter((self.post_index[r["post_id"]] for r in rows), dtype=np.int32, count=n),
+        ])
+        for column in COUNTER_COLUMNS:
+            self.counters[column] = np.concatenate([
+                self.counters[column],
+                np.fromiter((r.get(column) or 0 for r in rows), dtype=np.int32, count=n),
+            ])
+        self.engagement_rate = np.concatenate([
+            self.engagement_rate,
+            np.fromiter((float(r.get("engagement_rate") or 0) for r in rows), dtype=np.float32, count=n),
+        ])
+        collected_at = _to_epoch_seconds([r.get("collected_at") for r in rows])
+        self.collected_at = np.concatenate([self.collected_at, collected_at])
+        self.recent_metric_ids.update(zip((r.get("id") for r in rows), collected_at.tolist()))
+
+        self.metrics_watermark = _latest(self.metrics_watermark, [r.get("collected_at") for r in rows])
+
+    def forget_metric_ids(self, before_epoch: int) -> None:
+        """Stop tracking snapshot IDs that are older than the lag window."""
+        self.recent_metric_ids = {k: v for k, v in self.recent_metric_ids.items() if v >= before_epoch}
+
+    def metrics_since(self, since_epoch: int) -> np.ndarray:
+        """Boolean mask of metric rows collected at or after ``since_epoch``."""
+        return self.collected_at >= since_epoch
+
+
+class MetricsStore:
+    """
+    Size-bounded LRU of per-user columnar metrics.
+
+    Refreshes re-read the last ``watermark_lag`` seconds before each watermark
+    (deduplicated by ID) so rows committed late with an earlier timestamp are
+    still picked up. Posts and snapshots are only ever appended; edits and
+    deletions show up when the entry is rebuilt every ``reload_seconds``.
+    """
+
+    POST_COLUMNS = "id, platform, content_type, posted_at, created_at"
+    METRIC_COLUMNS = "post_id, likes, comments, shares, reach, impressions, engagement_rate, collected_at"
+
+    def __init__(
+        self,
+        max_users: int = 256,
+        refresh_seconds: float = 60.0,
+        watermark_lag: float = 300.0,
+        reload_seconds: float = 3600.0,
+    ):
+        self.max_users = max_users
+        self.refresh_seconds = refresh_seconds
+        self.watermark_lag = watermark_lag
+        self.reload_seconds = reload_seconds
+        self._users: "OrderedDict[str, UserMetrics]" = OrderedDict()
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._users
+
+    def invalidate(self, user_id: Optional[str] = None) -> None:
+        """Drop one user's columns, or everything when no user is given."""
+        if user_id is None:
+            self._users.clear()
+        else:
+            self._users.pop(user_id, None)
+
+    async def get(self, user_id: str) -> UserMetrics:
+        """Return the user's columns, loading anything newer than the last refresh.
+
+        Concurrent callers for the same user share a single refresh.
+        """
+        entry = self._users.get(user_id)
+        if entry is None or time.monotonic() - entry.loaded_at >= self.reload_seconds:
+            # Full reload picks up edited and deleted posts
+            entry = UserMetrics(user_id)
+            self._users[user_id] = entry
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        self._users.move_to_end(user_id)
+
+        if self._is_stale(entry):
+            async with entry.lock:
+                if self._is_stale(entry):
+                    await self._refresh(entry)
+        return entry
+
+    def _is_stale(self, entry: UserMetrics) -> bool:
+        return entry.refreshed_at is None or time.monotonic() - entry.refreshed_at >= self.refresh_seconds
+
+    async def _refresh(self, entry: UserMetrics) -> None:
+        """Fetch posts and metrics newer than the stored watermarks, page by page."""
+        # Watermarks move as batches are appended; page against the starting values,
+        # lagged so late-committed rows aren't missed (duplicates are skipped by ID)
+        lag = pd.Timedelta(seconds=self.watermark_lag)
+        posts_watermark = entry.posts_watermark - lag if entry.posts_watermark is not None else None
+        metrics_watermark = entry.metrics_watermark - lag if entry.metrics_watermark is not None else None
+
+        # Posts load alongside the first metrics page; snapshots are matched once they're known
+        posts_loaded = asyncio.ensure_future(self._load_posts(entry, posts_watermark))
+        try:
+            async for rows in stream_rows(lambda: self._metrics_query(entry.user_id, metrics_watermark)):
+                await posts_loaded
+                entry.append_metrics(rows)
+            new_ids = await posts_loaded
+        finally:
+            if not posts_loaded.done():
+                posts_loaded.cancel()
+
+        if new_ids and metrics_watermark is not None:
+            # Posts we have never seen may carry back-filled snapshots older than the watermark
+            backfill = stream_rows(
+                lambda: get_db().table("metrics").select(f"id, {self.METRIC_COLUMNS}").lte(
+                    "collected_at", metrics_watermark.isoformat()
+                ),
+                in_filter=("post_id", new_ids),
+            )
+            async for rows in backfill:
+                entry.append_metrics(rows)
+
+        if entry.metrics_watermark is not None:
+            entry.forget_metric_ids(int((entry.metrics_watermark - lag - _EPOCH) // pd.Timedelta(seconds=1)) - 1)
+        entry.refreshed_at = time.monotonic()
+
+    async def _load_posts(self, entry: UserMetrics, watermark: Optional[pd.Timestamp]) -> List[str]:
+        """Append the user's posts created after ``watermark``; returns the new IDs."""
+        def query():
+            posts_query = get_db().table("posts").select(self.POST_COLUMNS).eq("user_id", entry.user_id)
+            return posts_query.gt("created_at", watermark.isoformat()) if watermark is not None else posts_query
+
+        new_ids: List[str] = []
+        async for rows in stream_rows(query, keyset=("created_at", "id")):
+            new_ids.extend(entry.append_posts(rows))
+        return new_ids
+
+    def _metrics_query(self, user_id: str, watermark: Optional[pd.Timestamp]) -> Any:
+        # Filter metrics through the posts relation so it can run alongside the posts load
+        metrics_query = get_db().table("metrics").select(
+            f"id, {self.METRIC_COLUMNS}, posts!inner()"
+        ).eq("posts.user_id", user_id)
+        return metrics_query.gt("collected_at", watermark.isoformat()) if watermark is not None else metrics_query
+
+# Singleton instance
+metrics_store = MetricsStore(
+    max_users=settings.metrics_store_max_users,
+    refresh_seconds=settings.metrics_store_refresh_seconds,
+    watermark_lag=settings.metrics_store_watermark_lag,
+    reload_seconds=settings.metrics_store_reload_seconds,
+)
@@ -6,7 +6,7 @@ import io
 import csv
 from typing import Dict, Any, List, Optional
 from datetime import datetime
-from app.core.supabase import get_supabase
+from app.core.db import get_db
 from app.services.mock_data import (
     get_mock_analytics_overview,
     get_mock_platform_metrics,
@@ -20,7 +20,7 @@ class ReportGenerator:
     
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.supabase = get_supabase()
+        self.supabase = get_db()
     
     async def generate_summary(self, days: int = 30) -> Dict[str, Any]:
         """Generate a summary report."""
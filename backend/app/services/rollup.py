@@ -0,0 +1,234 @@
+"""Daily metrics rollups.
+
+The scheduler periodically folds newly collected ``metrics`` rows into the
+``metrics_rollup_daily`` table (see migration 003). Overview, platform and
+growth queries then read at most one pre-summed row per platform per day.
+
+Folding needs the service key. Until the fold watermark is recent (no key,
+migration not applied, job not run yet), summaries are computed from the raw
+metrics in the metrics store instead.
+"""
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+import logging
+
+import numpy as np
+import pandas as pd
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.db import get_db, get_db_admin, run_query, stream_rows
+from app.services.metrics_store import metrics_store, COUNTER_COLUMNS, PLATFORMS
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+ROLLUP_COLUMNS = "platform, day, likes, comments, shares, reach, impressions, engagement_rate_sum, samples"
+
+# Growth reported without enough history (matches AnalyticsEngine)
+DEFAULT_GROWTH_RATE = 12.5
+
+# Seconds to reuse the last fold-watermark check
+WATERMARK_CHECK_TTL = 60.0
+
+_watermark_checks = TTLCache(max_entries=1, ttl=WATERMARK_CHECK_TTL)
+
+
+async def run_metrics_rollup() -> int:
+    """
+    Fold metrics collected since the last run into the daily buckets.
+
+    Returns:
+        Number of buckets inserted or updated
+    """
+    supabase = get_db_admin()
+    if supabase is None:
+        # fold_metrics_rollup is revoked from anon; the scheduler skips the job without a key
+        logger.warning("Metrics rollup skipped: SUPABASE_SERVICE_KEY is not set")
+        return 0
+
+    try:
+        response = await run_query(supabase.rpc("fold_metrics_rollup", {}))
+        buckets = response.data or 0
+        logger.info(f"Metrics rollup folded {buckets} daily buckets")
+        return buckets
+    except Exception as e:
+        logger.error(f"Error running metrics rollup: {e}")
+        return 0
+
+
+async def rollups_current() -> bool:
+    """True if the last fold is recent enough (metrics_rollup_max_lag) to trust the rollups."""
+    current = _watermark_checks.get("daily")
+    if current is not None:
+        return current
+
+    try:
+        response = await run_query(
+            get_db().table("metrics_rollup_state").select("last_collected_at").eq("id", "daily").limit(1)
+        )
+        rows = response.data or []
+        # '-infinity' (never folded) fails to parse and counts as stale
+        watermark = pd.to_datetime(rows[0]["last_collected_at"], utc=True, format="ISO8601") if rows else None
+    except Exception as e:
+        logger.warning(f"Could not read the metrics rollup watermark: {e}")
+        watermark = None
+
+    lag = (datetime.now(timezone.utc) - watermark).total_seconds() if watermark else None
+    current = lag is not None and lag <= settings.metrics_rollup_max_lag
+    if not current:
+        logger.info("Metrics rollups are missing or stale, summarizing raw metrics")
+    _watermark_checks.set("daily", current)
+    return current
+
+
+async def get_metrics_summary(
+    user_id: str,
+    days: int = 30,
+    platform: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Overview totals for the last ``days`` days (see ``summarize_rollups``).
+
+    Reads the rollups when they are current and falls back to the raw
+    metrics otherwise, or when the user has no rollup rows.
+
+    Returns:
+        The summary, or None if the user has no metrics in the window
+    """
+    if await rollups_current():
+        rows = await get_daily_rollups(user_id, days, platform=platform)
+        if rows:
+            return summarize_rollups(rows, days)
+    return await summarize_raw_metrics(user_id, days, platform=platform)
+
+
+async def summarize_raw_metrics(
+    user_id: str,
+    days: int = 30,
+    platform: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """``summarize_rollups`` computed from the metrics store (None if no metrics)."""
+    if platform is not None and platform not in PLATFORMS:
+        return None
+
+    data = await metrics_store.get(user_id)
+    now = datetime.now(timezone.utc)
+    mask = data.metrics_since(int((now - timedelta(days=days)).timestamp()))
+    if platform is not None:
+        mask &= data.post_platform[data.metric_post] == PLATFORMS.index(platform)
+    if not mask.any():
+        return None
+
+    totals = {c: int(data.counters[c][mask].sum(dtype=np.int64)) for c in COUNTER_COLUMNS}
+
+    # Same halves of the window as the rollup growth
+    recent = data.collected_at[mask] >= int((now - timedelta(days=days / 2)).timestamp())
+    engagement = data.engagement_rate[mask]
+    growth_rate = _growth(
+        float(engagement[recent].sum()), int(recent.sum()),
+        float(engagement[~recent].sum()), int((~recent).sum()),
+    )
+    return _summary(totals, growth_rate)
+
+
+async def get_daily_rollups(
+    user_id: str,
+    days: int = 30,
+    platform: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Fetch a user's daily rollup rows for the last ``days`` days.
+
+    Args:
+        user_id: Supabase auth user ID
+        days: Number of days to look back
+        platform: Restrict to one platform (optional)
+
+    Returns:
+        Rollup rows ordered by day (at most one per platform per day)
+    """
+    since_day = (datetime.utcnow().date() - timedelta(days=days)).isoformat()
+
+    def query():
+        rollups = get_db().table("metrics_rollup_daily").select(ROLLUP_COLUMNS).eq(
+            "user_id", user_id
+        ).gte("day", since_day)
+        return rollups.eq("platform", platform) if platform else rollups
+
+    # Long windows exceed PostgREST's max-rows, so page by (day, platform)
+    rows: List[Dict[str, Any]] = []
+    async for batch in stream_rows(query, keyset=("day", "platform")):
+        rows.extend(batch)
+    return rows
+
+
+def summarize_rollups(rows: List[Dict[str, Any]], days: int = 30) -> Dict[str, Any]:
+    """
+    Sum rollup rows into overview totals.
+
+    Growth compares the average engagement rate of the recent half of the
+    window against the older half.
+    """
+    totals = {
+        "likes": 0,
+        "comments": 0,
+        "shares": 0,
+        "reach": 0,
+        "impressions": 0,
+    }
+    for row in rows:
+        for column in totals:
+            totals[column] += row.get(column) or 0
+
+    return _summary(totals, _growth_from_rollups(rows, days))
+
+
+def _summary(totals: Dict[str, int], growth_rate: float) -> Dict[str, Any]:
+    engagement_rate = 0.0
+    if totals["reach"] > 0:
+        engagement_rate = ((totals["likes"] + totals["comments"] + totals["shares"]) / totals["reach"]) * 100
+
+    return {
+        "total_impressions": totals["impressions"],
+        "total_likes": totals["likes"],
+        "total_comments": totals["comments"],
+        "total_shares": totals["shares"],
+        "total_reach": totals["reach"],
+        "engagement_rate": round(engagement_rate, 2),
+        "growth_rate": growth_rate,
+    }
+
+
+def _growth_from_rollups(rows: List[Dict[str, Any]], days: int) -> float:
+    """Percent change in average engagement rate between the two halves of the window."""
+    mid_point = datetime.utcnow().date() - timedelta(days=days / 2)
+
+    recent_sum = recent_samples = older_sum = older_samples = 0
+    for row in rows:
+        day = row.get("day")
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        if day is None:
+            continue
+        if day >= mid_point:
+            recent_sum += row.get("engagement_rate_sum") or 0
+            recent_samples += row.get("samples") or 0
+        else:
+            older_sum += row.get("engagement_rate_sum") or 0
+            older_samples += row.get("samples") or 0
+
+    return _growth(recent_sum, recent_samples, older_sum, older_samples)
+
+
+def _growth(recent_sum: float, recent_samples: int, older_sum: float, older_samples: int) -> float:
+    """Percent change from the older to the recent average engagement rate."""
+    if not recent_samples or not older_samples:
+        return DEFAULT_GROWTH_RATE
+
+    recent = recent_sum / recent_samples
+    older = older_sum / older_samples
+    if older > 0:
+        return round(((recent - older) / older) * 100, 2)
+    return DEFAULT_GROWTH_RATE
@@ -8,10 +8,13 @@ from datetime import datetime
 from typing import Optional
 import logging
 
-from app.core.supabase import get_supabase
+from app.core.config import get_settings
+from app.core.db import get_db, run_query
 
 logger = logging.getLogger(__name__)
 
+settings = get_settings()
+
 # Global scheduler instance
 scheduler: Optional[AsyncIOScheduler] = None
 
@@ -21,31 +24,15 @@ async def sync_all_platforms():
     Sync data for all connected platforms.
     
     This job runs periodically to fetch fresh data from all social APIs.
+    Accounts are synced by a bounded worker pool with per-platform rate
+    limits; an interrupted cycle resumes from its checkpoint.
     """
     logger.info(f"[{datetime.now()}] Starting scheduled sync for all platforms...")
     
-    supabase = get_supabase()
+    from .sync_executor import get_sync_executor
     
     try:
-        # Get all connected platforms
-        response = supabase.table("platforms").select("*").execute()
-        
-        if not response.data:
-            logger.info("No connected platforms found")
-            return
-        
-        for platform in response.data:
-            try:
-                await sync_platform(
-                    user_id=platform["user_id"],
-                    platform_name=platform["platform_name"],
-                    access_token=platform["access_token"]
-                )
-            except Exception as e:
-                logger.error(f"Error syncing {platform['platform_name']}: {e}")
-        
-        logger.info(f"Sync complete for {len(response.data)} platforms")
-        
+        await get_sync_executor().run_cycle()
     except Exception as e:
         logger.error(f"Error in scheduled sync: {e}")
 
@@ -68,10 +55,10 @@ async def sync_platform(user_id: str, platform_name: str, access_token: str):
         return
     
     # Update last_synced_at
-    supabase = get_supabase()
-    supabase.table("platforms").update({
+    supabase = get_db()
+    await run_query(supabase.table("platforms").update({
         "last_synced_at": datetime.now().isoformat()
-    }).eq("user_id", user_id).eq("platform_name", platform_name).execute()
+    }).eq("user_id", user_id).eq("platform_name", platform_name))
     
     logger.info(f"Sync complete for {platform_name}: {result}")
 
@@ -88,12 +75,28 @@ def init_scheduler():
     # Add jobs
     scheduler.add_job(
         sync_all_platforms,
-        trigger=IntervalTrigger(hours=6),  # Sync every 6 hours
+        trigger=IntervalTrigger(hours=settings.sync_interval_hours),  # Sync every 6 hours by default
         id="sync_all_platforms",
         name="Sync all connected social platforms",
-        replace_existing=True
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,  # A long cycle must not queue up missed runs
     )
     
+    if settings.supabase_service_key:
+        from .rollup import run_metrics_rollup
+        scheduler.add_job(
+            run_metrics_rollup,
+            trigger=IntervalTrigger(hours=1),  # Fold new metrics into daily buckets hourly
+            id="metrics_rollup",
+            name="Fold new metrics into daily rollups",
+            replace_existing=True,
+            next_run_time=datetime.now(),  # Catch up immediately on startup
+        )
+    else:
+        # fold_metrics_rollup is service-role only; analytics read raw metrics instead
+        logger.warning("SUPABASE_SERVICE_KEY not set: metrics rollup job disabled")
+    
     logger.info("Background scheduler initialized")
     return scheduler
 
@@ -0,0 +1,144 @@
+"""Content-addressed disk cache for synthesized speech.
+
+Audio is stored under a SHA-256 of (text, voice, rate) in a two-level
+sharded directory and evicted least-recently-used once the total size goes
+over the configured budget. Writes are atomic (temp file + rename), so a
+reader never sees a partial file. Hits are returned as open file handles:
+the descriptor keeps the audio readable while it streams, even if an
+eviction unlinks the file meanwhile.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from collections import OrderedDict
+from typing import BinaryIO, Optional
+
+from app.core.config import get_settings, resolve_path
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+AUDIO_SUFFIX = ".mp3"
+
+
+def speech_key(text: str, voice: str, rate: int) -> str:
+    """Cache key for one rendering of ``text``."""
+    raw = f"{text}\x1f{voice}\x1f{rate}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SpeechCache:
+    """Disk-backed LRU of audio files, bounded by total bytes."""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, oldest first
+        self._loaded = False
+        self._load_lock = asyncio.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}{AUDIO_SUFFIX}")
+
+    async def load(self) -> None:
+        """Index the cache directory off the event loop (idempotent; run at startup)."""
+        async with self._load_lock:
+            if not self._loaded:
+                await asyncio.to_thread(self._load)
+
+    def _load(self) -> None:
+        """Rebuild the index from disk, oldest access first. Blocking."""
+        self._loaded = True
+        entries = []
+        if os.path.isdir(self.directory):
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    path = os.path.join(root, name)
+                    if not name.endswith(AUDIO_SUFFIX):
+                        # Leftover temp file from an interrupted write
+                        _remove(path)
+                        continue
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, name[:-len(AUDIO_SUFFIX)], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self.total_bytes += size
+        self._evict()
+
+    async def get(self, key: str) -> Optional[BinaryIO]:
+        """Open binary handle on the cached audio for ``key`` (caller closes it), or None on a miss."""
+        if not self._loaded:
+            await self.load()
+        if key not in self._index:
+            return None
+
+        audio = await asyncio.to_thread(self._open, self._path(key))
+        if audio is None:
+            # Removed behind our back (or evicted meanwhile)
+            if key in self._index:
+                self.total_bytes -= self._index.pop(key)
+            return None
+        if key in self._index:
+            self._index.move_to_end(key)
+        return audio
+
+    @staticmethod
+    def _open(path: str) -> Optional[BinaryIO]:
+        try:
+            # mtime doubles as the access time so LRU order survives restarts
+            os.utime(path)
+            return open(path, "rb")
+        except OSError:
+            return None
+
+    def put(self, key: str, audio: bytes) -> str:
+        """Store audio atomically and return its path. Blocking; run off the event loop."""
+        if not self._loaded:
+            self._load()
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except Exception:
+            _remove(tmp_path)
+            raise
+
+        self.total_bytes -= self._index.pop(key, 0)
+        self._index[key] = len(audio)
+        self.total_bytes += len(audio)
+        self._evict(keep=key)
+        return path
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        while self.total_bytes > self.max_bytes and self._index:
+            key = next(iter(self._index))
+            if key == keep:
+                break
+            self.total_bytes -= self._index.pop(key)
+            _remove(self._path(key))
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+# Singleton instance
+speech_cache = SpeechCache(
+    directory=resolve_path(settings.speech_cache_dir),
+    max_bytes=settings.speech_cache_max_mb * 1024 * 1024,
+)
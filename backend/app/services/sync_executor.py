@@ -0,0 +1,295 @@
+"""Bounded-concurrency executor for platform sync cycles.
+
+A fixed pool of workers drains a queue of connected accounts. Calls to each
+upstream API are paced by a token bucket, failed syncs are retried with
+jittered exponential backoff, and progress is checkpointed to disk so an
+interrupted cycle resumes where it stopped instead of starting over.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+import httpx
+
+from app.core.config import get_settings, resolve_path
+from app.core.db import QueryTimeout, get_db, run_query
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+# Upstream API calls made by one sync of each platform (used to charge the bucket)
+SYNC_CALL_COST: Dict[str, int] = {
+    "instagram": 12,  # profile + media list + up to 10 insights
+    "youtube": 3,  # uploads playlist lookup + playlist items + video stats
+}
+
+# HTTP statuses worth retrying (timeouts, rate limits, server errors)
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+# Network failures and timeouts; anything else (bad data, bugs) fails immediately
+RETRYABLE_ERRORS = (httpx.TransportError, asyncio.TimeoutError, QueryTimeout)
+
+PLATFORM_PAGE_SIZE = 1000
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> None:
+        """Wait until ``tokens`` are available, then take them."""
+        # Requests larger than the bucket would never fit; cap them at a full bucket
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+class SyncCheckpoint:
+    """JSON file recording which accounts the current cycle has finished."""
+
+    def __init__(self, path: str, max_age: float):
+        self.path = path
+        self.max_age = max_age  # Seconds; older checkpoints are discarded instead of resumed
+        self.cycle_id: str = ""
+        self.started_at: str = ""
+        self.done: Set[str] = set()
+        self.failed: Set[str] = set()
+        self._dirty = 0
+
+    def load(self) -> bool:
+        """Load an unfinished cycle. Returns True when there is one to resume."""
+        try:
+            if os.path.exists(self.path):
+                with open(self.path, "r") as f:
+                    data = json.load(f)
+                if self._expired(data.get("started_at", "")):
+                    # A newer cycle is due anyway; don't skip accounts on stale progress
+                    logger.info(f"Discarding sync checkpoint from {data.get('started_at')}")
+                    self.clear()
+                    return False
+                self.cycle_id = data.get("cycle_id", "")
+                self.started_at = data.get("started_at", "")
+                self.done = set(data.get("done", []))
+                self.failed = set(data.get("failed", []))
+                return bool(self.cycle_id)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable sync checkpoint {self.path}: {e}")
+        return False
+
+    def _expired(self, started_at: str) -> bool:
+        try:
+            started = datetime.fromisoformat(started_at)
+        except (TypeError, ValueError):
+            return True
+        return (datetime.now() - started).total_seconds() > self.max_age
+
+    def start(self) -> None:
+        """Begin a fresh cycle."""
+        self.cycle_id = uuid.uuid4().hex
+        self.started_at = datetime.now().isoformat()
+        self.done = set()
+        self.failed = set()
+        self.save()
+
+    def is_finished(self, key: str) -> bool:
+        return key in self.done or key in self.failed
+
+    def record(self, key: str, ok: bool, flush_every: int = 25) -> None:
+        (self.done if ok else self.failed).add(key)
+        self._dirty += 1
+        if self._dirty >= flush_every:
+            self.save()
+
+    def save(self) -> None:
+        """Write the checkpoint atomically."""
+        data = {
+            "cycle_id": self.cycle_id,
+            "started_at": self.started_at,
+            "done": sorted(self.done),
+            "failed": sorted(self.failed),
+        }
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = 0
+        except Exception as e:
+            logger.error(f"Error saving sync checkpoint: {e}")
+
+    def clear(self) -> None:
+        """Remove the checkpoint once the cycle is complete."""
+        try:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        except Exception as e:
+            logger.error(f"Error removing sync checkpoint: {e}")
+
+
+def _is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS
+    return isinstance(error, RETRYABLE_ERRORS)
+
+
+class SyncExecutor:
+    """Runs one sync cycle over all connected platforms with a worker pool."""
+
+    def __init__(
+        self,
+        sync_fn: Callable[[str, str, str], Awaitable[Any]],
+        workers: int = 8,
+        max_attempts: int = 3,
+        backoff_base: float = 2.0,
+        backoff_max: float = 60.0,
+        checkpoint_path: str = "sync_checkpoint.json",
+        checkpoint_max_age: float = 6 * 3600,
+    ):
+        self.sync_fn = sync_fn
+        self.workers = max(workers, 1)
+        self.max_attempts = max(max_attempts, 1)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.checkpoint = SyncCheckpoint(resolve_path(checkpoint_path), checkpoint_max_age)
+        self.buckets: Dict[str, TokenBucket] = {
+            "instagram": TokenBucket(settings.instagram_sync_rate, settings.instagram_sync_burst),
+            "youtube": TokenBucket(settings.youtube_sync_rate, settings.youtube_sync_burst),
+        }
+        self._running = asyncio.Lock()
+
+    async def _load_platforms(self) -> List[Dict[str, Any]]:
+        """Fetch every connected account, paging past the PostgREST row limit."""
+        supabase = get_db()
+        rows: List[Dict[str, Any]] = []
+        start = 0
+        while True:
+            response = await run_query(
+                supabase.table("platforms").select(
+                    "id, user_id, platform_name, access_token"
+                ).order("id").range(start, start + PLATFORM_PAGE_SIZE - 1)
+            )
+            page = response.data or []
+            rows.extend(page)
+            if len(page) < PLATFORM_PAGE_SIZE:
+                return rows
+            start += PLATFORM_PAGE_SIZE
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for the given (1-based) attempt."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    async def _sync_one(self, platform: Dict[str, Any]) -> bool:
+        name = platform["platform_name"]
+        bucket = self.buckets.get(name)
+
+        for attempt in range(1, self.max_attempts + 1):
+            if bucket:
+                await bucket.acquire(SYNC_CALL_COST.get(name, 1))
+            try:
+                await self.sync_fn(platform["user_id"], name, platform["access_token"])
+                return True
+            except Exception as e:
+                if attempt == self.max_attempts or not _is_retryable(e):
+                    logger.error(f"Error syncing {name} for user {platform['user_id'][:8]}: {e}")
+                    return False
+                delay = self._backoff(attempt)
+                logger.warning(f"Retrying {name} sync in {delay:.1f}s (attempt {attempt}): {e}")
+                await asyncio.sleep(delay)
+        return False
+
+    async def _worker(self, queue: "asyncio.Queue[Dict[str, Any]]", stats: Dict[str, int]) -> None:
+        while True:
+            platform = await queue.get()
+            try:
+                ok = await self._sync_one(platform)
+                self.checkpoint.record(platform["id"], ok)
+                stats["synced" if ok else "failed"] += 1
+            finally:
+                queue.task_done()
+
+    async def run_cycle(self) -> Dict[str, Any]:
+        """
+        Sync every connected account, resuming an interrupted cycle if any.
+
+        Returns:
+            Counts of synced, failed and skipped accounts
+        """
+        if self._running.locked():
+            logger.info("Sync cycle already running, skipping")
+            return {"status": "skipped"}
+
+        async with self._running:
+            if self.checkpoint.load():
+                logger.info(
+                    f"Resuming sync cycle {self.checkpoint.cycle_id[:8]} "
+                    f"({len(self.checkpoint.done)} done, {len(self.checkpoint.failed)} failed)"
+                )
+            else:
+                self.checkpoint.start()
+
+            platforms = await self._load_platforms()
+            pending = [p for p in platforms if not self.checkpoint.is_finished(p["id"])]
+            stats = {"synced": 0, "failed": 0, "skipped": len(platforms) - len(pending)}
+
+            queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+            for platform in pending:
+                queue.put_nowait(platform)
+
+            workers = [
+                asyncio.create_task(self._worker(queue, stats))
+                for _ in range(min(self.workers, len(pending)))
+            ]
+            try:
+                await queue.join()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                # Persist progress even when the cycle is cancelled midway
+                self.checkpoint.save()
+
+            self.checkpoint.clear()
+            logger.info(f"Sync cycle complete: {stats}")
+            return stats
+
+
+_executor: Optional[SyncExecutor] = None
+
+
+def get_sync_executor() -> SyncExecutor:
+    """Get the shared sync executor."""
+    global _executor
+    if _executor is None:
+        from .scheduler import sync_platform
+        _executor = SyncExecutor(
+            sync_fn=sync_platform,
+            workers=settings.sync_workers,
+            max_attempts=settings.sync_max_attempts,
+            backoff_base=settings.sync_backoff_base,
+            backoff_max=settings.sync_backoff_max,
+            checkpoint_path=settings.sync_checkpoint_file,
+            checkpoint_max_age=settings.sync_interval_hours * 3600,
+        )
+    return _executor
@@ -0,0 +1,206 @@
+"""Pool of long-lived text-to-speech worker processes.
+
+Each worker runs ``generate_audio_file.py --worker`` with a pyttsx3 engine
+that stays initialized between requests. Requests and audio travel over the
+worker's stdin/stdout pipes, so the API process never touches the
+filesystem. The pool size bounds concurrent synthesis and a queue limit
+rejects work once too many requests are waiting. Dead workers are replaced
+in the background, retrying the spawn with backoff until it succeeds.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+from typing import List, Optional, Set
+
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+settings = get_settings()
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(__file__), "generate_audio_file.py")
+
+# Delay between attempts to replace a dead worker (seconds, doubled per failure)
+RESPAWN_BACKOFF_BASE = 1.0
+RESPAWN_BACKOFF_MAX = 30.0
+
+
+class TTSPoolBusy(Exception):
+    """Raised when too many speech requests are already waiting."""
+
+
+class _TTSWorker:
+    """One worker process and its pipe protocol."""
+
+    def __init__(self, proc: asyncio.subprocess.Process):
+        self.proc = proc
+        self.ready = False
+
+    @classmethod
+    async def spawn(cls) -> "_TTSWorker":
+        proc = await asyncio.create_subprocess_exec(
+            sys.executable, WORKER_SCRIPT, "--worker",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+        )
+        return cls(proc)
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.returncode is None
+
+    async def _read_header(self) -> dict:
+        line = await self.proc.stdout.readline()
+        if not line:
+            raise RuntimeError("TTS worker exited")
+        return json.loads(line)
+
+    async def synthesize(self, text: str, voice: str) -> bytes:
+        if not self.ready:
+            # First frame reports whether the engine came up
+            header = await self._read_header()
+            if not header.get("ready"):
+                logger.warning(f"TTS engine failed to start, retrying per request: {header.get('error')}")
+            self.ready = True
+
+        request = json.dumps({"text": text, "voice": voice}).encode("utf-8") + b"\n"
+        self.proc.stdin.write(request)
+        await self.proc.stdin.drain()
+
+        header = await self._read_header()
+        if not header.get("ok"):
+            raise RuntimeError(f"Speech synthesis failed: {header.get('error')}")
+        return await self.proc.stdout.readexactly(header["size"])
+
+    async def close(self, timeout: float = 2.0) -> None:
+        if not self.alive:
+            return
+        try:
+            self.proc.stdin.close()
+            await asyncio.wait_for(self.proc.wait(), timeout)
+        except Exception:
+            self.proc.kill()
+            await self.proc.wait()
+
+
+class TTSPool:
+    """Fixed-size pool of warm TTS workers with bounded waiting."""
+
+    def __init__(self, size: int = 2, queue_limit: int = 16, timeout: float = 30.0):
+        self.size = max(size, 1)
+        self.queue_limit = queue_limit
+        self.timeout = timeout
+        self._idle: Optional[asyncio.Queue] = None
+        self._workers: List[_TTSWorker] = []
+        self._waiting = 0
+        self._respawning: Set["asyncio.Task[None]"] = set()
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def waiting(self) -> int:
+        return self._waiting
+
+    async def start(self) -> None:
+        """Spawn the workers (idempotent)."""
+        async with self._start_lock:
+            if self._idle is not None:
+                return
+            idle: asyncio.Queue = asyncio.Queue()
+            for _ in range(self.size):
+                worker = await _TTSWorker.spawn()
+                self._workers.append(worker)
+                idle.put_nowait(worker)
+            self._idle = idle
+            logger.info(f"TTS pool started with {self.size} workers")
+
+    async def synthesize(self, text: str, voice: str = "neutral") -> bytes:
+        """
+        Render ``text`` to audio bytes on the next free worker.
+
+        Raises:
+            TTSPoolBusy: If queue_limit requests are already waiting
+        """
+        if self._idle is None:
+            await self.start()
+
+        if not self._workers:
+            # Every worker died and none could be respawned yet
+            raise TTSPoolBusy("Speech generation is unavailable, please retry shortly")
+
+        if not self._idle.empty():
+            worker = self._idle.get_nowait()
+        else:
+            # Backpressure: only queue_limit requests may wait for a worker
+            if self._waiting >= self.queue_limit:
+                raise TTSPoolBusy("Speech generation is busy, please retry shortly")
+
+            self._waiting += 1
+            try:
+                worker = await asyncio.wait_for(self._idle.get(), self.timeout)
+            except asyncio.TimeoutError:
+                raise TTSPoolBusy("Speech generation is busy, please retry shortly")
+            finally:
+                self._waiting -= 1
+
+        try:
+            audio = await asyncio.wait_for(worker.synthesize(text, voice), self.timeout)
+        except RuntimeError:
+            if worker.alive:
+                # Engine error; the process is still usable
+                self._idle.put_nowait(worker)
+            else:
+                self._replace(worker)
+            raise
+        except BaseException:
+            # Timed out or cancelled mid-frame: the pipe is out of sync
+            self._replace(worker)
+            raise
+
+        self._idle.put_nowait(worker)
+        return audio
+
+    def _replace(self, worker: _TTSWorker) -> None:
+        """Kill a broken worker and start a replacement in the background."""
+        if worker.alive:
+            worker.proc.kill()
+        if worker in self._workers:
+            self._workers.remove(worker)
+        task = asyncio.ensure_future(self._respawn())
+        self._respawning.add(task)
+        task.add_done_callback(self._respawning.discard)
+
+    async def _respawn(self) -> None:
+        """Spawn a replacement, retrying with backoff so the pool never stays short."""
+        delay = RESPAWN_BACKOFF_BASE
+        while True:
+            try:
+                replacement = await _TTSWorker.spawn()
+                break
+            except Exception as e:
+                logger.error(f"Could not respawn TTS worker, retrying in {delay:g}s: {e}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RESPAWN_BACKOFF_MAX)
+            if self._idle is None:
+                return
+        if self._idle is None:
+            # Pool closed while we were spawning
+            await replacement.close()
+            return
+        self._workers.append(replacement)
+        self._idle.put_nowait(replacement)
+
+    async def close(self) -> None:
+        """Stop all workers (called on shutdown)."""
+        workers, self._workers = self._workers, []
+        self._idle = None
+        await asyncio.gather(*(w.close() for w in workers), return_exceptions=True)
+
+
+# Singleton instance
+tts_pool = TTSPool(
+    size=settings.tts_pool_size,
+    queue_limit=settings.tts_queue_limit,
+    timeout=settings.tts_timeout_seconds,
+)
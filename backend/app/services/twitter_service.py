@@ -1,7 +1,7 @@
 """
 Twitter API v2 service for fetching real Twitter statistics.
 """
-import httpx
+from app.core.http import http_client
 from typing import Optional
 from datetime import datetime
 
@@ -19,7 +19,7 @@ async def get_twitter_user() -> Optional[dict]:
     if not tokens:
         return None
     
-    async with httpx.AsyncClient() as client:
+    async with http_client("twitter") as client:
         response = await client.get(
             f"{TWITTER_API_BASE}/users/me",
             params={
@@ -48,7 +48,7 @@ async def get_recent_tweets(max_results: int = 10) -> Optional[list]:
     
     user_id = user.get("id")
     
-    async with httpx.AsyncClient() as client:
+    async with http_client("twitter") as client:
         response = await client.get(
             f"{TWITTER_API_BASE}/users/{user_id}/tweets",
             params={
@@ -6,9 +6,13 @@ Uses service role key to bypass RLS.
 
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
-from supabase import Client
+from supabase import AsyncClient
 
-from app.core.supabase import get_supabase, get_supabase_admin
+from app.core.cache import AsyncCache
+from app.core.config import get_settings
+from app.core.db import get_db, get_db_admin, run_query
+
+settings = get_settings()
 
 
 class UserService:
@@ -16,12 +20,17 @@ class UserService:
     
     def __init__(self):
         # Use admin client (bypasses RLS) if available, otherwise fall back to regular client
-        admin = get_supabase_admin()
-        self.supabase: Client = admin if admin else get_supabase()
+        admin = get_db_admin()
+        self.supabase: AsyncClient = admin if admin else get_db()
+        # Plan/role checks run on every gated request; missing profiles aren't cached
+        self._profile_cache = AsyncCache(
+            max_entries=settings.profile_cache_size,
+            ttl=settings.profile_cache_ttl,
+        )
     
     async def get_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
-        Fetch user profile from Supabase.
+        Fetch user profile, from the in-process cache when fresh.
         
         Args:
             user_id: Supabase auth user ID (UUID)
@@ -29,13 +38,22 @@ class UserService:
         Returns:
             Profile dict or None if not found
         """
+        profile = await self._profile_cache.get_or_load(user_id, lambda: self._fetch_profile(user_id))
+        # Copy so callers can't mutate the cached entry
+        return dict(profile) if profile else None
+    
+    async def _fetch_profile(self, user_id: str) -> Optional[Dict[str, Any]]:
         try:
-            response = self.supabase.table("profiles").select("*").eq("id", user_id).single().execute()
+            response = await run_query(self.supabase.table("profiles").select("*").eq("id", user_id).single())
             return response.data
         except Exception as e:
             print(f"Error fetching profile: {e}")
             return None
     
+    def invalidate_profile(self, user_id: str) -> None:
+        """Drop a cached profile after it changes (plan, role, profile fields)."""
+        self._profile_cache.invalidate(user_id)
+    
     async def get_or_create_profile(
         self, 
         user_id: str, 
@@ -71,12 +89,14 @@ class UserService:
         }
         
         try:
-            response = self.supabase.table("profiles").insert(new_profile).execute()
+            response = await run_query(self.supabase.table("profiles").insert(new_profile))
             return response.data[0] if response.data else new_profile
         except Exception as e:
             print(f"Error creating profile: {e}")
             # Return the profile data even if insert fails (might already exist)
             return new_profile
+        finally:
+            self.invalidate_profile(user_id)
     
     async def update_plan(
         self, 
@@ -110,11 +130,13 @@ class UserService:
             update_data["trial_ends_at"] = (datetime.utcnow() + timedelta(days=7)).isoformat()
         
         try:
-            response = self.supabase.table("profiles").update(update_data).eq("id", user_id).execute()
+            response = await run_query(self.supabase.table("profiles").update(update_data).eq("id", user_id))
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error updating plan: {e}")
             return None
+        finally:
+            self.invalidate_profile(user_id)
     
     async def update_profile(
         self, 
@@ -134,11 +156,13 @@ class UserService:
         data["updated_at"] = datetime.utcnow().isoformat()
         
         try:
-            response = self.supabase.table("profiles").update(data).eq("id", user_id).execute()
+            response = await run_query(self.supabase.table("profiles").update(data).eq("id", user_id))
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error updating profile: {e}")
             return None
+        finally:
+            self.invalidate_profile(user_id)
     
     async def save_onboarding_preferences(
         self,
@@ -168,11 +192,13 @@ class UserService:
         }
         
         try:
-            response = self.supabase.table("profiles").update(update_data).eq("id", user_id).execute()
+            response = await run_query(self.supabase.table("profiles").update(update_data).eq("id", user_id))
             return response.data[0] if response.data else None
         except Exception as e:
             print(f"Error saving onboarding preferences: {e}")
             return None
+        finally:
+            self.invalidate_profile(user_id)
 
 
 # Singleton instance
@@ -3,20 +3,151 @@ Video Processor Service
 Extracts and compresses frames from video files for AI analysis.
 """
 
+import asyncio
 import cv2
+import numpy as np
 import base64
 import tempfile
+import threading
 import os
 from io import BytesIO
 from PIL import Image
-from typing import List, Tuple
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, BinaryIO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+# Seeking lands on the preceding keyframe and decodes forward from there, so
+# for short gaps it is cheaper to grab() through the intermediate frames.
+# Typical encoders emit a keyframe every ~2s.
+SEEK_THRESHOLD_SECONDS = 2.0
+
+
+def _target_times(
+    duration: float,
+    interval_seconds: float,
+    max_frames: int,
+    timestamps: Optional[List[float]] = None
+) -> List[float]:
+    """Sorted capture times inside the video, capped at max_frames."""
+    if timestamps is None:
+        timestamps = [i * interval_seconds for i in range(max_frames)]
+    times = sorted({float(t) for t in timestamps if t >= 0})
+    if duration > 0:
+        times = [t for t in times if t < duration]
+    return times[:max_frames]
+
+
+def _iter_decoded(
+    video_path: str,
+    interval_seconds: float = 1.0,
+    max_frames: int = 3,
+    timestamps: Optional[List[float]] = None,
+    seek_threshold_seconds: float = SEEK_THRESHOLD_SECONDS
+) -> Iterator[Tuple[float, np.ndarray]]:
+    """Yield raw BGR frames at the requested times (see iter_frames)."""
+    cap = cv2.VideoCapture(video_path)
+    
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video file: {video_path}")
+    
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        duration = total_frames / fps if fps > 0 else 0
+        
+        print(f"DEBUG: Processing video. FPS: {fps}, Total Frames: {total_frames}, Duration: {duration:.2f}s")
+        
+        if fps <= 0:
+            # Fallback to a default FPS if it can't be detected
+            fps = 30.0
+            print(f"DEBUG: FPS not detected, falling back to {fps}")
+        
+        seek_threshold = max(1, int(fps * seek_threshold_seconds))
+        position = 0  # Index of the next frame the decoder will return
+        
+        for target_time in _target_times(duration, interval_seconds, max_frames, timestamps):
+            target = int(round(target_time * fps))
+            if target < position:
+                continue  # Rounds onto a frame we already returned
+            
+            gap = target - position
+            if gap >= seek_threshold and cap.set(cv2.CAP_PROP_POS_MSEC, target / fps * 1000.0):
+                position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+                gap = max(0, target - position)
+            
+            for _ in range(gap):
+                if not cap.grab():
+                    return
+            
+            ret, frame = cap.read()
+            if not ret:
+                return
+            position = target + 1
+            
+            yield (target / fps, frame)
+    finally:
+        cap.release()
+
+
+def iter_frames(
+    video_path: str,
+    interval_seconds: float = 1.0,
+    max_frames: int = 3,
+    max_width: int = 480,
+    timestamps: Optional[List[float]] = None,
+    seek_threshold_seconds: float = SEEK_THRESHOLD_SECONDS,
+    compress: Optional[Callable[[np.ndarray, int], str]] = None
+) -> Iterator[Tuple[float, str]]:
+    """
+    Yield compressed frames at the requested times without decoding the rest.
+    
+    Frames between targets are skipped with ``grab()`` (no retrieve/colour
+    conversion); gaps longer than ``seek_threshold_seconds`` are skipped by
+    seeking with ``CAP_PROP_POS_MSEC`` instead.
+    
+    Args:
+        video_path: Path to the video file
+        interval_seconds: Time between frame captures (ignored if timestamps given)
+        max_frames: Maximum number of frames to extract
+        max_width: Maximum width for compression (default: 480px)
+        timestamps: Explicit capture times in seconds (optional)
+        seek_threshold_seconds: Minimum gap at which to seek rather than grab
+        compress: Frame encoder (default: compress_frame in this process)
+    
+    Yields:
+        Tuples of (timestamp_seconds, base64_encoded_image)
+    """
+    compress = compress or compress_frame
+    extracted_count = 0
+    
+    for timestamp, frame in _iter_decoded(
+        video_path,
+        interval_seconds=interval_seconds,
+        max_frames=max_frames,
+        timestamps=timestamps,
+        seek_threshold_seconds=seek_threshold_seconds
+    ):
+        try:
+            yield (timestamp, compress(frame, max_width))
+            extracted_count += 1
+        except GeneratorExit:
+            raise
+        except Exception as e:
+            print(f"DEBUG: Error compressing frame at {timestamp:.2f}s: {e}")
+    
+    print(f"DEBUG: Extracted {extracted_count} frames")
 
 
 def extract_frames(
     video_path: str,
     interval_seconds: float = 1.0,
     max_frames: int = 3,  # REDUCED: Only 3 frames for hook detection (0s, 1s, 2s)
-    max_width: int = 480
+    max_width: int = 480,
+    timestamps: Optional[List[float]] = None
 ) -> List[Tuple[float, str]]:
     """
     Extract frames from a video at specified intervals.
@@ -24,54 +155,221 @@ def extract_frames(
     Args:
         video_path: Path to the video file
         interval_seconds: Time between frame captures (default: 1 second)
-        max_frames: Maximum number of frames to extract (default: 30)
+        max_frames: Maximum number of frames to extract (default: 3)
         max_width: Maximum width for compression (default: 480px)
+        timestamps: Explicit capture times in seconds (optional)
     
     Returns:
         List of tuples: (timestamp_seconds, base64_encoded_image)
     """
-    frames = []
-    cap = cv2.VideoCapture(video_path)
+    return list(iter_frames(
+        video_path,
+        interval_seconds=interval_seconds,
+        max_frames=max_frames,
+        max_width=max_width,
+        timestamps=timestamps
+    ))
+
+
+# Relative weight of each cue when pre-ranking candidate hook frames
+HOOK_FRAME_WEIGHTS: Dict[str, float] = {
+    "sharpness": 0.25,
+    "motion": 0.2,
+    "faces": 0.25,
+    "contrast": 0.1,
+    "text": 0.2,
+}
+
+# Frames are scored on a small grayscale copy
+SCORING_WIDTH = 320
+
+_cascades = threading.local()
+
+
+def _face_cascade() -> Optional["cv2.CascadeClassifier"]:
+    """Per-thread Haar face detector (None if the model file isn't available)."""
+    if not hasattr(_cascades, "face"):
+        _cascades.face = None
+        cascade_dir = getattr(getattr(cv2, "data", None), "haarcascades", "")
+        # Minimal OpenCV builds ship without the objdetect module
+        if hasattr(cv2, "CascadeClassifier"):
+            cascade = cv2.CascadeClassifier(os.path.join(cascade_dir, "haarcascade_frontalface_default.xml"))
+            if not cascade.empty():
+                _cascades.face = cascade
+    return _cascades.face
+
+
+def _resize_to_width(frame: np.ndarray, width: int) -> np.ndarray:
+    height, current = frame.shape[:2]
+    if current <= width:
+        return frame
+    return cv2.resize(frame, (width, int(height * width / current)), interpolation=cv2.INTER_AREA)
+
+
+def _text_density(gray: np.ndarray) -> float:
+    """Fraction of the frame covered by wide, dense, text-line-shaped regions."""
+    kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
+    gradient = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel)
+    _, binary = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    lines = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, cv2.getStructuringElement(cv2.MORPH_RECT, (9, 1)))
+    contours, _ = cv2.findContours(lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     
-    if not cap.isOpened():
-        raise ValueError(f"Could not open video file: {video_path}")
+    height = gray.shape[0]
+    text_area = 0
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if h < 6 or h > height // 5 or w < 2 * h:
+            continue
+        if cv2.countNonZero(binary[y:y + h, x:x + w]) / float(w * h) > 0.45:
+            text_area += w * h
+    return text_area / float(gray.size)
+
+
+def score_frame_features(gray: np.ndarray, previous: Optional[np.ndarray] = None) -> Dict[str, float]:
+    """
+    Cheap visual cues for one grayscale frame.
     
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    duration = total_frames / fps if fps > 0 else 0
+    Returns raw (unnormalized) sharpness (Laplacian variance), motion (mean
+    absolute difference from the previous sample), faces (largest face as a
+    fraction of the frame), contrast (intensity std-dev) and text (fraction
+    of the frame in text-like regions).
+    """
+    faces = 0.0
+    cascade = _face_cascade()
+    if cascade is not None:
+        detections = cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(24, 24))
+        if len(detections):
+            faces = max(w * h for (_, _, w, h) in detections) / float(gray.size)
     
-    print(f"DEBUG: Processing video. FPS: {fps}, Total Frames: {total_frames}, Duration: {duration:.2f}s")
+    return {
+        "sharpness": float(cv2.Laplacian(gray, cv2.CV_64F).var()),
+        "motion": float(np.mean(cv2.absdiff(gray, previous))) if previous is not None else 0.0,
+        "faces": faces,
+        "contrast": float(gray.std()),
+        "text": _text_density(gray),
+    }
+
+
+def rank_frames(features: List[Dict[str, float]]) -> List[float]:
+    """Weighted score per frame, each cue min-max normalized across the candidates."""
+    scores = np.zeros(len(features))
+    for cue, weight in HOOK_FRAME_WEIGHTS.items():
+        values = np.array([f[cue] for f in features], dtype=np.float64)
+        spread = values.max() - values.min() if len(values) else 0.0
+        if spread > 0:
+            scores += weight * (values - values.min()) / spread
+    return scores.tolist()
+
+
+def select_hook_frames(
+    video_path: str,
+    top_k: int = 3,
+    window_seconds: float = 10.0,
+    step_seconds: float = 0.25,
+    max_width: int = 480,
+    min_gap_seconds: float = 0.75,
+    compress: Optional[Callable[[np.ndarray, int], str]] = None
+) -> List[Tuple[float, str]]:
+    """
+    Sample the opening of a video densely and keep the most promising frames.
     
-    if fps <= 0:
-        # Fallback to a default FPS if it can't be detected
-        fps = 30.0
-        print(f"DEBUG: FPS not detected, falling back to {fps}")
-        
-    frame_interval = max(1, int(fps * interval_seconds))
-    current_frame = 0
-    extracted_count = 0
+    Every ``step_seconds`` over the first ``window_seconds`` a frame is scored
+    locally (see score_frame_features). The ``top_k`` best frames at least
+    ``min_gap_seconds`` apart are compressed and returned in time order, so
+    the VLM sees the strongest candidates for the same upstream cost.
+    
+    ``compress`` encodes the chosen frames (default: compress_frame in this process).
+    
+    Returns:
+        List of tuples: (timestamp_seconds, base64_encoded_image)
+    """
+    compress = compress or compress_frame
+    sample_times = [i * step_seconds for i in range(int(window_seconds / step_seconds))]
+    
+    candidates: List[Tuple[float, np.ndarray]] = []
+    features: List[Dict[str, float]] = []
+    previous = None
+    for timestamp, frame in _iter_decoded(video_path, max_frames=len(sample_times), timestamps=sample_times):
+        gray = cv2.cvtColor(_resize_to_width(frame, SCORING_WIDTH), cv2.COLOR_BGR2GRAY)
+        features.append(score_frame_features(gray, previous))
+        candidates.append((timestamp, _resize_to_width(frame, max_width)))
+        previous = gray
+    
+    if not candidates:
+        return []
+    
+    scores = rank_frames(features)
+    by_score = sorted(range(len(candidates)), key=lambda i: scores[i], reverse=True)
     
-    while cap.isOpened() and extracted_count < max_frames:
-        ret, frame = cap.read()
-        if not ret:
+    # Best frames first, skipping near-duplicates of ones already chosen
+    chosen: List[int] = []
+    for i in by_score:
+        if all(abs(candidates[i][0] - candidates[j][0]) >= min_gap_seconds for j in chosen):
+            chosen.append(i)
+        if len(chosen) == top_k:
             break
-        
-        if current_frame % frame_interval == 0:
-            timestamp = current_frame / fps
-            try:
-                compressed_b64 = compress_frame(frame, max_width)
-                frames.append((timestamp, compressed_b64))
-                extracted_count += 1
-            except Exception as e:
-                print(f"DEBUG: Error compressing frame {current_frame}: {e}")
-        
-        current_frame += 1
+    for i in by_score:
+        if len(chosen) == top_k:
+            break
+        if i not in chosen:
+            chosen.append(i)
     
-    print(f"DEBUG: Extracted {len(frames)} frames")
-    cap.release()
+    frames = []
+    for i in sorted(chosen):
+        timestamp, frame = candidates[i]
+        print(f"DEBUG: Hook candidate {timestamp:.2f}s score={scores[i]:.2f}")
+        frames.append((timestamp, compress(frame, max_width)))
+    
+    print(f"DEBUG: Pre-ranked {len(candidates)} frames, kept {len(frames)}")
     return frames
 
 
+async def aiter_frames(video_path: str, **kwargs) -> AsyncIterator[Tuple[float, str]]:
+    """
+    Async version of iter_frames that decodes on a worker thread.
+    
+    Frames are handed over as soon as they are compressed, so callers can
+    start working on early frames while later ones are still being decoded.
+    Accepts the same keyword arguments as iter_frames.
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=2)
+    stop = threading.Event()
+    done = object()
+    
+    def put(item) -> None:
+        asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+    
+    def produce() -> None:
+        try:
+            for item in iter_frames(video_path, **kwargs):
+                if stop.is_set():
+                    break
+                put(item)
+        except Exception as e:
+            put(e)
+        finally:
+            put(done)
+    
+    producer = loop.run_in_executor(None, produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+        # Keep draining so the worker is never stuck on a full queue
+        while not producer.done():
+            try:
+                queue.get_nowait()
+            except asyncio.QueueEmpty:
+                await asyncio.sleep(0.01)
+
+
 def compress_frame(frame, max_width: int = 480) -> str:
     """
     Compress a video frame and convert to base64.
@@ -105,6 +403,92 @@ def compress_frame(frame, max_width: int = 480) -> str:
     return b64_string
 
 
+class UploadTooLargeError(ValueError):
+    """Raised when a streamed upload exceeds the size limit."""
+
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024  # 1MB
+
+
+def copy_upload_to_file(
+    source: BinaryIO,
+    dest_path: str,
+    max_bytes: int,
+    chunk_size: int = UPLOAD_CHUNK_SIZE
+) -> int:
+    """
+    Copy an uploaded file object to disk in chunks, enforcing a size limit.
+    
+    Only one chunk is held in memory at a time. Blocking; run it in a
+    threadpool from async code.
+    
+    Args:
+        source: File-like object to read from (e.g. UploadFile.file)
+        dest_path: Path to write to (truncated first)
+        max_bytes: Maximum number of bytes allowed
+        chunk_size: Bytes read per chunk
+    
+    Returns:
+        Number of bytes written
+    
+    Raises:
+        UploadTooLargeError: If the upload is larger than max_bytes
+    """
+    written = 0
+    with open(dest_path, "wb") as dest:
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            written += len(chunk)
+            if written > max_bytes:
+                raise UploadTooLargeError(
+                    f"File too large. Maximum size: {max_bytes // (1024*1024)}MB"
+                )
+            dest.write(chunk)
+    return written
+
+
+class TempVideoSlots:
+    """
+    Fixed set of reusable temp-file paths, one per concurrent video job.
+    
+    The number of slots caps how many videos this process works on at once;
+    further jobs wait for a free slot. A slot's file is always removed when
+    the job releases it.
+    """
+    
+    def __init__(self, slots: int = 2, directory: Optional[str] = None):
+        self.slots = max(slots, 1)
+        self._directory = directory
+        self._free: Optional[asyncio.Queue] = None
+    
+    def _init(self) -> None:
+        if self._directory is None:
+            self._directory = tempfile.mkdtemp(prefix="video-slots-")
+        os.makedirs(self._directory, exist_ok=True)
+        self._free = asyncio.Queue()
+        for index in range(self.slots):
+            self._free.put_nowait(index)
+    
+    @property
+    def available(self) -> int:
+        return self._free.qsize() if self._free is not None else self.slots
+    
+    @asynccontextmanager
+    async def acquire(self, suffix: str = ".mp4") -> AsyncIterator[str]:
+        """Wait for a free slot and yield its file path."""
+        if self._free is None:
+            self._init()
+        index = await self._free.get()
+        path = os.path.join(self._directory, f"slot-{index}{suffix}")
+        try:
+            yield path
+        finally:
+            cleanup_temp_file(path)
+            self._free.put_nowait(index)
+
+
 def save_temp_video(video_bytes: bytes, suffix: str = ".mp4") -> str:
     """
     Save uploaded video bytes to a temporary file.
@@ -129,3 +513,7 @@ def cleanup_temp_file(file_path: str) -> None:
             os.remove(file_path)
     except Exception:
         pass  # Ignore cleanup errors
+
+
+# Shared by the hook analysis endpoints
+video_slots = TempVideoSlots(slots=settings.video_job_slots)
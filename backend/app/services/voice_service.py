@@ -1,41 +1,67 @@
 
 import json
-import sys
 import logging
-import asyncio
-import pyttsx3
-import base64
-import tempfile
-import os
-from typing import Dict, Any, List, Optional
-from concurrent.futures import ThreadPoolExecutor
+import re
+import unicodedata
+from typing import Dict, Any, List, Optional, BinaryIO, Union
 
 # Reuse the singleton AI service for Ollama
 from app.services.ai_service import ai_service
+from app.services.tts_pool import tts_pool, TTSPoolBusy
+from app.services.speech_cache import speech_cache, speech_key
+from app.services.generate_audio_file import SPEECH_RATE
+from app.services.llm_router import llm_router
+from app.core.cache import AsyncCache, SingleFlight, digest_key
+from app.core.config import get_settings
+from fastapi.concurrency import run_in_threadpool
+
+settings = get_settings()
+
+# Preferred models for script analysis; the router picks the healthiest
+ANALYSIS_MODELS = ['gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-pro']
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_script(script: str) -> str:
+    """Canonical form of a script: NFC unicode, trimmed, whitespace collapsed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", script)).strip()
+
 
 class VoiceService:
     """Service for Voice Coach features using Local AI (Ollama + Pyttsx3)."""
     
     def __init__(self):
-        # Initialize thread executor for blocking pyttsx3 calls
-        self.executor = ThreadPoolExecutor(max_workers=1)
         self.logger = logging.getLogger(__name__)
+        self._speech_flight = SingleFlight()
+        # (user_id, script fingerprint) -> analysis; concurrent misses share one call
+        self._analysis_cache = AsyncCache(
+            max_entries=settings.script_analysis_cache_size,
+            ttl=settings.script_analysis_ttl,
+        )
         
-    async def analyze_script(self, script: str) -> Dict[str, Any]:
+    async def analyze_script(self, script: str, user_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Analyze a script using Gemini to generate hooks.
         Returns original hook, improved hooks, and coaching explanation.
+        
+        Results are cached per user by a fingerprint of the normalized script,
+        so re-analyzing the same script (or a double-submit) makes one call.
         """
-        print(f"DEBUG: Analyzing script with Gemini...")
+        script = normalize_script(script)
+        key = digest_key(user_id or "", script)
         
-        # Access keys from ai_service to ensure we have the latest config
-        from app.services.ai_service import ai_service
-        primary_key = ai_service.gemini_key
-        secondary_key = ai_service.gemini_key_secondary
+        result = await self._analysis_cache.get_or_load(key, lambda: self._generate_analysis(script))
+        if result is None:
+            # Fallbacks are never cached so the next click retries Gemini
+            return self._fallback_analysis(script)
         
-        keys_to_try = []
-        if primary_key: keys_to_try.append(primary_key)
-        if secondary_key: keys_to_try.append(secondary_key)
+        # Copy so callers can't mutate the cached entry
+        return dict(result)
+
+    async def _generate_analysis(self, script: str) -> Optional[Dict[str, Any]]:
+        """Ask Gemini for the analysis; None if every key and model failed."""
+        print(f"DEBUG: Analyzing script with Gemini...")
         
         prompt = f"""
         You are a world-class Viral Video Coach.
@@ -67,53 +93,44 @@ class VoiceService:
         }}
         """
         
-        import google.generativeai as genai
-        
-        last_error = None
+        try:
+            # A reply that isn't valid analysis JSON falls through to the next model
+            response = await llm_router.generate([prompt], models=ANALYSIS_MODELS, validate=self._parse_analysis)
+            print(f"DEBUG: Script analyzed by {response.model} in {response.latency:.2f}s")
+            return self._parse_analysis(response.text)
+            
+        except Exception as e:
+            print(f"ERROR: Voice Coach Analysis Failed. Last error: {e}")
+            return None
+
+    @staticmethod
+    def _parse_analysis(text: str) -> Dict[str, Any]:
+        """Analysis dict from the model's reply; raises ValueError if malformed."""
+        text = text.strip()
+        # Clean markdown if present
+        if text.startswith("```json"):
+            text = text.replace("```json", "").replace("```", "")
+        elif text.startswith("```"):
+            text = text.replace("```", "")
+            
+        result = json.loads(text)
+        if not isinstance(result, dict):
+            raise ValueError("Analysis is not a JSON object")
         
-        for key_idx, api_key in enumerate(keys_to_try):
-            try:
-                print(f"DEBUG: Using Gemini Key #{key_idx + 1}")
-                genai.configure(api_key=api_key)
-                
-                # Try preferred models
-                models = ['gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-pro']
-                
-                for model_name in models:
-                    try:
-                        print(f"DEBUG: Attempting {model_name}...")
-                        model = genai.GenerativeModel(model_name)
-                        response = await model.generate_content_async(prompt)
-                        
-                        text = response.text.strip()
-                        # Clean markdown if present
-                        if text.startswith("```json"):
-                            text = text.replace("```json", "").replace("```", "")
-                        elif text.startswith("```"):
-                            text = text.replace("```", "")
-                            
-                        result = json.loads(text)
-                        
-                        # Ensure proper types
-                        result["retention_score"] = float(result.get("retention_score", 0.0))
-                         # Fallback if specific fields missing
-                        if "coaching_explanation" not in result:
-                            result["coaching_explanation"] = result.get("why_high_retention_works", "This hook creates better curiosity.")
-                            
-                        return result
-                        
-                    except Exception as model_err:
-                        print(f"DEBUG: Model {model_name} failed: {model_err}")
-                        last_error = model_err
-                        continue
-                
-            except Exception as e:
-                 print(f"DEBUG: Key #{key_idx + 1} failed: {e}")
-                 last_error = e
-                 continue
-
-        print(f"ERROR: Voice Coach Analysis Failed. Last error: {last_error}")
-        # Robust Fallback
+        # Ensure proper types
+        try:
+            result["retention_score"] = float(result.get("retention_score", 0.0))
+        except TypeError as e:
+            raise ValueError(f"Invalid retention_score: {e}")
+        # Fallback if specific fields missing
+        if "coaching_explanation" not in result:
+            result["coaching_explanation"] = result.get("why_high_retention_works", "This hook creates better curiosity.")
+            
+        return result
+
+    @staticmethod
+    def _fallback_analysis(script: str) -> Dict[str, Any]:
+        """Robust fallback when the AI service is unavailable."""
         return {
             "original": script[:50] + "...",
             "average_hook": "Here is a video about this topic.",
@@ -126,57 +143,47 @@ class VoiceService:
 
     async def generate_audio(self, text: str, voice_id: str = "default") -> bytes:
         """
-        Generate audio from text using local pyttsx3 via subprocess.
+        Generate audio from text using the warm pyttsx3 worker pool.
         """
-        print(f"DEBUG: Generating local audio via subprocess for: {text[:50]}...")
+        print(f"DEBUG: Generating local audio via TTS pool for: {text[:50]}...")
         
-        import subprocess
-        import uuid
-        
-        # Unique temp file
-        temp_filename = f"temp_voice_{uuid.uuid4()}.mp3"
-        script_path = os.path.join(os.path.dirname(__file__), "generate_audio_file.py")
+        style = self._voice_style(voice_id)
         
         try:
-            # Run the generation script
-            # We use python executable from the current environment
-            python_exe = sys.executable
-            
-            # Map voice_id to style
-            style = "neutral"
-            if voice_id == "pNInz6obpgDQGcFmaJgB": 
-                style = "energetic"
-                
-            cmd = [python_exe, script_path, "--text", text, "--output", temp_filename, "--voice", style]
-            
-            proc = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await proc.communicate()
-            
-            if proc.returncode != 0:
-                print(f"ERROR: Subprocess failed. Stderr: {stderr.decode()}")
-                raise Exception(f"Audio Generation Script Failed: {stderr.decode()}")
-            
-            print(f"DEBUG: Subprocess success. Output: {stdout.decode()}")
-            
-            # Read the file
-            if os.path.exists(temp_filename):
-                with open(temp_filename, "rb") as f:
-                    audio_bytes = f.read()
-                os.remove(temp_filename)
-                return audio_bytes
-            else:
-                raise Exception("Audio file was not created by subprocess")
-                
+            return await tts_pool.synthesize(text, style)
+        except TTSPoolBusy:
+            raise
         except Exception as e:
             print(f"ERROR: Audio generation process failed: {e}")
-            if os.path.exists(temp_filename):
-                os.remove(temp_filename)
             raise e
 
+    async def get_audio(self, text: str, voice_id: str = "default") -> Union[BinaryIO, bytes]:
+        """
+        Audio for the text: an open handle on the speech cache file on a hit
+        (caller closes it), or the freshly synthesized bytes on a miss.
+        Concurrent requests for the same audio share one synthesis.
+        """
+        style = self._voice_style(voice_id)
+        key = speech_key(text, style, SPEECH_RATE)
+        
+        audio = await speech_cache.get(key)
+        if audio is not None:
+            print(f"DEBUG: Speech cache hit for: {text[:50]}...")
+            return audio
+        
+        return await self._speech_flight.do(key, lambda: self._render_to_cache(key, text, voice_id))
+
+    async def _render_to_cache(self, key: str, text: str, voice_id: str) -> bytes:
+        audio = await self.generate_audio(text, voice_id)
+        await run_in_threadpool(speech_cache.put, key, audio)
+        return audio
+
+    @staticmethod
+    def _voice_style(voice_id: str) -> str:
+        """Map voice_id to a local engine style."""
+        if voice_id == "pNInz6obpgDQGcFmaJgB": 
+            return "energetic"
+        return "neutral"
+
 # Singleton instance
 voice_service = VoiceService()
@@ -3,8 +3,10 @@
 This module handles fetching data from YouTube Data API v3.
 For demo, it uses mock data. Replace with real API calls when API key is available.
 """
-import httpx
-from typing import List, Dict, Any, Optional
+import asyncio
+from app.core.http import http_client
+from app.core.cache import AsyncCache
+from typing import List, Dict, Any, Iterable, Optional, Set
 from datetime import datetime, timedelta
 from app.core.config import get_settings
 from .mock_data import generate_mock_posts, generate_mock_metrics
@@ -13,6 +15,115 @@ settings = get_settings()
 
 YOUTUBE_API_BASE = "https://www.googleapis.com/youtube/v3"
 
+# Shared across YouTubeService instances (routes create one per request)
+_channel_stats_cache = AsyncCache(max_entries=512, ttl=settings.youtube_cache_ttl, stale_ttl=settings.youtube_cache_stale_ttl)
+_channel_videos_cache = AsyncCache(max_entries=512, ttl=settings.youtube_cache_ttl, stale_ttl=settings.youtube_cache_stale_ttl)
+_channel_info_cache = AsyncCache(max_entries=512, ttl=settings.youtube_cache_ttl, stale_ttl=settings.youtube_cache_stale_ttl)
+_featured_cache = AsyncCache(max_entries=1, ttl=settings.youtube_cache_ttl, stale_ttl=settings.youtube_cache_stale_ttl)
+_resolve_cache = AsyncCache(max_entries=1024, ttl=24 * 3600)
+
+# Max IDs accepted by channels.list / videos.list
+YOUTUBE_MAX_IDS = 50
+
+
+class IdBatcher:
+    """
+    Coalesce ID lookups from concurrent callers into combined list requests.
+    
+    IDs requested within ``window`` seconds are sent together (up to 50 per
+    request) with the union of the parts each caller asked for.
+    """
+    
+    def __init__(self, endpoint: str, window: float = 0.02, max_batch: int = YOUTUBE_MAX_IDS):
+        self.endpoint = endpoint
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._parts: Set[str] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+    
+    async def get(self, item_id: str, parts: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """Return the API item for ``item_id`` (None if missing or the request failed)."""
+        loop = asyncio.get_running_loop()
+        future = self._pending.get(item_id)
+        if future is None:
+            future = loop.create_future()
+            self._pending[item_id] = future
+        self._parts.update(parts)
+        
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        
+        return await asyncio.shield(future)
+    
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        
+        pending, parts = self._pending, self._parts
+        self._pending, self._parts = {}, set()
+        
+        ids = list(pending)
+        for start in range(0, len(ids), self.max_batch):
+            chunk = {item_id: pending[item_id] for item_id in ids[start:start + self.max_batch]}
+            task = asyncio.ensure_future(self._send(chunk, ",".join(sorted(parts))))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+    
+    async def _send(self, chunk: Dict[str, asyncio.Future], part: str) -> None:
+        items: Dict[str, Dict[str, Any]] = {}
+        try:
+            async with http_client("youtube") as client:
+                response = await client.get(
+                    f"{YOUTUBE_API_BASE}/{self.endpoint}",
+                    params={
+                        "part": part,
+                        "id": ",".join(chunk),
+                        "key": settings.youtube_api_key
+                    }
+                )
+            if response.status_code == 200:
+                items = {item["id"]: item for item in response.json().get("items", [])}
+            else:
+                print(f"[YouTube] {self.endpoint} batch failed: {response.status_code}")
+        except Exception as e:
+            print(f"[YouTube] {self.endpoint} batch error: {e}")
+        
+        for item_id, future in chunk.items():
+            if not future.done():
+                future.set_result(items.get(item_id))
+
+
+_channel_batcher = IdBatcher("channels")
+_video_batcher = IdBatcher("videos")
+
+# channel_id -> uploads playlist ID (fixed for the life of a channel)
+_uploads_playlists: Dict[str, str] = {}
+
+
+async def _get_channel_item(channel_id: str, parts: Iterable[str]) -> Optional[Dict[str, Any]]:
+    """Batched channels.list lookup that also records the uploads playlist."""
+    # channels.list costs 1 unit whatever the parts, so always pick up contentDetails
+    channel = await _channel_batcher.get(channel_id, set(parts) | {"contentDetails"})
+    if channel:
+        uploads = channel.get("contentDetails", {}).get("relatedPlaylists", {}).get("uploads")
+        if uploads:
+            _uploads_playlists[channel_id] = uploads
+    return channel
+
+
+async def _get_uploads_playlist(channel_id: str) -> Optional[str]:
+    """Uploads playlist ID for a channel, resolved once and kept."""
+    uploads = _uploads_playlists.get(channel_id)
+    if uploads is None:
+        await _get_channel_item(channel_id, ("contentDetails",))
+        uploads = _uploads_playlists.get(channel_id)
+    return uploads
+
 
 class YouTubeService:
     """Service for interacting with YouTube Data API."""
@@ -34,67 +145,54 @@ class YouTubeService:
         if not self.api_key:
             return self._mock_channel_info(channel_id)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{YOUTUBE_API_BASE}/channels",
-                params={
-                    "part": "snippet,statistics,brandingSettings",
-                    "id": channel_id,
-                    "key": self.api_key
-                }
-            )
+        stats = await _channel_stats_cache.get_or_load(
+            channel_id, lambda: self._fetch_public_channel_stats(channel_id)
+        )
+        return stats if stats is not None else self._mock_channel_info(channel_id)
+    
+    async def _fetch_public_channel_stats(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        channel = await _get_channel_item(channel_id, ("snippet", "statistics", "brandingSettings"))
+        if channel:
+            snippet = channel.get("snippet", {})
+            stats = channel.get("statistics", {})
+            branding = channel.get("brandingSettings", {}).get("channel", {})
             
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("items"):
-                    channel = data["items"][0]
-                    snippet = channel.get("snippet", {})
-                    stats = channel.get("statistics", {})
-                    branding = channel.get("brandingSettings", {}).get("channel", {})
-                    
-                    return {
-                        "id": channel.get("id"),
-                        "title": snippet.get("title"),
-                        "description": snippet.get("description", "")[:200],
-                        "customUrl": snippet.get("customUrl", ""),
-                        "thumbnail": snippet.get("thumbnails", {}).get("high", {}).get("url"),
-                        "banner": branding.get("bannerExternalUrl"),
-                        "country": snippet.get("country"),
-                        "publishedAt": snippet.get("publishedAt"),
-                        "statistics": {
-                            "subscribers": int(stats.get("subscriberCount", 0)),
-                            "views": int(stats.get("viewCount", 0)),
-                            "videos": int(stats.get("videoCount", 0)),
-                            "hiddenSubscriberCount": stats.get("hiddenSubscriberCount", False),
-                        }
-                    }
-            return self._mock_channel_info(channel_id)
+            return {
+                "id": channel.get("id"),
+                "title": snippet.get("title"),
+                "description": snippet.get("description", "")[:200],
+                "customUrl": snippet.get("customUrl", ""),
+                "thumbnail": snippet.get("thumbnails", {}).get("high", {}).get("url"),
+                "banner": branding.get("bannerExternalUrl"),
+                "country": snippet.get("country"),
+                "publishedAt": snippet.get("publishedAt"),
+                "statistics": {
+                    "subscribers": int(stats.get("subscriberCount", 0)),
+                    "views": int(stats.get("viewCount", 0)),
+                    "videos": int(stats.get("videoCount", 0)),
+                    "hiddenSubscriberCount": stats.get("hiddenSubscriberCount", False),
+                }
+            }
+        return None
     
     async def get_channel_videos_with_stats(self, channel_id: str, max_results: int = 6) -> List[Dict[str, Any]]:
         """Get recent videos from a channel with full statistics."""
         if not self.api_key:
             return self._mock_videos(max_results)
         
-        async with httpx.AsyncClient() as client:
-            # First get channel's uploads playlist
-            channel_response = await client.get(
-                f"{YOUTUBE_API_BASE}/channels",
-                params={
-                    "part": "contentDetails",
-                    "id": channel_id,
-                    "key": self.api_key
-                }
-            )
-            
-            if channel_response.status_code != 200:
-                return self._mock_videos(max_results)
-            
-            channel_data = channel_response.json()
-            if not channel_data.get("items"):
-                return self._mock_videos(max_results)
-            
-            uploads_playlist = channel_data["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
-            
+        videos = await _channel_videos_cache.get_or_load(
+            (channel_id, max_results),
+            lambda: self._fetch_channel_videos_with_stats(channel_id, max_results),
+        )
+        return videos if videos is not None else self._mock_videos(max_results)
+    
+    async def _fetch_channel_videos_with_stats(self, channel_id: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        # Uploads playlist ID never changes once resolved
+        uploads_playlist = await _get_uploads_playlist(channel_id)
+        if not uploads_playlist:
+            return None
+        
+        async with http_client("youtube") as client:
             # Get video IDs from uploads playlist
             playlist_response = await client.get(
                 f"{YOUTUBE_API_BASE}/playlistItems",
@@ -105,108 +203,88 @@ class YouTubeService:
                     "key": self.api_key
                 }
             )
+        
+        if playlist_response.status_code != 200:
+            return None
+        
+        playlist_data = playlist_response.json()
+        video_ids = [item["contentDetails"]["videoId"] for item in playlist_data.get("items", [])]
+        
+        if not video_ids:
+            return []
+        
+        # Get full video statistics (batched with other in-flight lookups)
+        items = await asyncio.gather(*(
+            _video_batcher.get(video_id, ("snippet", "statistics", "contentDetails"))
+            for video_id in video_ids
+        ))
+        if not any(items):
+            return None
+        
+        videos = []
+        
+        for video in filter(None, items):
+            snippet = video.get("snippet", {})
+            stats = video.get("statistics", {})
+            content = video.get("contentDetails", {})
             
-            if playlist_response.status_code != 200:
-                return self._mock_videos(max_results)
-            
-            playlist_data = playlist_response.json()
-            video_ids = [item["contentDetails"]["videoId"] for item in playlist_data.get("items", [])]
-            
-            if not video_ids:
-                return []
-            
-            # Get full video statistics
-            videos_response = await client.get(
-                f"{YOUTUBE_API_BASE}/videos",
-                params={
-                    "part": "snippet,statistics,contentDetails",
-                    "id": ",".join(video_ids),
-                    "key": self.api_key
+            videos.append({
+                "id": video.get("id"),
+                "title": snippet.get("title"),
+                "description": snippet.get("description", "")[:150],
+                "thumbnail": snippet.get("thumbnails", {}).get("high", {}).get("url"),
+                "publishedAt": snippet.get("publishedAt"),
+                "duration": content.get("duration"),
+                "statistics": {
+                    "views": int(stats.get("viewCount", 0)),
+                    "likes": int(stats.get("likeCount", 0)),
+                    "comments": int(stats.get("commentCount", 0)),
                 }
-            )
-            
-            if videos_response.status_code != 200:
-                return self._mock_videos(max_results)
-            
-            videos_data = videos_response.json()
-            videos = []
-            
-            for video in videos_data.get("items", []):
-                snippet = video.get("snippet", {})
-                stats = video.get("statistics", {})
-                content = video.get("contentDetails", {})
-                
-                videos.append({
-                    "id": video.get("id"),
-                    "title": snippet.get("title"),
-                    "description": snippet.get("description", "")[:150],
-                    "thumbnail": snippet.get("thumbnails", {}).get("high", {}).get("url"),
-                    "publishedAt": snippet.get("publishedAt"),
-                    "duration": content.get("duration"),
-                    "statistics": {
-                        "views": int(stats.get("viewCount", 0)),
-                        "likes": int(stats.get("likeCount", 0)),
-                        "comments": int(stats.get("commentCount", 0)),
-                    }
-                })
-            
-            return videos
-    
-    # Class-level cache for featured channels
-    _featured_cache = None
-    _featured_cache_time = None
-    _CACHE_TTL = 300  # 5 minutes in seconds
+            })
+        
+        return videos
     
     async def get_featured_channels(self) -> List[Dict[str, Any]]:
         """Get stats for all featured channels (T-Series, MrBeast, etc.).
         
-        Results are cached for 5 minutes to improve page load performance.
+        Results are cached and served stale while a background refresh runs,
+        so page loads rarely wait on the YouTube API.
         """
-        # Check if we have valid cached data
-        if (YouTubeService._featured_cache is not None 
-            and YouTubeService._featured_cache_time is not None):
-            cache_age = (datetime.now() - YouTubeService._featured_cache_time).total_seconds()
-            if cache_age < YouTubeService._CACHE_TTL:
-                print(f"[Cache Hit] Returning cached featured channels (age: {cache_age:.1f}s)")
-                return YouTubeService._featured_cache
+        return await _featured_cache.get_or_load("featured", self._fetch_featured_channels)
+    
+    async def _fetch_featured_channels(self) -> List[Dict[str, Any]]:
+        print("[Cache Refresh] Fetching featured channels from YouTube API...")
         
-        print("[Cache Miss] Fetching featured channels from YouTube API...")
-        channels = []
-        for name, channel_id in self.FEATURED_CHANNELS.items():
-            stats = await self.get_public_channel_stats(channel_id)
-            videos = await self.get_channel_videos_with_stats(channel_id, max_results=3)
-            channels.append({
+        async def fetch_one(name: str, channel_id: str) -> Dict[str, Any]:
+            stats, videos = await asyncio.gather(
+                self.get_public_channel_stats(channel_id),
+                self.get_channel_videos_with_stats(channel_id, max_results=3),
+            )
+            return {
                 "key": name,
                 "channel": stats,
                 "recent_videos": videos
-            })
+            }
         
-        # Update cache
-        YouTubeService._featured_cache = channels
-        YouTubeService._featured_cache_time = datetime.now()
+        channels = await asyncio.gather(*(
+            fetch_one(name, channel_id) for name, channel_id in self.FEATURED_CHANNELS.items()
+        ))
         print(f"[Cache Updated] Cached {len(channels)} channels")
         
-        return channels
+        return list(channels)
     
     async def get_channel_info(self, channel_id: str) -> Dict[str, Any]:
         """Get channel information."""
         if not self.api_key:
             return self._mock_channel_info(channel_id)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{YOUTUBE_API_BASE}/channels",
-                params={
-                    "part": "snippet,statistics",
-                    "id": channel_id,
-                    "key": self.api_key
-                }
-            )
-            if response.status_code == 200:
-                data = response.json()
-                if data.get("items"):
-                    return data["items"][0]
-            return self._mock_channel_info(channel_id)
+        info = await _channel_info_cache.get_or_load(
+            channel_id, lambda: self._fetch_channel_info(channel_id)
+        )
+        return info if info is not None else self._mock_channel_info(channel_id)
+    
+    async def _fetch_channel_info(self, channel_id: str) -> Optional[Dict[str, Any]]:
+        return await _get_channel_item(channel_id, ("snippet", "statistics"))
     
     async def get_videos(self, channel_id: str, max_results: int = 50) -> List[Dict[str, Any]]:
         """Get recent videos from a channel."""
@@ -216,26 +294,12 @@ class YouTubeService:
             # get_videos calls _mock_videos.
             return self._mock_videos_raw(max_results)
         
-        async with httpx.AsyncClient() as client:
-            # First get uploads playlist
-            channel_response = await client.get(
-                f"{YOUTUBE_API_BASE}/channels",
-                params={
-                    "part": "contentDetails",
-                    "id": channel_id,
-                    "key": self.api_key
-                }
-            )
-            
-            if channel_response.status_code != 200:
-                return self._mock_videos_raw(max_results)
-            
-            channel_data = channel_response.json()
-            if not channel_data.get("items"):
-                return self._mock_videos_raw(max_results)
-            
-            uploads_playlist = channel_data["items"][0]["contentDetails"]["relatedPlaylists"]["uploads"]
-            
+        # First get uploads playlist
+        uploads_playlist = await _get_uploads_playlist(channel_id)
+        if not uploads_playlist:
+            return self._mock_videos_raw(max_results)
+        
+        async with http_client("youtube") as client:
             # Get videos from uploads playlist
             videos_response = await client.get(
                 f"{YOUTUBE_API_BASE}/playlistItems",
@@ -257,20 +321,13 @@ class YouTubeService:
         if not self.api_key or not video_ids:
             return self._mock_video_stats(len(video_ids) if video_ids else 10)
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{YOUTUBE_API_BASE}/videos",
-                params={
-                    "part": "statistics,snippet",
-                    "id": ",".join(video_ids[:50]),  # Max 50 per request
-                    "key": self.api_key
-                }
-            )
-            
-            if response.status_code == 200:
-                return response.json().get("items", [])
-            
-            return self._mock_video_stats(len(video_ids))
+        items = await asyncio.gather(*(
+            _video_batcher.get(video_id, ("statistics", "snippet")) for video_id in video_ids
+        ))
+        if any(items):
+            return [item for item in items if item]
+        
+        return self._mock_video_stats(len(video_ids))
     
     async def resolve_channel_id(self, query: str) -> Optional[str]:
         """Resolve a handle (@username) or search term to a Channel ID."""
@@ -280,7 +337,11 @@ class YouTubeService:
             if "pewdiepie" in query.lower(): return "UC-lHJZR3Gqxm24_Vd_AJ5Yw"
             return "UCX6OQ3DkcsbYNE6H8uQQuVA" # Default to MrBeast for demo
         
-        async with httpx.AsyncClient() as client:
+        # Handles and search hits rarely change, and search costs 100 quota units
+        return await _resolve_cache.get_or_load(query.lower(), lambda: self._fetch_channel_id(query))
+    
+    async def _fetch_channel_id(self, query: str) -> Optional[str]:
+        async with http_client("youtube") as client:
             # Case 1: Handle (@username)
             if query.startswith("@"):
                 response = await client.get(
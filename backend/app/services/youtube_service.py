@@ -1,7 +1,7 @@
 """
 YouTube Data API service for fetching real channel and video statistics.
 """
-import httpx
+from app.core.http import http_client
 from typing import Optional
 from datetime import datetime
 
@@ -20,7 +20,7 @@ async def get_channel_stats() -> Optional[dict]:
     if not tokens:
         return None
     
-    async with httpx.AsyncClient() as client:
+    async with http_client("youtube") as client:
         # Get channel info for authenticated user
         response = await client.get(
             f"{YOUTUBE_API_BASE}/channels",
@@ -62,7 +62,7 @@ async def get_recent_videos(max_results: int = 10) -> Optional[list]:
     if not tokens:
         return None
     
-    async with httpx.AsyncClient() as client:
+    async with http_client("youtube") as client:
         # First get channel's uploads playlist
         channel_response = await client.get(
             f"{YOUTUBE_API_BASE}/channels",
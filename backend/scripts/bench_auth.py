@@ -0,0 +1,59 @@
+import asyncio
+import os
+import sys
+import time
+
+# Add parent directory to path to import app
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Benchmark against a throwaway secret so the verified (signature + exp) path runs
+os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret-" + "x" * 32)
+
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+
+from app.core import auth
+from app.core.config import get_settings
+
+ROUNDS = 20000
+
+
+def make_token(secret: str) -> str:
+    now = int(time.time())
+    claims = {
+        "sub": "00000000-0000-0000-0000-000000000001",
+        "email": "bench@example.com",
+        "aud": "authenticated",
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + 3600,
+    }
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+async def run(label: str, credentials: HTTPAuthorizationCredentials, clear_cache: bool) -> None:
+    # Warm up
+    for _ in range(100):
+        await auth.get_current_user(credentials)
+
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        if clear_cache:
+            auth._token_cache.clear()
+        await auth.get_current_user(credentials)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<28} {elapsed / ROUNDS * 1e6:8.1f} µs/call  ({ROUNDS / elapsed:,.0f} calls/s)")
+
+
+async def main():
+    settings = get_settings()
+    token = make_token(settings.supabase_jwt_secret)
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    print(f"🔐 get_current_user, {ROUNDS} calls each")
+    await run("full decode (cache miss)", credentials, clear_cache=True)
+    await run("cached claims (cache hit)", credentials, clear_cache=False)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+-- Migration: Pre-aggregated daily metrics rollups
+-- Folds newly collected metrics into per-user, per-platform, per-day buckets
+-- so overview queries read at most one row per day instead of the raw time series.
+
+-- =====================================================
+-- METRICS_ROLLUP_DAILY TABLE
+-- =====================================================
+CREATE TABLE IF NOT EXISTS metrics_rollup_daily (
+    user_id UUID NOT NULL REFERENCES auth.users(id) ON DELETE CASCADE,
+    platform TEXT NOT NULL,
+    day DATE NOT NULL,
+    likes BIGINT DEFAULT 0,
+    comments BIGINT DEFAULT 0,
+    shares BIGINT DEFAULT 0,
+    reach BIGINT DEFAULT 0,
+    impressions BIGINT DEFAULT 0,
+    engagement_rate_sum DOUBLE PRECISION DEFAULT 0, -- Divide by samples for the average
+    samples INTEGER DEFAULT 0,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+
+    PRIMARY KEY (user_id, platform, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_metrics_rollup_daily_user_day ON metrics_rollup_daily(user_id, day DESC);
+
+-- =====================================================
+-- METRICS_ROLLUP_STATE TABLE
+-- Watermark of the last collected_at folded into the rollups
+-- =====================================================
+CREATE TABLE IF NOT EXISTS metrics_rollup_state (
+    id TEXT PRIMARY KEY,
+    last_collected_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT '-infinity',
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+INSERT INTO metrics_rollup_state (id) VALUES ('daily') ON CONFLICT (id) DO NOTHING;
+
+-- =====================================================
+-- ROLLUP FUNCTIONS
+-- =====================================================
+
+-- Fold metrics collected after the watermark (and before p_until) into the daily buckets.
+-- p_until lags NOW() slightly so rows from in-flight transactions are not skipped.
+CREATE OR REPLACE FUNCTION fold_metrics_rollup(p_until TIMESTAMP WITH TIME ZONE DEFAULT NOW() - INTERVAL '5 minutes')
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    v_since TIMESTAMP WITH TIME ZONE;
+    v_buckets INTEGER;
+BEGIN
+    SELECT last_collected_at INTO v_since
+    FROM metrics_rollup_state
+    WHERE id = 'daily'
+    FOR UPDATE;
+
+    IF v_since IS NULL THEN
+        INSERT INTO metrics_rollup_state (id) VALUES ('daily');
+        v_since := '-infinity';
+    END IF;
+
+    IF p_until <= v_since THEN
+        RETURN 0;
+    END IF;
+
+    INSERT INTO metrics_rollup_daily AS r (
+        user_id, platform, day, likes, comments, shares, reach, impressions, engagement_rate_sum, samples
+    )
+    SELECT
+        p.user_id,
+        p.platform,
+        (m.collected_at AT TIME ZONE 'UTC')::DATE,
+        SUM(COALESCE(m.likes, 0)),
+        SUM(COALESCE(m.comments, 0)),
+        SUM(COALESCE(m.shares, 0)),
+        SUM(COALESCE(m.reach, 0)),
+        SUM(COALESCE(m.impressions, 0)),
+        SUM(COALESCE(m.engagement_rate, 0)),
+        COUNT(*)
+    FROM metrics m
+    JOIN posts p ON p.id = m.post_id
+    WHERE m.collected_at > v_since
+      AND m.collected_at <= p_until
+    GROUP BY 1, 2, 3
+    ON CONFLICT (user_id, platform, day) DO UPDATE SET
+        likes = r.likes + EXCLUDED.likes,
+        comments = r.comments + EXCLUDED.comments,
+        shares = r.shares + EXCLUDED.shares,
+        reach = r.reach + EXCLUDED.reach,
+        impressions = r.impressions + EXCLUDED.impressions,
+        engagement_rate_sum = r.engagement_rate_sum + EXCLUDED.engagement_rate_sum,
+        samples = r.samples + EXCLUDED.samples,
+        updated_at = NOW();
+
+    GET DIAGNOSTICS v_buckets = ROW_COUNT;
+
+    UPDATE metrics_rollup_state
+    SET last_collected_at = p_until, updated_at = NOW()
+    WHERE id = 'daily';
+
+    RETURN v_buckets;
+END;
+$$;
+
+-- Rebuild all buckets from scratch (use after back-filling old metrics).
+CREATE OR REPLACE FUNCTION rebuild_metrics_rollup()
+RETURNS INTEGER
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    DELETE FROM metrics_rollup_daily;
+    UPDATE metrics_rollup_state SET last_collected_at = '-infinity', updated_at = NOW() WHERE id = 'daily';
+    RETURN fold_metrics_rollup();
+END;
+$$;
+
+-- Only the backend (service role) may run the rollup job
+REVOKE EXECUTE ON FUNCTION fold_metrics_rollup(TIMESTAMP WITH TIME ZONE) FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION rebuild_metrics_rollup() FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION fold_metrics_rollup(TIMESTAMP WITH TIME ZONE) TO service_role;
+GRANT EXECUTE ON FUNCTION rebuild_metrics_rollup() TO service_role;
+
+-- =====================================================
+-- ROW LEVEL SECURITY (RLS)
+-- =====================================================
+ALTER TABLE metrics_rollup_daily ENABLE ROW LEVEL SECURITY;
+ALTER TABLE metrics_rollup_state ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view their own rollups" ON metrics_rollup_daily
+    FOR SELECT USING (auth.uid() = user_id);
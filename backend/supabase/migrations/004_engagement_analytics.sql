@@ -0,0 +1,148 @@
+-- Migration: Server-side engagement aggregations
+-- Per-user analytics computed in Postgres and called through RPC, so only
+-- aggregate rows cross the network instead of every post and metric snapshot.
+-- Functions run as the caller (SECURITY INVOKER), so the posts/metrics RLS
+-- policies still apply.
+
+-- =====================================================
+-- OVERVIEW
+-- Totals and average engagement since p_since, plus the average engagement
+-- on either side of the median collected_at (for the growth rate)
+-- =====================================================
+CREATE OR REPLACE FUNCTION engagement_overview(p_user_id UUID, p_since TIMESTAMP WITH TIME ZONE)
+RETURNS TABLE (
+    likes BIGINT,
+    comments BIGINT,
+    shares BIGINT,
+    reach BIGINT,
+    impressions BIGINT,
+    engagement_rate DOUBLE PRECISION,
+    samples BIGINT,
+    recent_engagement_rate DOUBLE PRECISION,
+    older_engagement_rate DOUBLE PRECISION
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    WITH window_metrics AS (
+        SELECT m.likes, m.comments, m.shares, m.reach, m.impressions,
+               COALESCE(m.engagement_rate, 0)::DOUBLE PRECISION AS engagement_rate,
+               m.collected_at
+        FROM metrics m
+        JOIN posts p ON p.id = m.post_id
+        WHERE p.user_id = p_user_id
+          AND m.collected_at >= p_since
+    ),
+    mid AS (
+        SELECT percentile_cont(0.5) WITHIN GROUP (ORDER BY EXTRACT(EPOCH FROM collected_at)) AS mid_point
+        FROM window_metrics
+    )
+    SELECT
+        COALESCE(SUM(w.likes), 0)::BIGINT,
+        COALESCE(SUM(w.comments), 0)::BIGINT,
+        COALESCE(SUM(w.shares), 0)::BIGINT,
+        COALESCE(SUM(w.reach), 0)::BIGINT,
+        COALESCE(SUM(w.impressions), 0)::BIGINT,
+        AVG(w.engagement_rate),
+        COUNT(*),
+        AVG(w.engagement_rate) FILTER (WHERE EXTRACT(EPOCH FROM w.collected_at) >= mid.mid_point),
+        AVG(w.engagement_rate) FILTER (WHERE EXTRACT(EPOCH FROM w.collected_at) < mid.mid_point)
+    FROM window_metrics w
+    CROSS JOIN mid
+    GROUP BY mid.mid_point;
+$$;
+
+-- =====================================================
+-- PLATFORM BREAKDOWN
+-- One row per platform the user has posts on (samples = 0 when no metrics yet)
+-- =====================================================
+CREATE OR REPLACE FUNCTION platform_engagement(p_user_id UUID)
+RETURNS TABLE (
+    platform TEXT,
+    impressions BIGINT,
+    likes BIGINT,
+    comments BIGINT,
+    shares BIGINT,
+    engagement_rate DOUBLE PRECISION,
+    samples BIGINT
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        p.platform,
+        COALESCE(SUM(m.impressions), 0)::BIGINT,
+        COALESCE(SUM(m.likes), 0)::BIGINT,
+        COALESCE(SUM(m.comments), 0)::BIGINT,
+        COALESCE(SUM(m.shares), 0)::BIGINT,
+        AVG(COALESCE(m.engagement_rate, 0))::DOUBLE PRECISION,
+        COUNT(m.id)
+    FROM posts p
+    LEFT JOIN metrics m ON m.post_id = p.id
+    WHERE p.user_id = p_user_id
+    GROUP BY p.platform;
+$$;
+
+-- =====================================================
+-- CONTENT TYPES
+-- Average likes, comments, shares and engagement per content type
+-- =====================================================
+CREATE OR REPLACE FUNCTION content_type_engagement(p_user_id UUID)
+RETURNS TABLE (
+    content_type TEXT,
+    likes DOUBLE PRECISION,
+    comments DOUBLE PRECISION,
+    shares DOUBLE PRECISION,
+    engagement_rate DOUBLE PRECISION,
+    samples BIGINT
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    SELECT
+        p.content_type,
+        AVG(COALESCE(m.likes, 0))::DOUBLE PRECISION,
+        AVG(COALESCE(m.comments, 0))::DOUBLE PRECISION,
+        AVG(COALESCE(m.shares, 0))::DOUBLE PRECISION,
+        AVG(COALESCE(m.engagement_rate, 0))::DOUBLE PRECISION,
+        COUNT(*)
+    FROM metrics m
+    JOIN posts p ON p.id = m.post_id
+    WHERE p.user_id = p_user_id
+      AND p.content_type IS NOT NULL
+    GROUP BY p.content_type;
+$$;
+
+-- =====================================================
+-- POSTING TIMES
+-- Average engagement by UTC hour of posting (hour set) and by weekday,
+-- Monday = 0 (day_of_week set); the other column is NULL
+-- =====================================================
+CREATE OR REPLACE FUNCTION posting_time_engagement(p_user_id UUID)
+RETURNS TABLE (
+    hour INTEGER,
+    day_of_week INTEGER,
+    engagement_rate DOUBLE PRECISION,
+    samples BIGINT
+)
+LANGUAGE sql
+STABLE
+SET search_path = public
+AS $$
+    WITH posted AS (
+        SELECT
+            EXTRACT(HOUR FROM p.posted_at AT TIME ZONE 'UTC')::INTEGER AS hour,
+            (EXTRACT(ISODOW FROM p.posted_at AT TIME ZONE 'UTC')::INTEGER - 1) AS day_of_week,
+            COALESCE(m.engagement_rate, 0)::DOUBLE PRECISION AS engagement_rate
+        FROM metrics m
+        JOIN posts p ON p.id = m.post_id
+        WHERE p.user_id = p_user_id
+          AND p.posted_at IS NOT NULL
+    )
+    SELECT hour, day_of_week, AVG(engagement_rate), COUNT(*)
+    FROM posted
+    GROUP BY GROUPING SETS ((hour), (day_of_week));
+$$;
@@ -0,0 +1,8 @@
+-- Migration: Readable rollup watermark
+-- The API compares metrics_rollup_state.last_collected_at with NOW() to decide
+-- whether the daily rollups are current or it should summarize raw metrics.
+-- The watermark is a single timestamp with no user data, so anyone may read it.
+
+DROP POLICY IF EXISTS "Anyone can read the rollup watermark" ON metrics_rollup_state;
+CREATE POLICY "Anyone can read the rollup watermark" ON metrics_rollup_state
+    FOR SELECT USING (true);